@@ -0,0 +1,262 @@
+#!/usr/bin/env python
+"""
+Gate de regressão de performance
+
+Sobe o servidor Django, executa cenários Locust em modo headless, lê os
+arquivos _stats.csv / _stats_history.csv e compara p50/p95/p99 e RPS de cada
+endpoint com um baseline salvo. Sai com código 1 se algum endpoint piorar
+além da tolerância ou não aparecer na execução, e com código 2 se faltar o
+baseline de algum cenário ou a carga não rodar — dá para usar no CI antes
+do deploy.
+
+    python benchmark.py                          # todos os cenários
+    python benchmark.py --scenario comparison    # apenas um cenário
+    python benchmark.py --update-baseline        # grava o resultado como baseline
+    python benchmark.py --no-server --host http://127.0.0.1:8000
+
+Cenários: benchmarks/scenarios.json. Baseline: benchmarks/baseline.json.
+"""
+
+import argparse
+import csv
+import json
+import os
+import shlex
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+
+BASE_DIR = Path(__file__).resolve().parent
+LATENCY_METRICS = ('p50', 'p95', 'p99')
+
+# Tolerâncias padrão (podem ser sobrescritas no baseline e na linha de comando)
+DEFAULT_TOLERANCES = {
+    'latency': 0.20,        # até 20% mais lento
+    'latency_abs_ms': 5,    # ...e ignora diferenças menores que 5ms (ruído)
+    'rps': 0.15,            # até 15% menos requests/s
+    'failure_rate': 0.01,   # até +1 ponto percentual de falhas
+    'min_requests': 20,     # endpoints com menos requests não são comparados
+}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenario', action='append', help='Cenário a executar (repetível)')
+    parser.add_argument('--scenarios-file', default=BASE_DIR / 'benchmarks' / 'scenarios.json', type=Path)
+    parser.add_argument('--baseline', default=BASE_DIR / 'benchmarks' / 'baseline.json', type=Path)
+    parser.add_argument('--update-baseline', action='store_true', help='Grava os resultados como novo baseline')
+    parser.add_argument('--results-dir', default=BASE_DIR / 'results', type=Path)
+    parser.add_argument('--host', default='http://127.0.0.1:8000')
+    parser.add_argument('--no-server', action='store_true', help='Usa um servidor já em execução em --host')
+    parser.add_argument('--server-cmd', default=None,
+                        help='Comando para subir o servidor (padrão: manage.py runserver --noreload)')
+    parser.add_argument('--warmup', type=float, default=10,
+                        help='Segundos iniciais ignorados no cálculo de RPS')
+    parser.add_argument('--tolerance-latency', type=float, help='Piora relativa aceita em p50/p95/p99')
+    parser.add_argument('--tolerance-rps', type=float, help='Queda relativa aceita em RPS')
+    return parser.parse_args()
+
+
+def start_server(args):
+    url = urllib.parse.urlsplit(args.host)
+    port = url.port or (443 if url.scheme == 'https' else 80)
+    command = args.server_cmd or f'{sys.executable} manage.py runserver 127.0.0.1:{port} --noreload'
+    log = open(args.results_dir / 'benchmark_server.log', 'w')
+    try:
+        server = subprocess.Popen(shlex.split(command), cwd=BASE_DIR, stdout=log, stderr=subprocess.STDOUT)
+    except OSError:
+        log.close()
+        raise
+    server.log = log  # Fechado em stop_server
+
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        if server.poll() is not None:
+            log.close()
+            raise RuntimeError(f"Servidor encerrou ao iniciar (veja {log.name})")
+        try:
+            with urllib.request.urlopen(f"{args.host}/api/health/", timeout=2):
+                return server
+        except (urllib.error.URLError, ConnectionError, OSError):
+            time.sleep(0.5)
+    stop_server(server)
+    raise RuntimeError(f"Servidor não respondeu em {args.host}/api/health/")
+
+
+def stop_server(server):
+    server.terminate()
+    try:
+        server.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        server.kill()
+        server.wait()
+    server.log.close()
+
+
+def run_locust(name, scenario, args):
+    prefix = args.results_dir / f"benchmark_{name}_{datetime.now():%Y%m%d_%H%M%S}"
+    command = [
+        'locust', '-f', scenario['locustfile'],
+        '--host', args.host,
+        '--users', str(scenario['users']),
+        '--spawn-rate', str(scenario['spawn_rate']),
+        '--run-time', scenario['run_time'],
+        '--headless', '--only-summary',
+        '--csv', str(prefix), '--csv-full-history',
+        *scenario.get('extra_args', []),
+    ]
+    env = {**os.environ, **scenario.get('env', {})}
+    print(f"🚀 {name}: {' '.join(command)}")
+    # Locust sai com código 1 quando há falhas; isso é avaliado na comparação
+    subprocess.run(command, cwd=BASE_DIR, env=env, check=False)
+    return prefix
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_results(prefix, warmup):
+    """Retorna {endpoint: {p50, p95, p99, rps, failure_rate, requests}}"""
+    missing = [path for path in (f"{prefix}_stats.csv", f"{prefix}_stats_history.csv") if not os.path.exists(path)]
+    if missing:
+        # Locust não iniciou (locustfile inválido, porta ocupada...): erro de setup, não regressão
+        raise RuntimeError(f"Locust não gerou {', '.join(missing)} (veja a saída acima)")
+
+    results = {}
+    with open(f"{prefix}_stats.csv", newline='') as handle:
+        for row in csv.DictReader(handle):
+            requests = int(row['Request Count'])
+            if not requests:
+                continue
+            results[row['Name']] = {
+                'p50': _number(row['50%']),
+                'p95': _number(row['95%']),
+                'p99': _number(row['99%']),
+                'rps': _number(row['Requests/s']),
+                'failure_rate': int(row['Failure Count']) / requests,
+                'requests': requests,
+            }
+
+    # RPS em regime: média do histórico após o aquecimento (sem a rampa de usuários)
+    samples = {}
+    with open(f"{prefix}_stats_history.csv", newline='') as handle:
+        rows = list(csv.DictReader(handle))
+    if rows:
+        start = int(rows[0]['Timestamp'])
+        for row in rows:
+            if int(row['Timestamp']) - start < warmup:
+                continue
+            rps = _number(row['Requests/s'])
+            if rps is not None:
+                samples.setdefault(row['Name'], []).append(rps)
+    for name, values in samples.items():
+        if name in results and values:
+            results[name]['rps'] = sum(values) / len(values)
+    return results
+
+
+def compare(name, current, baseline, tolerances):
+    """Lista de regressões (strings) do cenário em relação ao baseline"""
+    regressions = []
+    print(f"\n📊 {name}")
+    print(f"   {'Endpoint':<34}{'Métrica':<14}{'Baseline':>10}{'Atual':>10}{'Δ':>9}")
+    for endpoint, before in sorted(baseline.items()):
+        after = current.get(endpoint)
+        if after is None:
+            # Endpoint que sumiu (renomeado, quebrado) não pode passar sem comparação
+            print(f" ❌{endpoint[:33]:<34}sem requests nesta execução")
+            regressions.append(f"{name}/{endpoint}: sem requests nesta execução")
+            continue
+        if min(before.get('requests', 0), after['requests']) < tolerances['min_requests']:
+            print(f"   {endpoint[:33]:<34}poucos requests para comparar")
+            continue
+        for metric in LATENCY_METRICS + ('rps', 'failure_rate'):
+            old, new = before.get(metric), after.get(metric)
+            if old is None or new is None:
+                continue
+            if metric in LATENCY_METRICS:
+                worse = new > old * (1 + tolerances['latency']) and new - old > tolerances['latency_abs_ms']
+            elif metric == 'rps':
+                worse = new < old * (1 - tolerances['rps'])
+            else:
+                worse = new > old + tolerances['failure_rate']
+            change = (new - old) / old if old else 0.0
+            flag = '❌' if worse else '  '
+            print(f" {flag}{endpoint[:33]:<34}{metric:<14}{old:>10.2f}{new:>10.2f}{change:>+9.1%}")
+            if worse:
+                regressions.append(f"{name}/{endpoint} {metric}: {old:.2f} → {new:.2f} ({change:+.1%})")
+    return regressions
+
+
+def main():
+    args = parse_args()
+    args.results_dir.mkdir(parents=True, exist_ok=True)
+    scenarios = json.loads(args.scenarios_file.read_text())
+    selected = args.scenario or list(scenarios)
+    unknown = [name for name in selected if name not in scenarios]
+    if unknown:
+        print(f"❌ Cenário(s) desconhecido(s): {', '.join(unknown)}")
+        return 2
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline.exists() else {}
+    tolerances = {**DEFAULT_TOLERANCES, **baseline.get('tolerances', {})}
+    if args.tolerance_latency is not None:
+        tolerances['latency'] = args.tolerance_latency
+    if args.tolerance_rps is not None:
+        tolerances['rps'] = args.tolerance_rps
+
+    # Sem baseline o gate não compararia nada: falha antes de rodar a carga
+    without_baseline = [name for name in selected if name not in baseline.get('scenarios', {})]
+    if without_baseline and not args.update_baseline:
+        print(f"❌ Sem baseline para {', '.join(without_baseline)} em {args.baseline} "
+              "(grave com --update-baseline)")
+        return 2
+
+    server = None
+    try:
+        if not args.no_server:
+            server = start_server(args)
+        results = {
+            name: parse_results(run_locust(name, scenarios[name], args), args.warmup)
+            for name in selected
+        }
+    except (RuntimeError, OSError) as exc:
+        # Código 2: falha de setup (servidor, locust, CSVs), diferente de regressão (1)
+        print(f"❌ {exc}")
+        return 2
+    finally:
+        if server is not None:
+            stop_server(server)
+
+    if args.update_baseline:
+        baseline.setdefault('tolerances', DEFAULT_TOLERANCES)
+        baseline.setdefault('scenarios', {}).update(results)
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(baseline, indent=4, sort_keys=True) + '\n')
+        print(f"\n✅ Baseline atualizado: {args.baseline}")
+        return 0
+
+    regressions = []
+    for name in selected:
+        regressions += compare(name, results[name], baseline['scenarios'][name], tolerances)
+
+    if regressions:
+        print("\n❌ Regressões de performance:")
+        for regression in regressions:
+            print(f"   {regression}")
+        return 1
+    print("\n✅ Nenhuma regressão acima das tolerâncias")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,10 +1,18 @@
 from django.contrib import admin
-from .models import Post, Category
+from .admin_changelist import (
+    CachedBooleanFieldListFilter,
+    CachedDateFieldListFilter,
+    CachedRelatedFieldListFilter,
+    EstimatedCountPaginator,
+    LargeTableChangeList,
+)
+from .models import Job, Post, Category
+from .search import admin_search_filter
 
 
 @admin.register(Category)
 class CategoryAdmin(admin.ModelAdmin):
-    list_display = ['name', 'created_at']
+    list_display = ['name', 'published_post_count', 'created_at']
     search_fields = ['name']
     prepopulated_fields = {'description': ('name',)}
 
@@ -12,11 +20,35 @@ class CategoryAdmin(admin.ModelAdmin):
 @admin.register(Post)
 class PostAdmin(admin.ModelAdmin):
     list_display = ['title', 'author', 'category', 'published', 'views_count', 'created_at']
-    list_filter = ['published', 'category', 'created_at']
+    list_filter = [
+        ('published', CachedBooleanFieldListFilter),
+        ('category', CachedRelatedFieldListFilter),
+        ('created_at', CachedDateFieldListFilter),
+    ]
+    # Exibe a caixa de busca; a busca em si usa o índice FTS5 (get_search_results)
     search_fields = ['title', 'content']
     prepopulated_fields = {'slug': ('title',)}
     date_hierarchy = 'created_at'
     list_editable = ['published']
+    # Contagens estimadas/em cache e date_hierarchy pelo índice (blog/admin_changelist.py);
+    # sem o segundo COUNT(*) do total sem filtros
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    
+    def get_changelist(self, request, **kwargs):
+        return LargeTableChangeList
     
     def get_queryset(self, request):
         return super().get_queryset(request).select_related('author', 'category')
+    
+    def get_search_results(self, request, queryset, search_term):
+        # Sem LIKE '%termo%' sobre todo o conteúdo; o filtro não gera duplicatas
+        return admin_search_filter(queryset, search_term), False
+
+
+@admin.register(Job)
+class JobAdmin(admin.ModelAdmin):
+    list_display = ['id', 'kind', 'status', 'created_at', 'started_at', 'finished_at']
+    list_filter = ['status', 'kind']
+    readonly_fields = ['kind', 'key', 'params', 'status', 'result', 'error',
+                       'created_at', 'started_at', 'finished_at']
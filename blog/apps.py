@@ -4,3 +4,13 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'blog'
+
+    def ready(self):
+        from django.db.backends.signals import connection_created
+        from django.db.models.signals import post_migrate
+        from blogproject.sqlite_profile import apply_sqlite_pragmas
+        from . import signals  # noqa: F401
+        from .search import ensure_fts_triggers
+
+        connection_created.connect(apply_sqlite_pragmas, dispatch_uid='sqlite_profile')
+        post_migrate.connect(ensure_fts_triggers, sender=self, dispatch_uid='blog_fts_triggers')
@@ -0,0 +1,116 @@
+"""
+Versões assíncronas das views principais (servidas via ASGI em /async/...)
+
+Mesmas queries e templates das views de views.py, mas com o ORM assíncrono
+(aget, aupdate, async for) e asyncio.sleep: enquanto um request espera o banco
+ou o "processamento" do slow_endpoint, o worker atende outros requests em vez
+de ficar com uma thread bloqueada.
+
+Os querysets são avaliados por completo antes do render(): o template roda
+no event loop e uma query preguiçosa lá dentro geraria SynchronousOnlyOperation.
+Sob WSGI (runserver) as views funcionam, mas sem ganho de concorrência.
+"""
+
+import asyncio
+import random
+
+from django.contrib.auth.models import User
+from django.db.models import F
+from django.http import Http404, HttpResponse, JsonResponse
+from django.shortcuts import render
+
+from .conditional import (
+    api_posts_validators, conditional_page, count_post_view, post_detail_validators,
+)
+from .models import Post, Category
+from .pagination import KeysetPaginator, apaginate_posts
+from .related import arelated_posts
+from .serializers import PostRowSerializer, parse_api_params
+
+
+async def _aget_published_post(slug):
+    try:
+        return await Post.objects.select_related('author', 'category')\
+                                 .aget(slug=slug, published=True)
+    except Post.DoesNotExist:
+        raise Http404("Post não encontrado")
+
+
+async def home(request):
+    """Homepage - versão assíncrona"""
+    recent_posts = Post.objects.filter(published=True)\
+                              .select_related('author', 'category')\
+                              .defer('content')[:5]
+
+    context = {
+        'recent_posts': [post async for post in recent_posts],
+        'categories': [category async for category in Category.objects.all()],
+        'page_title': 'Blog Home',
+        'cache_post_cards': True,
+    }
+    return render(request, 'blog/home.html', context)
+
+
+async def post_list_optimized(request):
+    """Lista paginada com select_related - versão assíncrona"""
+    posts = Post.objects.filter(published=True)\
+                       .select_related('author', 'category')\
+                       .defer('content')\
+                       .order_by('-created_at')
+
+    context = {
+        'page_obj': await apaginate_posts(request, posts, 10),
+        'page_title': 'Todos os Posts (Otimizado, async)',
+        'cache_post_cards': True,
+    }
+    return render(request, 'blog/post_list.html', context)
+
+
+@conditional_page(post_detail_validators, on_not_modified=count_post_view)
+async def post_detail_optimized(request, slug):
+    """Detalhes do post com UPDATE via F() - versão assíncrona"""
+    post = await _aget_published_post(slug)
+
+    await Post.objects.filter(id=post.id).aupdate(views_count=F('views_count') + 1)
+
+    context = {
+        'post': post,
+        'related_posts': await arelated_posts(post),
+        'page_title': post.title
+    }
+    return render(request, 'blog/post_detail.html', context)
+
+
+@conditional_page(api_posts_validators)
+async def api_posts(request):
+    """API de posts em JSON (values_list + fragmentos em cache) - versão assíncrona"""
+    try:
+        fields, limit = parse_api_params(request.GET)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    serializer = PostRowSerializer(fields)
+    rows = serializer.queryset(Post.objects.filter(published=True))
+    page = await KeysetPaginator(rows, limit, key=serializer.key).aget_page(request.GET.get('cursor'))
+
+    body = serializer.render(page, next=page.next_cursor, previous=page.previous_cursor)
+    return HttpResponse(body, content_type='application/json')
+
+
+async def slow_endpoint(request):
+    """Endpoint lento - versão assíncrona (a espera não ocupa uma thread)"""
+    await asyncio.sleep(random.uniform(1, 3))
+
+    # Mantém o N+1 da versão síncrona para a comparação ser justa
+    posts_count = 0
+    async for post in Post.objects.all():
+        if post.published:
+            posts_count += 1
+            author = await User.objects.aget(pk=post.author_id)
+            author_name = author.username
+
+    return JsonResponse({
+        'message': 'Processamento concluído',
+        'posts_count': posts_count,
+        'processing_time': 'Variável entre 1-3 segundos'
+    })
@@ -0,0 +1,173 @@
+"""
+GET condicional (ETag / Last-Modified) verificado antes da view
+
+Os validadores de cada página saem de uma consulta barata: o updated_at do
+post (detalhe) ou o maior updated_at da listagem, lido pelo índice. Se o
+cliente envia If-None-Match / If-Modified-Since e nada mudou, a resposta é
+304 Not Modified, sem a consulta principal, sem o template e sem corpo.
+
+O ETag é fraco (W/"..."): identifica o conteúdo, não os bytes. Além do
+updated_at, entram nele outras partes que mudam a página sem tocar no post
+(ex.: a versão da categoria em blog/page_cache.py, que os sinais incrementam
+quando um post é apagado). O Last-Modified só considera o updated_at: quem
+envia apenas If-Modified-Since não percebe essas outras mudanças.
+
+As respostas levam Cache-Control: no-cache, isto é, o navegador guarda a
+página mas revalida a cada acesso (sem a heurística de frescor que o
+Last-Modified sozinho ativaria).
+"""
+
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.db.models import F
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import related
+from .models import Post
+from .page_cache import current_versions
+from .pagination import KeysetPaginator
+from .serializers import parse_api_params
+
+
+class Validators:
+    """Validadores de uma página e dados extras para o callback de 304"""
+
+    def __init__(self, last_modified, *parts, **extra):
+        self.last_modified = last_modified
+        digest = hashlib.md5(repr((last_modified, parts)).encode()).hexdigest()
+        self.etag = f'W/"{digest}"'
+        self.extra = extra
+
+
+def _not_modified(request, validators):
+    if validators is None or validators.last_modified is None:
+        return None
+    return get_conditional_response(
+        request,
+        etag=validators.etag,
+        last_modified=int(validators.last_modified.timestamp()),
+    )
+
+
+def _set_headers(response, validators):
+    if validators is None or response.status_code != 200:
+        return response
+    if not response.has_header('ETag'):
+        response['ETag'] = validators.etag
+    if validators.last_modified is not None and not response.has_header('Last-Modified'):
+        response['Last-Modified'] = http_date(validators.last_modified.timestamp())
+    patch_cache_control(response, no_cache=True)
+    return response
+
+
+def conditional_page(validators, on_not_modified=None):
+    """Decorator de GET condicional (views síncronas e assíncronas)
+
+    `validators(request, *args, **kwargs)` retorna Validators, ou None quando
+    a página não tem validadores (ex.: o post não existe: a view responde 404).
+    `on_not_modified(request, validators)` roda antes de cada 304, para o que
+    a view faria mesmo sem renderizar (ex.: contar a visualização).
+    """
+    def decorator(view_func):
+        if iscoroutinefunction(view_func):
+            async_validators = sync_to_async(validators)
+            async_callback = on_not_modified and sync_to_async(on_not_modified)
+
+            @wraps(view_func)
+            async def async_wrapper(request, *args, **kwargs):
+                if request.method not in ('GET', 'HEAD'):
+                    return await view_func(request, *args, **kwargs)
+                state = await async_validators(request, *args, **kwargs)
+                response = _not_modified(request, state)
+                if response is not None:
+                    if async_callback and response.status_code == 304:
+                        await async_callback(request, state)
+                    return response
+                return _set_headers(await view_func(request, *args, **kwargs), state)
+
+            return async_wrapper
+
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+            state = validators(request, *args, **kwargs)
+            response = _not_modified(request, state)
+            if response is not None:
+                if on_not_modified and response.status_code == 304:
+                    on_not_modified(request, state)
+                return response
+            return _set_headers(view_func(request, *args, **kwargs), state)
+
+        return wrapper
+    return decorator
+
+
+def _last_updated(queryset):
+    """Maior updated_at do queryset (índices com updated_at: uma busca com LIMIT 1)"""
+    return queryset.order_by('-updated_at').values_list('updated_at', flat=True).first()
+
+
+def post_detail_validators(request, slug):
+    """updated_at do post + a lista de relacionados exibida (cache ou uma consulta por chave)
+    + as versões dos nomes de categoria e autor
+
+    O views_count do post fica de fora: muda a cada acesso e invalidaria
+    todas as revalidações. Quem recebe 304 continua vendo o número anterior.
+    """
+    row = (
+        Post.objects.filter(slug=slug, published=True)
+        .values_list('id', 'updated_at', 'category_id')
+        .first()
+    )
+    if row is None:
+        return None
+    post_id, updated_at, category_id = row
+    cards = []
+    if category_id is not None:
+        cards = related.stored_cards(category_id, related.default_ranking())
+    versions = current_versions(['categories', 'authors'])
+    return Validators(updated_at, post_id, cards, versions, post_id=post_id)
+
+
+def count_post_view(request, validators):
+    """Um 304 também é uma visualização: o mesmo UPDATE com F() da view"""
+    Post.objects.filter(id=validators.extra['post_id']).update(views_count=F('views_count') + 1)
+
+
+def _page_row_key(row):
+    return row[1], row[0]
+
+
+def api_posts_validators(request):
+    """Maior updated_at dos posts publicados + as versões de blog/signals.py
+
+    'posts' muda quando um post sai da listagem (apagado ou despublicado) sem
+    mudar o maior updated_at; 'categories' e 'authors', quando um nome
+    exibido na resposta pode ter mudado. Com views_count entre os campos (o
+    padrão), entram também os pares (id, views_count) da página pedida: o
+    contador muda sem tocar no updated_at. Custa uma busca com LIMIT pelo
+    índice (created_at, id), sem joins nem serialização.
+    """
+    try:
+        fields, limit = parse_api_params(request.GET)
+    except ValueError:
+        return None  # A view responde 400
+    published = Post.objects.filter(published=True)
+    parts = [current_versions(['posts', 'categories', 'authors'])]
+    if 'views_count' in fields:
+        rows = published.values_list('id', 'created_at', 'views_count')
+        page = KeysetPaginator(rows, limit, key=_page_row_key).get_page(request.GET.get('cursor'))
+        parts.append([(post_id, views_count) for post_id, _, views_count in page])
+    return Validators(_last_updated(published), *parts)
+
+
+def category_posts_validators(request, category_id):
+    """Maior updated_at dos posts da categoria + as versões da categoria e dos autores"""
+    return Validators(
+        _last_updated(Post.objects.filter(category_id=category_id, published=True)),
+        current_versions([f'category:{category_id}', 'authors']),
+    )
@@ -0,0 +1,103 @@
+"""
+Cache de fragmentos dos cards de post nas listas
+
+Cada card (título, meta, trecho com truncatewords e URLs) é renderizado uma
+vez e guardado no cache com uma chave versionada por id + updated_at: editar
+o post muda a chave e o card antigo simplesmente deixa de ser usado. Renomear
+uma categoria ou um autor muda as versões 'categories'/'authors'
+(blog/signals.py), que também entram na chave. Uma página busca todos os
+seus cards com um único get_many.
+
+O views_count muda a cada acesso sem tocar em updated_at: em vez de entrar
+na chave (os posts mais vistos teriam a pior taxa de acerto), o card é
+guardado com um marcador no lugar do número, trocado a cada exibição.
+"""
+
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template.loader import get_template
+from django.utils.safestring import mark_safe
+
+from .page_cache import current_versions
+
+CARD_TEMPLATE = 'blog/includes/post_card.html'
+
+# Variações do card: número de palavras do trecho e se mostra a categoria
+CARD_VARIANTS = {
+    'home': {'words': 30, 'show_category': True},
+    'list': {'words': 50, 'show_category': True},
+    'category': {'words': 50, 'show_category': False},
+}
+
+# Ocupa o lugar do views_count no card guardado
+VIEWS_MARKER = mark_safe('<!--views_count-->')
+
+
+class FragmentStats:
+    """Contadores de hits/misses do cache de cards (por processo)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def record(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+    def as_dict(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / total, 4) if total else None,
+            }
+
+
+stats = FragmentStats()
+
+
+def card_versions(variant):
+    """Versões dos nomes exibidos na variação (autor e, se exibida, categoria)"""
+    names = ['authors']
+    if CARD_VARIANTS[variant]['show_category']:
+        names.append('categories')
+    return current_versions(names)
+
+
+def card_cache_key(post, variant, versions):
+    return f"post_card:{variant}:{post.pk}:{post.updated_at.timestamp()}:{versions}"
+
+
+def render_post_cards(posts, variant='list', cached=True):
+    """Retorna o HTML dos cards dos posts, na ordem recebida"""
+    options = CARD_VARIANTS[variant]
+    posts = list(posts)
+    template = get_template(CARD_TEMPLATE)
+
+    if not cached:
+        return [
+            mark_safe(template.render({'post': post, 'views_count': post.views_count, **options}))
+            for post in posts
+        ]
+
+    versions = card_versions(variant)
+    keys = [card_cache_key(post, variant, versions) for post in posts]
+    found = cache.get_many(keys)
+
+    cards = []
+    missing = {}
+    for key, post in zip(keys, posts):
+        card = found.get(key)
+        if card is None:
+            card = missing[key] = template.render({'post': post, 'views_count': VIEWS_MARKER, **options})
+        cards.append(mark_safe(card.replace(VIEWS_MARKER, str(post.views_count), 1)))
+
+    if missing:
+        cache.set_many(missing, getattr(settings, 'POST_CARD_CACHE_TIMEOUT', 60 * 60))
+    stats.record(hits=len(found), misses=len(missing))
+    return cards
@@ -0,0 +1,169 @@
+"""
+Execução de tarefas pesadas fora do request (pool local de threads)
+
+A view apenas enfileira o job (uma linha em blog_job) e responde 202 com o
+id; um pool de threads do próprio processo executa o trabalho e grava o
+resultado, consultado depois em /api/jobs/<id>/. Assim a latência do request
+fica constante e o trabalho pesado é limitado por JOBS['WORKERS'].
+
+Jobs idênticos (mesmo tipo e parâmetros) em andamento são deduplicados pela
+constraint única parcial de Job.key: o segundo request recebe o job existente
+em vez de disparar o trabalho de novo — inclusive entre processos.
+
+Cada processo tem o seu pool; um job ainda na fila quando o processo morre é
+marcado como falho depois de JOBS['STALE_AFTER'] segundos.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Job, Post
+
+logger = logging.getLogger(__name__)
+
+_handlers = {}
+
+
+def job_handler(kind):
+    """Registra a função que executa os jobs do tipo `kind`"""
+    def decorator(func):
+        _handlers[kind] = func
+        return func
+    return decorator
+
+
+def job_key(kind, params):
+    raw = json.dumps([kind, params], sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(raw.encode()).hexdigest()
+
+
+class JobQueue:
+    """Enfileira jobs no banco e os executa em um pool de threads"""
+
+    def __init__(self, workers=2, stale_after=300, keep_finished=3600):
+        self.workers = workers
+        self.stale_after = stale_after
+        self.keep_finished = keep_finished
+        self._lock = threading.Lock()
+        self._executor = None
+        self._pid = None
+        self._last_prune = 0.0
+
+    def _get_executor(self):
+        # Após um fork (ex.: gunicorn --preload) as threads do pai não existem
+        with self._lock:
+            if self._executor is None or self._pid != os.getpid():
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix='blog-job'
+                )
+                self._pid = os.getpid()
+            return self._executor
+
+    def enqueue(self, kind, **params):
+        """Retorna (job, criado); `criado` é False se um job idêntico já estava em andamento"""
+        if kind not in _handlers:
+            raise ValueError(f"Tipo de job desconhecido: {kind}")
+        key = job_key(kind, params)
+
+        for _ in range(3):
+            existing = Job.objects.filter(key=key, status__in=Job.IN_FLIGHT).first()
+            if existing is not None:
+                if not self._is_stale(existing):
+                    return existing, False
+                self._abandon(existing)
+            try:
+                with transaction.atomic():
+                    job = Job.objects.create(kind=kind, key=key, params=params)
+            except IntegrityError:
+                continue  # Outro request criou o mesmo job ao mesmo tempo
+            self._get_executor().submit(self._run, job.pk)
+            return job, True
+
+        raise RuntimeError(f"Não foi possível enfileirar o job {kind}")
+
+    def _is_stale(self, job):
+        started = job.started_at or job.created_at
+        return timezone.now() - started > timedelta(seconds=self.stale_after)
+
+    def _abandon(self, job):
+        Job.objects.filter(pk=job.pk, status__in=Job.IN_FLIGHT).update(
+            status=Job.FAILED,
+            error='Abandonado: o processo que executava o job parou',
+            finished_at=timezone.now(),
+        )
+
+    def _run(self, job_id):
+        close_old_connections()
+        try:
+            # Marca como em execução só se ainda estiver na fila
+            claimed = Job.objects.filter(pk=job_id, status=Job.QUEUED).update(
+                status=Job.RUNNING, started_at=timezone.now()
+            )
+            if not claimed:
+                return
+            job = Job.objects.get(pk=job_id)
+            try:
+                result = _handlers[job.kind](**job.params)
+            except Exception as exc:
+                logger.exception('Job %s (%s) falhou', job_id, job.kind)
+                outcome = {'status': Job.FAILED, 'error': repr(exc)}
+            else:
+                outcome = {'status': Job.DONE, 'result': result}
+            # Só se ainda estiver em execução: um job dado como abandonado
+            # (_abandon, depois de STALE_AFTER) continua FAILED
+            finished = Job.objects.filter(pk=job_id, status=Job.RUNNING).update(
+                finished_at=timezone.now(), **outcome
+            )
+            if not finished:
+                logger.warning('Job %s (%s) terminou depois de ser abandonado', job_id, job.kind)
+            self._prune()
+        finally:
+            close_old_connections()
+
+    def _prune(self):
+        """Apaga jobs encerrados há mais de keep_finished (no máximo 1x por minuto)"""
+        now = time.monotonic()
+        if not self.keep_finished or now - self._last_prune < 60:
+            return
+        self._last_prune = now
+        cutoff = timezone.now() - timedelta(seconds=self.keep_finished)
+        Job.objects.filter(finished_at__lt=cutoff).delete()
+
+
+@job_handler('slow_report')
+def slow_report():
+    """O trabalho que o slow_endpoint fazia dentro do request"""
+    # Simula processamento pesado
+    time.sleep(random.uniform(1, 3))
+
+    # Query ineficiente - busca todos os posts sem otimização
+    posts_count = 0
+    for post in Post.objects.all():
+        if post.published:
+            posts_count += 1
+            # Acessa author sem select_related (N+1 problem)
+            author_name = post.author.username
+
+    return {
+        'message': 'Processamento concluído',
+        'posts_count': posts_count,
+        'processing_time': 'Variável entre 1-3 segundos'
+    }
+
+
+queue = JobQueue(
+    workers=settings.JOBS.get('WORKERS', 2),
+    stale_after=settings.JOBS.get('STALE_AFTER', 300),
+    keep_finished=settings.JOBS.get('KEEP_FINISHED', 3600),
+)
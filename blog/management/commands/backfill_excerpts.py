@@ -0,0 +1,44 @@
+"""
+Django management command para (re)calcular o trecho dos posts
+Execute: python manage.py backfill_excerpts [--all] [--batch-size 2000]
+
+A migração 0007 já preenche os posts existentes. Use o comando depois de
+alterar o conteúdo com QuerySet.update ou SQL direto (não passam pelo
+Post.save) ou ao mudar EXCERPT_WORDS (--all).
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog.excerpts import backfill_excerpts
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Preenche Post.excerpt em lotes a partir do conteúdo'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Recalcula todos os posts (padrão: só os sem trecho)',
+        )
+        parser.add_argument('--batch-size', type=int, default=2000, help='Posts por lote/transação')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+
+        def progress(done):
+            if done % (options['batch_size'] * 50) == 0:
+                rate = done / max(time.monotonic() - started, 1e-6)
+                self.stdout.write(f"   {done} posts ({rate:,.0f}/s)")
+
+        done = backfill_excerpts(
+            Post,
+            batch_size=options['batch_size'],
+            only_missing=not options['all'],
+            progress=progress,
+        )
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(f"✅ {done} trecho(s) gravado(s) em {elapsed:.1f}s"))
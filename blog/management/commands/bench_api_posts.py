@@ -0,0 +1,66 @@
+"""
+Django management command para medir o custo por request da API de posts
+Execute: python manage.py bench_api_posts [--requests 200] [--limit 20]
+
+Compara api_posts_unoptimized (instâncias completas + select_related) com
+api_posts (values_list + fragmentos JSON em cache): tempo de CPU e pico de
+memória alocada por request, chamando as views diretamente.
+"""
+
+import time
+import tracemalloc
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.test import RequestFactory
+from blog import views
+
+
+class Command(BaseCommand):
+    help = 'Mede CPU e memória por request das versões da API de posts'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests por variante')
+        parser.add_argument('--limit', type=int, default=20, help='Posts por página')
+        parser.add_argument('--fields', default='', help='Projeção (?fields=) para a versão otimizada')
+
+    def handle(self, *args, **options):
+        factory = RequestFactory()
+        variants = [
+            ('api_posts_unoptimized', views.api_posts_unoptimized, {}),
+            ('api_posts (cache frio)', views.api_posts, {'limit': options['limit']}),
+            ('api_posts (cache quente)', views.api_posts, {'limit': options['limit']}),
+        ]
+        if options['fields']:
+            for _, _, params in variants[1:]:
+                params['fields'] = options['fields']
+
+        self.stdout.write(f"📊 {options['requests']} requests por variante\n")
+        self.stdout.write(f"{'Variante':<28}{'CPU/req (ms)':>14}{'Pico mem (KB)':>16}{'Bytes':>10}")
+
+        for name, view, params in variants:
+            if 'frio' in name:
+                cache.clear()
+            request = factory.get('/api/posts/', params)
+            view(request)  # Aquecimento (conexão, imports, templates)
+            if 'frio' in name:
+                cache.clear()
+
+            cpu_total = 0.0
+            peak_total = 0
+            size = 0
+            for _ in range(options['requests']):
+                if 'frio' in name:
+                    cache.clear()
+                tracemalloc.start()
+                started = time.process_time()
+                response = view(factory.get('/api/posts/', params))
+                cpu_total += time.process_time() - started
+                peak_total += tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+                size = len(response.content)
+
+            count = options['requests']
+            self.stdout.write(
+                f"{name:<28}{cpu_total / count * 1000:>14.3f}{peak_total / count / 1024:>16.1f}{size:>10}"
+            )
@@ -0,0 +1,169 @@
+"""
+Django management command para comparar os backends de cache
+Execute: python manage.py bench_cache [--processes 4] [--ops 5000]
+
+Compara LocMemCache, FileBasedCache e o SQLiteCache (blogproject/sqlite_cache.py),
+cada um num local temporário próprio:
+
+1. Um processo: µs por get (acerto e falta), set, incr e get_many (uma chamada
+   com 10 chaves).
+2. Vários processos (como workers do gunicorn) no padrão cache-aside: get e,
+   na falta, set. Com chaves em distribuição Zipf, mostra a taxa de acerto
+   total e as operações por segundo somadas. O LocMemCache preenche uma cópia
+   por processo, então acerta menos.
+3. Contador: cada processo faz --incr incrementos na mesma chave. O maior
+   valor final visto deve ser processos x incr. Com o LocMemCache cada
+   processo conta sozinho; com o FileBasedCache, get + set perdem incrementos.
+"""
+
+import multiprocessing
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from itertools import accumulate
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils.module_loading import import_string
+
+BACKENDS = {
+    'locmem': 'django.core.cache.backends.locmem.LocMemCache',
+    'file': 'django.core.cache.backends.filebased.FileBasedCache',
+    'sqlite': 'blogproject.sqlite_cache.SQLiteCache',
+}
+# Chaves gravadas por rodada no teste de um processo
+SINGLE_KEYS = 500
+
+
+def _create(name, location, max_entries):
+    params = {'TIMEOUT': 3600, 'OPTIONS': {'MAX_ENTRIES': max_entries}}
+    return import_string(BACKENDS[name])(location, params)
+
+
+def _worker(name, location, max_entries, keys, value, increments):
+    """Executado em cada processo filho (fork): cache-aside e depois o contador"""
+    cache = _create(name, location, max_entries)
+    hits = 0
+    started = time.perf_counter()
+    for key in keys:
+        if cache.get(key) is None:
+            cache.set(key, value)
+        else:
+            hits += 1
+    elapsed = time.perf_counter() - started
+
+    counter = 0
+    for _ in range(increments):
+        counter = cache.incr('bench:counter')
+    return hits, elapsed, counter
+
+
+class Command(BaseCommand):
+    help = 'Compara LocMemCache, FileBasedCache e SQLiteCache (latência, acerto entre processos, incr)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--processes', type=int, default=4, help='Processos simultâneos')
+        parser.add_argument('--ops', type=int, default=5000, help='Operações por processo')
+        parser.add_argument('--keys', type=int, default=2000, help='Chaves distintas')
+        parser.add_argument('--value-size', type=int, default=8192, help='Bytes por valor (~uma página)')
+        parser.add_argument('--incr', type=int, default=500, help='Incrementos por processo')
+        parser.add_argument('--zipf', type=float, default=1.0, help='Expoente da distribuição das chaves')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        workdir = Path(tempfile.mkdtemp(prefix='bench_cache_'))
+        try:
+            self._run(workdir, options)
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    def _location(self, workdir, name, run):
+        if name == 'locmem':
+            return f'bench-{run}'
+        if name == 'file':
+            return str(workdir / f'files-{run}')
+        return str(workdir / f'cache-{run}.sqlite3')
+
+    def _run(self, workdir, options):
+        value = b'x' * options['value_size']
+        max_entries = options['keys'] * 2
+
+        self.stdout.write("📊 Um processo (µs por operação, mediana de 5 rodadas)\n")
+        self.stdout.write(
+            f"{'Backend':<10}{'get hit':>10}{'get miss':>10}{'set':>10}{'incr':>10}{'get_many':>10}"
+        )
+        for name in BACKENDS:
+            # Cabe todas as chaves e o contador: um cull apagaria o contador (incr falha)
+            cache = _create(name, self._location(workdir, name, 'single'), SINGLE_KEYS * 2)
+            results = self._single(cache, value)
+            self.stdout.write(f"{name:<10}" + ''.join(f"{result:>10.1f}" for result in results))
+
+        processes = options['processes']
+        rng = random.Random(options['seed'])
+        weights = list(accumulate(1 / (rank ** options['zipf']) for rank in range(1, options['keys'] + 1)))
+        workloads = [
+            [f"bench:page:{key}" for key in rng.choices(range(options['keys']), cum_weights=weights, k=options['ops'])]
+            for _ in range(processes)
+        ]
+
+        self.stdout.write(
+            f"\n📊 {processes} processos x {options['ops']} operações (get + set na falta), "
+            f"{options['keys']} chaves Zipf({options['zipf']}), {options['value_size']} bytes\n"
+        )
+        self.stdout.write(
+            f"{'Backend':<10}{'Acertos':>10}{'ops/s':>12}{'Contador':>12}{'Esperado':>12}"
+        )
+        context = multiprocessing.get_context('fork')
+        for name in BACKENDS:
+            location = self._location(workdir, name, 'shared')
+            cache = _create(name, location, max_entries)
+            cache.set('bench:counter', 0)
+            with context.Pool(processes) as pool:
+                results = pool.starmap(_worker, [
+                    (name, location, max_entries, keys, value, options['incr'])
+                    for keys in workloads
+                ])
+            hits = sum(result[0] for result in results)
+            ops_per_second = sum(options['ops'] / result[1] for result in results)
+            counter = max(result[2] for result in results)
+            self.stdout.write(
+                f"{name:<10}{hits / (processes * options['ops']):>10.1%}{ops_per_second:>12,.0f}"
+                f"{counter:>12,}{processes * options['incr']:>12,}"
+            )
+
+    def _single(self, cache, value, count=SINGLE_KEYS, rounds=5):
+        keys = [f"bench:single:{index}" for index in range(count)]
+        timings = {operation: [] for operation in ('get_hit', 'get_miss', 'set', 'incr', 'get_many')}
+        cache.set('bench:single:counter', 0)
+        for _ in range(rounds):
+            started = time.perf_counter()
+            for key in keys:
+                cache.set(key, value)
+            timings['set'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for key in keys:
+                cache.get(key)
+            timings['get_hit'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for key in keys:
+                cache.get(f"{key}:missing")
+            timings['get_miss'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for _ in keys:
+                cache.incr('bench:single:counter')
+            timings['incr'].append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for index in range(0, count, 10):
+                cache.get_many(keys[index:index + 10])
+            timings['get_many'].append((time.perf_counter() - started) * 10)
+
+        return [
+            statistics.median(timings[operation]) / count * 1_000_000
+            for operation in ('get_hit', 'get_miss', 'set', 'incr', 'get_many')
+        ]
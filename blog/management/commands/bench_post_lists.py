@@ -0,0 +1,108 @@
+"""
+Django management command para medir o custo das páginas de lista com e sem o campo content
+Execute: python manage.py bench_post_lists [--pages 50]
+
+Para cada tipo de lista (home, /posts/, categoria) compara o que as views
+faziam antes, ou seja, lê todas as colunas e aplica truncatewords no content,
+com o que fazem agora: defer('content') e truncatewords no excerpt gravado.
+Mede por página:
+- bytes lidos do banco (soma dos valores das linhas retornadas pela consulta)
+- tempo da consulta com criação dos objetos
+- tempo de renderização dos cards, sem o cache de fragmentos
+
+Use um banco com conteúdo de tamanho realista (populate_db --posts 100000:
+mediana ~1,5KB, cauda até ~40KB).
+"""
+
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.db.models import Count
+from django.template import engines
+
+from blog.fragments import CARD_TEMPLATE, CARD_VARIANTS
+from blog.models import Post
+
+
+def _size(value):
+    if value is None:
+        return 0
+    if isinstance(value, str):
+        return len(value.encode())
+    if isinstance(value, (bytes, memoryview)):
+        return len(value)
+    return 8
+
+
+class Command(BaseCommand):
+    help = 'Compara bytes lidos e tempo de render das listas com content e com excerpt'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--pages', type=int, default=50, help='Páginas medidas por variante')
+        parser.add_argument('--depth', type=int, default=100,
+                            help='As páginas são sorteadas entre as N primeiras')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        published = Post.objects.filter(published=True).select_related('author', 'category')
+        category_id = (
+            Post.objects.filter(published=True).values('category')
+            .annotate(total=Count('id')).order_by('-total').values_list('category', flat=True).first()
+        )
+        lists = [
+            ('home', published, 5),
+            ('list', published.order_by('-created_at'), 10),
+            ('category', published.filter(category_id=category_id).order_by('-created_at'), 10),
+        ]
+
+        engine = engines['django']
+        source = engine.engine.get_template(CARD_TEMPLATE).source
+        templates = {
+            # Template anterior: trecho calculado a partir do content a cada render
+            'content': engine.from_string(source.replace('post.excerpt', 'post.content')),
+            'excerpt': engine.from_string(source),
+        }
+
+        self.stdout.write(f"📊 {options['pages']} páginas por variante\n")
+        self.stdout.write(
+            f"{'Lista':<10}{'Modo':<10}{'Bytes/página':>14}{'Consulta (ms)':>15}{'Render (ms)':>13}"
+        )
+        for name, queryset, per_page in lists:
+            rng = random.Random(options['seed'])
+            offsets = [rng.randrange(options['depth']) * per_page for _ in range(options['pages'])]
+            for mode in ('content', 'excerpt'):
+                qs = queryset if mode == 'content' else queryset.defer('content')
+                bytes_read, query_ms, render_ms = self._measure(
+                    qs, offsets, per_page, templates[mode], CARD_VARIANTS[name]
+                )
+                self.stdout.write(
+                    f"{name:<10}{mode:<10}{bytes_read:>14,.0f}{query_ms:>15.2f}{render_ms:>13.2f}"
+                )
+
+    def _measure(self, queryset, offsets, per_page, template, options):
+        sizes, query_times, render_times = [], [], []
+        for offset in offsets:
+            page = queryset[offset:offset + per_page]
+
+            sql, params = page.query.sql_with_params()
+            with connection.cursor() as cursor:
+                cursor.execute(sql, params)
+                sizes.append(sum(_size(value) for row in cursor.fetchall() for value in row))
+
+            started = time.perf_counter()
+            posts = list(page)
+            query_times.append(time.perf_counter() - started)
+
+            started = time.perf_counter()
+            for post in posts:
+                template.render({'post': post, **options})
+            render_times.append(time.perf_counter() - started)
+
+        return (
+            statistics.mean(sizes),
+            statistics.median(query_times) * 1000,
+            statistics.median(render_times) * 1000,
+        )
@@ -0,0 +1,54 @@
+"""
+Django management command para (re)calcular as listas de posts relacionados
+Execute: python manage.py build_related_posts [--ranking views] [--interval 60]
+
+Recalcula, para cada categoria, os primeiros posts publicados de cada ranking
+(blog/related.py). Rode depois de cargas em massa (populate_db, bulk_create)
+e periodicamente para o ranking por visualizações, que os sinais não
+acompanham a cada view.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from blog import related
+from blog.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Recalcula as listas de posts relacionados de todas as categorias'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--ranking',
+            choices=sorted(related.RANKINGS) + ['all'],
+            default='all',
+            help='Ranking a recalcular (padrão: todos)',
+        )
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Repete o recálculo a cada N segundos até Ctrl+C (0 = uma vez)',
+        )
+
+    def handle(self, *args, **options):
+        rankings = sorted(related.RANKINGS) if options['ranking'] == 'all' else [options['ranking']]
+        interval = options['interval']
+        try:
+            while True:
+                started = time.monotonic()
+                categories = list(Category.objects.values_list('pk', flat=True))
+                for category_id in categories:
+                    for ranking in rankings:
+                        related.refresh(category_id, ranking)
+                elapsed = time.monotonic() - started
+                self.stdout.write(self.style.SUCCESS(
+                    f"✅ {len(categories)} categoria(s) × {', '.join(rankings)} em {elapsed * 1000:.0f}ms"
+                ))
+                if not interval:
+                    break
+                time.sleep(max(interval - elapsed, 0))
+        except KeyboardInterrupt:
+            pass
@@ -1,21 +1,126 @@
 """
 Django management command para popular o banco de dados com dados de exemplo
-Execute: python manage.py populate_db
+Execute: python manage.py populate_db [--posts 1000000] [--users 200] [--seed 42]
+
+Os posts gerados são inseridos com bulk_create em lotes (uma transação por
+lote) a partir de um gerador, então o uso de memória não cresce com --posts.
+Tamanho do conteúdo, visualizações, autores e categorias seguem distribuições
+assimétricas, como em um blog real: poucos posts concentram muitas views.
 """
 
-from django.core.management.base import BaseCommand
+from contextlib import contextmanager
+from datetime import timedelta
+from itertools import accumulate, islice
+import random
+import time
+
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
 from django.utils.text import slugify
+from blog.excerpts import make_excerpt
 from blog.models import Category, Post
-import random
+
+AUTHOR_NAMES = ['joao', 'maria', 'carlos', 'ana', 'pedro']
+
+CATEGORIES_DATA = [
+    {'name': 'Tecnologia', 'description': 'Posts sobre tecnologia e programação'},
+    {'name': 'Django', 'description': 'Tutoriais e dicas sobre Django'},
+    {'name': 'Performance', 'description': 'Otimização e performance de aplicações'},
+    {'name': 'Testes', 'description': 'Testes de software e qualidade'},
+    {'name': 'DevOps', 'description': 'Deploy, infraestrutura e operações'},
+]
+
+# Os 5 primeiros posts são os de exemplo; os gerados começam em post-exemplo-6
+FIRST_GENERATED_POST = 6
+
+LOREM_CONTENT = """Lorem ipsum dolor sit amet, consectetur adipiscing elit. 
+Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. 
+Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. 
+
+Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur. 
+Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit anim id est laborum.
+
+Sed ut perspiciatis unde omnis iste natus error sit voluptatem accusantium doloremque laudantium, 
+totam rem aperiam, eaque ipsa quae ab illo inventore veritatis et quasi architecto beatae vitae dicta sunt explicabo."""
+
+def zipf_cum_weights(n, s=1.0):
+    """Pesos acumulados de uma distribuição de Zipf (para random.choices)"""
+    return list(accumulate(1 / (rank ** s) for rank in range(1, n + 1)))
+
+
+@contextmanager
+def explicit_timestamps():
+    """Permite gravar created_at/updated_at gerados (desliga auto_now*)"""
+    created = Post._meta.get_field('created_at')
+    updated = Post._meta.get_field('updated_at')
+    saved = created.auto_now_add, updated.auto_now
+    created.auto_now_add = updated.auto_now = False
+    try:
+        yield
+    finally:
+        created.auto_now_add, updated.auto_now = saved
 
 
 class Command(BaseCommand):
     help = 'Popula o banco de dados com dados de exemplo para testes'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=50,
+                            help='Total de posts (inclui os 5 posts de exemplo)')
+        parser.add_argument('--users', type=int, default=len(AUTHOR_NAMES),
+                            help='Número de autores, além do admin')
+        parser.add_argument('--categories', type=int, default=len(CATEGORIES_DATA),
+                            help='Número de categorias (mínimo 1)')
+        parser.add_argument('--seed', type=int, default=None,
+                            help='Semente do gerador aleatório (dados reproduzíveis)')
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Posts por lote de bulk_create/transação')
+
     def handle(self, *args, **options):
+        # Os posts são sorteados entre as categorias: sem nenhuma, random.choices falha
+        if options['categories'] < 1:
+            raise CommandError('--categories deve ser pelo menos 1')
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size deve ser pelo menos 1')
         self.stdout.write("🚀 Iniciando população do banco de dados...")
+        self.rng = random.Random(options['seed'])
+        
+        admin = self._create_admin()
+        authors = self._create_authors(options['users'])
+        authors.append(admin)
+        categories = self._create_categories(options['categories'])
+        
+        created_posts = self._create_sample_posts(authors, categories)
+        created_posts += self._generate_posts(
+            authors, categories, options['posts'], options['batch_size']
+        )
+        
+        # bulk_create não dispara sinais: recalcula os contadores e os relacionados por categoria
+        call_command('reconcile_category_counts', stdout=self.stdout)
+        call_command('build_related_posts', stdout=self.stdout)
+        
+        self.stdout.write(self.style.SUCCESS(f"✅ Total de {created_posts} posts criados"))
+        self.stdout.write(f"📊 Total de posts no banco: {Post.objects.count()}")
+        self.stdout.write(f"📂 Total de categorias: {Category.objects.count()}")
+        self.stdout.write(f"👥 Total de usuários: {User.objects.count()}")
         
+        self.stdout.write(self.style.SUCCESS("\n🎉 Banco de dados populado com sucesso!"))
+        self.stdout.write("\n📋 Credenciais de acesso:")
+        self.stdout.write("   Admin: admin / admin123")
+        self.stdout.write("   Usuários: joao, maria, carlos, ana, pedro / password123")
+        
+        self.stdout.write("\n🌐 URLs para testar:")
+        self.stdout.write("   Homepage: /")
+        self.stdout.write("   Posts: /posts/")
+        self.stdout.write("   Posts Otimizados: /posts/optimized/")
+        self.stdout.write("   API: /api/posts/")
+        self.stdout.write("   Admin: /admin/")
+
+    def _create_admin(self):
         # Criar superusuário se não existir
         if not User.objects.filter(username='admin').exists():
             admin = User.objects.create_superuser(
@@ -27,45 +132,40 @@ class Command(BaseCommand):
         else:
             admin = User.objects.get(username='admin')
             self.stdout.write("✅ Superusuário 'admin' já existe")
+        return admin
+
+    def _create_authors(self, count):
+        """Cria os autores em lote; todos compartilham o mesmo hash de senha"""
+        names = AUTHOR_NAMES[:count] + [f'autor{i}' for i in range(len(AUTHOR_NAMES) + 1, count + 1)]
+        existing = set(User.objects.filter(username__in=names).values_list('username', flat=True))
+        password = make_password('password123')
         
-        # Criar usuários adicionais
-        authors = []
-        author_names = ['joao', 'maria', 'carlos', 'ana', 'pedro']
-        
-        for name in author_names:
-            if not User.objects.filter(username=name).exists():
-                user = User.objects.create_user(
-                    username=name,
-                    email=f'{name}@blog.com',
-                    password='password123',
-                    first_name=name.title()
-                )
-                authors.append(user)
-                self.stdout.write(self.style.SUCCESS(f"✅ Usuário '{name}' criado"))
-            else:
-                authors.append(User.objects.get(username=name))
-        
-        authors.append(admin)
+        new_users = [
+            User(username=name, email=f'{name}@blog.com', password=password, first_name=name.title())
+            for name in names if name not in existing
+        ]
+        User.objects.bulk_create(new_users, batch_size=1000)
+        if new_users:
+            self.stdout.write(self.style.SUCCESS(f"✅ {len(new_users)} usuário(s) criado(s)"))
         
-        # Criar categorias
-        categories_data = [
-            {'name': 'Tecnologia', 'description': 'Posts sobre tecnologia e programação'},
-            {'name': 'Django', 'description': 'Tutoriais e dicas sobre Django'},
-            {'name': 'Performance', 'description': 'Otimização e performance de aplicações'},
-            {'name': 'Testes', 'description': 'Testes de software e qualidade'},
-            {'name': 'DevOps', 'description': 'Deploy, infraestrutura e operações'},
+        return list(User.objects.filter(username__in=names).order_by('id'))
+
+    def _create_categories(self, count):
+        categories_data = CATEGORIES_DATA[:count] + [
+            {'name': f'Categoria {i}', 'description': f'Posts gerados da categoria {i}'}
+            for i in range(len(CATEGORIES_DATA) + 1, count + 1)
         ]
+        names = [data['name'] for data in categories_data]
+        existing = set(Category.objects.filter(name__in=names).values_list('name', flat=True))
         
-        categories = []
-        for cat_data in categories_data:
-            category, created = Category.objects.get_or_create(
-                name=cat_data['name'],
-                defaults={'description': cat_data['description']}
-            )
-            categories.append(category)
-            if created:
-                self.stdout.write(self.style.SUCCESS(f"✅ Categoria '{category.name}' criada"))
+        new_categories = [Category(**data) for data in categories_data if data['name'] not in existing]
+        Category.objects.bulk_create(new_categories, batch_size=1000)
+        for category in new_categories:
+            self.stdout.write(self.style.SUCCESS(f"✅ Categoria '{category.name}' criada"))
         
+        return list(Category.objects.filter(name__in=names).order_by('id'))
+
+    def _create_sample_posts(self, authors, categories):
         # Criar posts de exemplo
         posts_data = [
             {
@@ -233,10 +333,10 @@ Lembre-se: "Premature optimization is the root of all evil" - otimize apenas ond
         ]
         
         # Criar posts
-        created_posts = []
+        created_posts = 0
         for i, post_data in enumerate(posts_data):
-            author = random.choice(authors)
-            category = random.choice(categories)
+            author = self.rng.choice(authors)
+            category = self.rng.choice(categories)
             
             slug = slugify(post_data['title'])
             
@@ -248,57 +348,83 @@ Lembre-se: "Premature optimization is the root of all evil" - otimize apenas ond
                     'author': author,
                     'category': category,
                     'published': True,
-                    'views_count': random.randint(10, 1000)
+                    'views_count': self.rng.randint(10, 1000)
                 }
             )
             
             if created:
-                created_posts.append(post)
+                created_posts += 1
                 self.stdout.write(self.style.SUCCESS(f"✅ Post '{post.title}' criado"))
+        return created_posts
+
+    def _iter_posts(self, author_ids, category_ids, first, last):
+        """Gera (sem materializar) os posts post-exemplo-{first..last}"""
+        rng = self.rng
+        # Poucos autores escrevem a maioria dos posts; categorias idem
+        author_weights = zipf_cum_weights(len(author_ids), s=1.1)
+        category_weights = zipf_cum_weights(len(category_ids), s=0.8)
+        # Texto-base longo: o conteúdo de cada post é uma fatia dele
+        corpus = '\n\n'.join([LOREM_CONTENT] * 40)
+        span = timedelta(days=730)
+        now = timezone.now()
+        total = max(last - first, 1)
         
-        # Criar posts adicionais para paginação
-        lorem_content = """Lorem ipsum dolor sit amet, consectetur adipiscing elit. 
-Sed do eiusmod tempor incididunt ut labore et dolore magna aliqua. 
-Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat. 
-
-Duis aute irure dolor in reprehenderit in voluptate velit esse cillum dolore eu fugiat nulla pariatur. 
-Excepteur sint occaecat cupidatat non proident, sunt in culpa qui officia deserunt mollit anim id est laborum.
+        for i in range(first, last + 1):
+            # Tamanho lognormal: mediana ~1.5KB, cauda longa até ~40KB
+            size = min(int(rng.lognormvariate(7.3, 0.9)), len(corpus) - 1)
+            size = max(size, 200)
+            start = rng.randrange(0, len(corpus) - size)
+            # Views com cauda de Pareto: a maioria tem poucas, alguns viralizam
+            views = min(int(rng.paretovariate(1.16) * 10) - 10, 5_000_000)
+            # Posts mais novos têm números maiores (post-exemplo-50 é recente)
+            created_at = now - span * (1 - (i - first) / total) - timedelta(minutes=rng.randrange(60))
+            
+            content = f"{corpus[start:start + size]}\n\nEste é o post número {i} criado para demonstração de paginação e testes de carga."
+            yield Post(
+                title=f"Post de Exemplo #{i}",
+                slug=f"post-exemplo-{i}",
+                content=content,
+                # bulk_create não chama Post.save(): o trecho é calculado aqui
+                excerpt=make_excerpt(content),
+                author_id=rng.choices(author_ids, cum_weights=author_weights)[0],
+                category_id=rng.choices(category_ids, cum_weights=category_weights)[0],
+                published=rng.random() < 0.95,
+                views_count=views,
+                created_at=created_at,
+                updated_at=created_at,
+            )
 
-Sed ut perspiciatis unde omnis iste natus error sit voluptatem accusantium doloremque laudantium, 
-totam rem aperiam, eaque ipsa quae ab illo inventore veritatis et quasi architecto beatae vitae dicta sunt explicabo."""
+    def _generate_posts(self, authors, categories, total_posts, batch_size):
+        """Insere os posts gerados em lotes; posts já existentes são ignorados"""
+        first, last = FIRST_GENERATED_POST, total_posts
+        if last < first:
+            return 0
         
-        for i in range(6, 51):  # Criar posts 6-50
-            title = f"Post de Exemplo #{i}"
-            slug = f"post-exemplo-{i}"
-            
-            if not Post.objects.filter(slug=slug).exists():
-                author = random.choice(authors)
-                category = random.choice(categories)
-                
-                post = Post.objects.create(
-                    title=title,
-                    slug=slug,
-                    content=f"{lorem_content}\n\nEste é o post número {i} criado para demonstração de paginação e testes de carga.",
-                    author=author,
-                    category=category,
-                    published=True,
-                    views_count=random.randint(1, 500)
-                )
-                created_posts.append(post)
+        posts = self._iter_posts(
+            [author.id for author in authors],
+            [category.id for category in categories],
+            first, last,
+        )
+        before = Post.objects.count()
+        started = time.monotonic()
+        done = 0
         
-        self.stdout.write(self.style.SUCCESS(f"✅ Total de {len(created_posts)} posts criados"))
-        self.stdout.write(f"📊 Total de posts no banco: {Post.objects.count()}")
-        self.stdout.write(f"📂 Total de categorias: {Category.objects.count()}")
-        self.stdout.write(f"👥 Total de usuários: {User.objects.count()}")
+        # O SQLite não aceita trocar o synchronous dentro de uma transação
+        if connection.vendor == 'sqlite' and not connection.in_atomic_block:
+            # Carga em massa: não espera o fsync a cada commit
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA synchronous = OFF')
         
-        self.stdout.write(self.style.SUCCESS("\n🎉 Banco de dados populado com sucesso!"))
-        self.stdout.write("\n📋 Credenciais de acesso:")
-        self.stdout.write("   Admin: admin / admin123")
-        self.stdout.write("   Usuários: joao, maria, carlos, ana, pedro / password123")
+        with explicit_timestamps():
+            while True:
+                batch = list(islice(posts, batch_size))
+                if not batch:
+                    break
+                with transaction.atomic():
+                    Post.objects.bulk_create(batch, batch_size=batch_size, ignore_conflicts=True)
+                done += len(batch)
+                if done % (batch_size * 20) < batch_size or done == last - first + 1:
+                    rate = done / max(time.monotonic() - started, 1e-6)
+                    self.stdout.write(f"   {done}/{last - first + 1} posts gerados ({rate:,.0f}/s)")
         
-        self.stdout.write("\n🌐 URLs para testar:")
-        self.stdout.write("   Homepage: /")
-        self.stdout.write("   Posts: /posts/")
-        self.stdout.write("   Posts Otimizados: /posts/optimized/")
-        self.stdout.write("   API: /api/posts/")
-        self.stdout.write("   Admin: /admin/")
+        return Post.objects.count() - before
@@ -0,0 +1,42 @@
+"""
+Django management command para recalcular Category.published_post_count
+Execute: python manage.py reconcile_category_counts [--dry-run]
+"""
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, Q
+from blog.models import Category
+
+
+class Command(BaseCommand):
+    help = 'Corrige divergências nos contadores de posts publicados por categoria'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Apenas mostra as divergências, sem gravar',
+        )
+
+    def handle(self, *args, **options):
+        categories = Category.objects.annotate(
+            actual=Count('posts', filter=Q(posts__published=True))
+        ).values_list('pk', 'name', 'published_post_count', 'actual')
+
+        fixed = 0
+        with transaction.atomic():
+            for pk, name, stored, actual in categories:
+                if stored == actual:
+                    continue
+                self.stdout.write(f"⚠️  {name}: {stored} → {actual}")
+                if not options['dry_run']:
+                    Category.objects.filter(pk=pk).update(published_post_count=actual)
+                fixed += 1
+
+        if not fixed:
+            self.stdout.write(self.style.SUCCESS("✅ Nenhuma divergência encontrada"))
+        elif options['dry_run']:
+            self.stdout.write(f"📋 {fixed} categoria(s) com divergência (nada foi gravado)")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"✅ {fixed} categoria(s) corrigida(s)"))
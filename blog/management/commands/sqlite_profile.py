@@ -0,0 +1,48 @@
+"""
+Django management command para gravar o journal_mode do perfil do SQLite
+Execute: DB_PROFILE=performance python manage.py sqlite_profile
+         python manage.py sqlite_profile                 # volta ao perfil default
+         python manage.py sqlite_profile --journal-mode WAL
+
+O journal_mode fica gravado no arquivo do banco, então é trocado aqui, uma
+vez, e não a cada conexão (com CONN_MAX_AGE=0, a cada request). Os demais
+PRAGMAs do perfil valem por conexão (blogproject/sqlite_profile.py). Pare o
+servidor antes: sair do WAL exige o banco sem outras conexões.
+"""
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from blogproject.sqlite_profile import set_journal_mode, skip_journal_check
+
+
+class Command(BaseCommand):
+    help = 'Grava no banco o journal_mode do perfil do SQLite (settings.DB_PROFILE)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--journal-mode',
+            help='Modo a gravar (padrão: JOURNAL_MODE do perfil atual)',
+        )
+
+    def handle(self, *args, **options):
+        skip_journal_check()
+        connection = connections['default']
+        if connection.vendor != 'sqlite':
+            raise CommandError('O banco default não é SQLite')
+        mode = options['journal_mode'] or settings.SQLITE_PROFILE['JOURNAL_MODE']
+
+        try:
+            result = set_journal_mode(connection, mode)
+        except OperationalError as exc:
+            raise CommandError(f'Não foi possível trocar o journal_mode: {exc}')
+        if result.upper() != mode.upper():
+            raise CommandError(
+                f'O banco continua em journal_mode={result}: há outro processo '
+                f'com o banco aberto? Pare o servidor e rode de novo'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f"✅ journal_mode={result} gravado em {connection.settings_dict['NAME']} "
+            f"(perfil {settings.DB_PROFILE})"
+        ))
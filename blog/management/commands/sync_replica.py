@@ -0,0 +1,72 @@
+"""
+Django management command para atualizar a réplica de leitura (SQLite)
+Execute: python manage.py sync_replica [--interval 2]
+
+Copia o banco primário com a API de backup do SQLite (cópia consistente mesmo
+com o servidor gravando) para um arquivo temporário e troca a réplica com
+os.replace: quem está lendo não vê uma réplica pela metade nem fica
+bloqueado durante a cópia. Conexões novas (uma por request, sem
+CONN_MAX_AGE) já abrem o arquivo novo.
+"""
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+class Command(BaseCommand):
+    help = 'Copia o banco primário para a réplica de leitura (settings.REPLICA)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=float,
+            default=0,
+            help='Repete a cópia a cada N segundos até Ctrl+C (0 = uma vez)',
+        )
+        parser.add_argument(
+            '--pages',
+            type=int,
+            default=-1,
+            help='Páginas copiadas por passo do backup (-1 = tudo de uma vez)',
+        )
+
+    def handle(self, *args, **options):
+        primary = settings.DATABASES['default']
+        if primary['ENGINE'] != 'django.db.backends.sqlite3':
+            raise CommandError('sync_replica só copia bancos SQLite; use a replicação do seu banco')
+
+        source = Path(primary['NAME'])
+        target = Path(settings.REPLICA['PATH'])
+        if source.resolve() == target.resolve():
+            raise CommandError('A réplica não pode ser o próprio banco primário')
+
+        interval = options['interval']
+        try:
+            while True:
+                started = time.monotonic()
+                self._copy(source, target, options['pages'])
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"🔁 Réplica atualizada em {elapsed * 1000:.0f}ms → {target}")
+                if not interval:
+                    break
+                time.sleep(max(interval - elapsed, 0))
+        except KeyboardInterrupt:
+            pass
+
+    def _copy(self, source, target, pages):
+        tmp = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+        src = sqlite3.connect(source)
+        dst = sqlite3.connect(tmp)
+        try:
+            src.backup(dst, pages=pages)
+            # A réplica é somente leitura: sem journal WAL herdado do primário
+            dst.execute('PRAGMA journal_mode=DELETE')
+        finally:
+            dst.close()
+            src.close()
+        os.replace(tmp, target)
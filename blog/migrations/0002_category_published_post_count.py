@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 16:28
+
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def fill_published_post_count(apps, schema_editor):
+    Category = apps.get_model('blog', 'Category')
+    counts = Category.objects.annotate(
+        total=Count('posts', filter=Q(posts__published=True))
+    ).values_list('pk', 'total')
+    for pk, total in counts:
+        Category.objects.filter(pk=pk).update(published_post_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='category',
+            name='published_post_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(fill_published_post_count, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,70 @@
+"""
+Índice de busca textual FTS5 sobre título e conteúdo dos posts
+
+Tabela FTS5 de conteúdo externo (lê o texto de blog_post, sem duplicá-lo),
+mantida por triggers: cobre também bulk_create, QuerySet.update e SQL direto,
+que não disparam sinais do Django. O trigger de UPDATE só reindexa quando
+título ou conteúdo mudam, então os UPDATEs de views_count não tocam no índice.
+
+Só é criada no SQLite; em outros bancos a busca usa o fallback de blog/search.py.
+"""
+
+from django.db import migrations
+
+CREATE = [
+    """
+    CREATE VIRTUAL TABLE IF NOT EXISTS blog_post_fts USING fts5(
+        title, content,
+        content='blog_post', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_insert AFTER INSERT ON blog_post BEGIN
+        INSERT INTO blog_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_delete AFTER DELETE ON blog_post BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS blog_post_fts_update AFTER UPDATE OF title, content ON blog_post
+    WHEN old.title IS NOT new.title OR old.content IS NOT new.content BEGIN
+        INSERT INTO blog_post_fts(blog_post_fts, rowid, title, content)
+        VALUES ('delete', old.id, old.title, old.content);
+        INSERT INTO blog_post_fts(rowid, title, content) VALUES (new.id, new.title, new.content);
+    END
+    """,
+    # Indexa os posts que já existem
+    "INSERT INTO blog_post_fts(blog_post_fts) VALUES ('rebuild')",
+]
+
+DROP = [
+    "DROP TRIGGER IF EXISTS blog_post_fts_update",
+    "DROP TRIGGER IF EXISTS blog_post_fts_delete",
+    "DROP TRIGGER IF EXISTS blog_post_fts_insert",
+    "DROP TABLE IF EXISTS blog_post_fts",
+]
+
+
+def _run(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for sql in statements:
+            schema_editor.execute(sql)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0003_job'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run(CREATE), _run(DROP)),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2 on 2026-10-18 17:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0004_post_fts'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='post',
+            index=models.Index(fields=['category', '-created_at'], name='blog_post_categor_405168_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2 on 2026-10-18 17:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0005_post_category_created_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RelatedPosts',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ranking', models.CharField(choices=[('recent', 'Mais recentes'), ('views', 'Mais vistos')], max_length=10)),
+                ('posts', models.JSONField(default=list)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('category', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='related_lists', to='blog.category')),
+            ],
+            options={
+                'verbose_name_plural': 'Related posts',
+                'constraints': [models.UniqueConstraint(fields=('category', 'ranking'), name='blog_related_unique_ranking')],
+            },
+        ),
+    ]
@@ -0,0 +1,57 @@
+# Generated by Django 5.2 on 2026-10-18 17:16
+
+from django.db import migrations, models
+
+from blog.excerpts import backfill_excerpts
+
+
+def excerpt_field():
+    field = models.TextField(blank=True, default='', editable=False)
+    field.set_attributes_from_name('excerpt')
+    return field
+
+
+def add_excerpt_column(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    if schema_editor.connection.vendor == 'sqlite':
+        # O AddField do Django recriaria blog_post no SQLite (cópia de todos os
+        # posts, e os triggers do FTS iriam junto); ADD COLUMN com DEFAULT é O(1)
+        schema_editor.execute(
+            f"ALTER TABLE {Post._meta.db_table} ADD COLUMN excerpt text NOT NULL DEFAULT ''"
+        )
+    else:
+        schema_editor.add_field(Post, excerpt_field())
+
+
+def remove_excerpt_column(apps, schema_editor):
+    schema_editor.remove_field(apps.get_model('blog', 'Post'), excerpt_field())
+
+
+def fill_excerpts(apps, schema_editor):
+    # Em lotes, uma transação por lote (a migração não é atômica)
+    backfill_excerpts(apps.get_model('blog', 'Post'), batch_size=2000)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('blog', '0006_relatedposts'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            state_operations=[
+                migrations.AddField(
+                    model_name='post',
+                    name='excerpt',
+                    field=models.TextField(blank=True, default='', editable=False),
+                ),
+            ],
+            database_operations=[
+                migrations.RunPython(add_excerpt_column, remove_excerpt_column),
+            ],
+        ),
+        migrations.RunPython(fill_excerpts, migrations.RunPython.noop),
+    ]
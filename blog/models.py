@@ -3,11 +3,16 @@ from django.urls import reverse
 from django.contrib.auth.models import User
 from django.utils import timezone
 
+from .excerpts import make_excerpt
+
 
 class Category(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Contador desnormalizado, mantido por blog/signals.py
+    # (corrija divergências com: python manage.py reconcile_category_counts)
+    published_post_count = models.PositiveIntegerField(default=0, editable=False)
     
     class Meta:
         verbose_name_plural = "Categories"
@@ -21,6 +26,8 @@ class Post(models.Model):
     title = models.CharField(max_length=200)
     slug = models.SlugField(max_length=200, unique=True)
     content = models.TextField()
+    # Início do conteúdo para os cards das listas (blog/excerpts.py), gravado no save()
+    excerpt = models.TextField(blank=True, default='', editable=False)
     author = models.ForeignKey(User, on_delete=models.CASCADE, related_name='blog_posts')
     category = models.ForeignKey(Category, on_delete=models.SET_NULL, null=True, blank=True, related_name='posts')
     created_at = models.DateTimeField(auto_now_add=True)
@@ -28,17 +35,59 @@ class Post(models.Model):
     published = models.BooleanField(default=True)
     views_count = models.PositiveIntegerField(default=0)
     
+    # Mudanças nestes campos invalidam as páginas de categoria; views_count
+    # fica de fora (muda a cada acesso)
+    LISTING_FIELDS = ('category_id', 'published', 'title', 'slug', 'excerpt', 'author_id')
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [
             models.Index(fields=['-created_at']),
             models.Index(fields=['published']),
             models.Index(fields=['slug']),
+            # Posts de uma categoria já na ordem da listagem (sem ordenar em memória)
+            models.Index(fields=['category', '-created_at']),
+            # Maior updated_at da listagem, para o GET condicional (blog/conditional.py)
+            models.Index(fields=['-updated_at']),
+            models.Index(fields=['category', '-updated_at']),
         ]
     
     def __str__(self):
         return self.title
     
+    def save(self, *args, **kwargs):
+        # Com content adiado (defer) o trecho gravado continua valendo
+        if 'content' not in self.get_deferred_fields():
+            self.excerpt = make_excerpt(self.content)
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'content' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'excerpt'}
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Guarda o estado carregado para os contadores por categoria
+        if 'category_id' in field_names and 'published' in field_names:
+            instance._counter_state = instance.counter_state()
+        if {'title', 'slug', 'author_id'} <= set(field_names):
+            instance._card_state = instance.card_state()
+        if set(cls.LISTING_FIELDS) <= set(field_names):
+            instance._listing_state = instance.listing_state()
+        return instance
+    
+    def counter_state(self):
+        """Categoria em que o post conta como publicado (ou None)"""
+        return self.category_id if self.published else None
+    
+    def card_state(self):
+        """Campos copiados para as listas de posts relacionados (blog/related.py)"""
+        return (self.title, self.slug, self.author_id)
+    
+    def listing_state(self):
+        """Campos exibidos nas páginas de categoria em cache (blog/page_cache.py)"""
+        return tuple(getattr(self, name) for name in self.LISTING_FIELDS)
+    
     def get_absolute_url(self):
         return reverse('blog:post_detail', kwargs={'slug': self.slug})
     
@@ -46,3 +95,83 @@ class Post(models.Model):
         """Método para incrementar visualizações - demonstra query ineficiente"""
         self.views_count += 1
         self.save()
+
+
+class RelatedPosts(models.Model):
+    """Os primeiros posts publicados de uma categoria em um ranking (blog/related.py)"""
+    RECENT = 'recent'
+    VIEWS = 'views'
+    RANKING_CHOICES = [
+        (RECENT, 'Mais recentes'),
+        (VIEWS, 'Mais vistos'),
+    ]
+    
+    category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='related_lists')
+    ranking = models.CharField(max_length=10, choices=RANKING_CHOICES)
+    # Cards prontos para exibir: [{"id", "title", "slug", "author", "views_count"}, ...]
+    posts = models.JSONField(default=list)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        verbose_name_plural = "Related posts"
+        constraints = [
+            models.UniqueConstraint(fields=['category', 'ranking'], name='blog_related_unique_ranking'),
+        ]
+    
+    def __str__(self):
+        return f"{self.category_id}:{self.ranking} ({len(self.posts)} posts)"
+
+
+class Job(models.Model):
+    """Tarefa executada fora do request pelo pool de blog/jobs.py"""
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Na fila'),
+        (RUNNING, 'Executando'),
+        (DONE, 'Concluída'),
+        (FAILED, 'Falhou'),
+    ]
+    IN_FLIGHT = (QUEUED, RUNNING)
+    
+    kind = models.CharField(max_length=50)
+    # Hash de (kind, params): jobs idênticos em andamento são deduplicados
+    key = models.CharField(max_length=64)
+    params = models.JSONField(default=dict, blank=True)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=QUEUED)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        constraints = [
+            # No máximo um job em andamento por chave (a deduplicação é atômica)
+            models.UniqueConstraint(
+                fields=['key'],
+                condition=models.Q(status__in=['queued', 'running']),
+                name='blog_job_unique_in_flight',
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['finished_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.kind} #{self.pk} ({self.status})"
+    
+    def as_dict(self):
+        return {
+            'id': self.pk,
+            'kind': self.kind,
+            'status': self.status,
+            'result': self.result,
+            'error': self.error or None,
+            'created_at': self.created_at.isoformat(),
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+        }
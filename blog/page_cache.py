@@ -0,0 +1,141 @@
+"""
+Cache de páginas com invalidação por eventos e proteção contra stampede
+
+Diferente do @cache_page, a chave de cada página inclui a versão dos objetos
+que ela exibe (ex.: "category:3"). Os sinais do blog incrementam essas versões
+quando um Post ou Category muda, então a página seguinte já sai atualizada.
+
+Quando uma entrada expira, apenas um request (o que obtém o lock via
+cache.add) regenera a página; os demais continuam recebendo a versão antiga
+(stale-while-revalidate). Antes de expirar, a renovação pode ser antecipada de
+forma probabilística (XFetch), espalhando as regenerações no tempo.
+"""
+
+import hashlib
+import math
+import random
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+VERSION_PREFIX = 'page_version:'
+
+
+def bump_versions(*names):
+    """Invalida as páginas que dependem dos nomes informados"""
+    for name in names:
+        key = VERSION_PREFIX + name
+        try:
+            cache.incr(key)
+        except ValueError:
+            # Ainda sem versão: qualquer valor diferente do padrão (1) serve
+            cache.set(key, 2, None)
+
+
+def current_versions(names):
+    """Versões atuais dos nomes, como texto (ex.: 'category:3=2')"""
+    keys = [VERSION_PREFIX + name for name in names]
+    found = cache.get_many(keys)
+    return ':'.join(f"{name}={found.get(key, 1)}" for name, key in zip(names, keys))
+
+
+def _store(key, response, timeout, stale_timeout, delta):
+    now = time.time()
+    entry = {
+        'content': response.content,
+        'status': response.status_code,
+        'content_type': response['Content-Type'],
+        'fresh_until': now + timeout,
+        'delta': delta,
+    }
+    cache.set(key, entry, timeout + stale_timeout)
+
+
+def _to_response(entry, state):
+    response = HttpResponse(entry['content'], status=entry['status'], content_type=entry['content_type'])
+    response['X-Page-Cache'] = state
+    return response
+
+
+def versioned_page_cache(versions, timeout=None, stale_timeout=None, lock_timeout=None, beta=None):
+    """Decorator de cache de página
+
+    `versions(request, *args, **kwargs)` retorna os nomes de versão dos quais
+    a página depende; os demais parâmetros usam CATEGORY_PAGE_CACHE por padrão.
+    """
+    config = getattr(settings, 'CATEGORY_PAGE_CACHE', {})
+    timeout = config.get('TIMEOUT', 60 * 5) if timeout is None else timeout
+    stale_timeout = config.get('STALE_TIMEOUT', 60) if stale_timeout is None else stale_timeout
+    lock_timeout = config.get('LOCK_TIMEOUT', 10) if lock_timeout is None else lock_timeout
+    beta = config.get('EARLY_REFRESH_BETA', 1.0) if beta is None else beta
+
+    def decorator(view_func):
+        @wraps(view_func)
+        def wrapper(request, *args, **kwargs):
+            if request.method not in ('GET', 'HEAD'):
+                return view_func(request, *args, **kwargs)
+
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f"page:{path}:{current_versions(versions(request, *args, **kwargs))}"
+            lock_key = f"{key}:lock"
+
+            def regenerate():
+                started = time.time()
+                response = view_func(request, *args, **kwargs)
+                if response.status_code == 200 and not getattr(response, 'streaming', False):
+                    if hasattr(response, 'render'):
+                        response.render()
+                    _store(key, response, timeout, stale_timeout, time.time() - started)
+                response['X-Page-Cache'] = 'miss'
+                return response
+
+            def regenerate_locked():
+                try:
+                    return regenerate()
+                finally:
+                    cache.delete(lock_key)
+
+            entry = cache.get(key)
+            if entry is not None:
+                now = time.time()
+                # XFetch: renova antes do vencimento com probabilidade crescente
+                early = entry['delta'] * beta * -math.log(1.0 - random.random())
+                if now + early < entry['fresh_until']:
+                    return _to_response(entry, 'hit')
+                if not cache.add(lock_key, 1, lock_timeout):
+                    # Outro request já está regenerando: serve a versão atual
+                    state = 'stale' if now >= entry['fresh_until'] else 'hit'
+                    return _to_response(entry, state)
+                return regenerate_locked()
+
+            # Sem nenhuma versão em cache: só um request regenera, os outros
+            # aguardam o resultado (até lock_timeout) em vez de repetir o trabalho
+            if cache.add(lock_key, 1, lock_timeout):
+                return regenerate_locked()
+
+            deadline = time.time() + lock_timeout
+            while time.time() < deadline:
+                time.sleep(0.05)
+                found = cache.get_many([key, lock_key])
+                if key in found:
+                    return _to_response(found[key], 'hit')
+                # Lock liberado sem entrada (404, erro ou resposta não guardada):
+                # um dos que aguardam assume a regeneração, os demais continuam
+                if lock_key not in found and cache.add(lock_key, 1, lock_timeout):
+                    return regenerate_locked()
+            return regenerate()
+
+        return wrapper
+    return decorator
+
+
+def category_page_versions(request, category_id, *args, **kwargs):
+    # 'authors': os cards exibem o nome do autor (blog/signals.py)
+    return [f'category:{category_id}', 'authors']
+
+
+# Cache das páginas de categoria, invalidado pelos sinais de Post/Category
+category_page_cache = versioned_page_cache(category_page_versions)
@@ -0,0 +1,165 @@
+"""
+Paginação por cursor (keyset) ordenada por (created_at, id)
+
+O Paginator do Django executa COUNT(*) + OFFSET a cada request, então as
+páginas profundas ficam mais lentas à medida que a tabela cresce. Aqui cada
+página é buscada com WHERE (created_at, id) < (cursor) usando o índice de
+-created_at: a página 5000 custa o mesmo que a página 1.
+"""
+
+import base64
+import binascii
+import json
+
+from django.conf import settings
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+NEXT = 'n'
+PREVIOUS = 'p'
+
+
+def encode_cursor(created_at, pk, direction):
+    """Gera um token opaco a partir do (created_at, id) de um post"""
+    raw = json.dumps([created_at.isoformat(), pk, direction])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    """Retorna (created_at, id, direção) ou None se o token for inválido"""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, pk, direction = json.loads(base64.urlsafe_b64decode(padded))
+        created_at = parse_datetime(created_at)
+        if created_at is None or direction not in (NEXT, PREVIOUS):
+            return None
+        return created_at, int(pk), direction
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+
+class KeysetPage:
+    """Página de resultados com tokens para a próxima/anterior"""
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor=None, previous_cursor=None):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+def post_key(post):
+    return post.created_at, post.pk
+
+
+class KeysetPaginator:
+    """Paginador por cursor sobre um queryset de Post (sem COUNT e sem OFFSET)
+
+    `key` extrai (created_at, id) de cada item; troque-a ao paginar
+    values()/values_list() em vez de instâncias do modelo.
+    """
+
+    def __init__(self, queryset, per_page, key=post_key):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.key = key
+
+    def _cursor(self, item, direction):
+        return encode_cursor(*self.key(item), direction)
+
+    def _query(self, cursor):
+        """Queryset da página (já com LIMIT per_page + 1) e a direção do cursor"""
+        decoded = decode_cursor(cursor) if cursor else None
+
+        if decoded is None:
+            return self.queryset.order_by('-created_at', '-id')[:self.per_page + 1], None
+
+        created_at, pk, direction = decoded
+        if direction == NEXT:
+            return self.queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)
+            ).order_by('-created_at', '-id')[:self.per_page + 1], NEXT
+
+        # Página anterior: percorre o índice no sentido inverso e reordena
+        return self.queryset.filter(
+            Q(created_at__gt=created_at) | Q(created_at=created_at, id__gt=pk)
+        ).order_by('created_at', 'id')[:self.per_page + 1], PREVIOUS
+
+    def get_page(self, cursor=None):
+        """Retorna a página indicada pelo token; token inválido volta ao início"""
+        query, direction = self._query(cursor)
+        return self._page(list(query), direction)
+
+    async def aget_page(self, cursor=None):
+        """Versão assíncrona de get_page (ORM assíncrono, para views async)"""
+        query, direction = self._query(cursor)
+        return self._page([row async for row in query], direction)
+
+    def _page(self, rows, direction):
+        if direction != PREVIOUS:
+            return self._build(rows, from_cursor=direction is not None)
+
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        rows.reverse()
+        return KeysetPage(
+            rows,
+            next_cursor=self._cursor(rows[-1], NEXT) if rows else None,
+            previous_cursor=self._cursor(rows[0], PREVIOUS) if has_previous else None,
+        )
+
+    def _build(self, rows, from_cursor):
+        has_next = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+        return KeysetPage(
+            rows,
+            next_cursor=self._cursor(rows[-1], NEXT) if has_next else None,
+            previous_cursor=self._cursor(rows[0], PREVIOUS) if from_cursor and rows else None,
+        )
+
+
+def use_keyset(request):
+    """Modo cursor: ?cursor=..., ?pagination=keyset ou BLOG_PAGINATION_MODE"""
+    if 'cursor' in request.GET:
+        return True
+    mode = request.GET.get('pagination') or getattr(settings, 'BLOG_PAGINATION_MODE', 'offset')
+    return mode == 'keyset'
+
+
+def paginate_posts(request, queryset, per_page):
+    """Pagina um queryset de Post por offset (?page=) ou por cursor (?cursor=)"""
+    if use_keyset(request):
+        return KeysetPaginator(queryset, per_page).get_page(request.GET.get('cursor'))
+    paginator = Paginator(queryset, per_page)
+    return paginator.get_page(request.GET.get('page'))
+
+
+async def apaginate_posts(request, queryset, per_page):
+    """Versão assíncrona de paginate_posts: a página volta já avaliada"""
+    if use_keyset(request):
+        return await KeysetPaginator(queryset, per_page).aget_page(request.GET.get('cursor'))
+    paginator = Paginator(queryset, per_page)
+    # Paginator.count faria um COUNT síncrono: preenche o cached_property antes
+    paginator.count = await queryset.acount()
+    page = paginator.get_page(request.GET.get('page'))
+    page.object_list = [post async for post in page.object_list]
+    return page
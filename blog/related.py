@@ -0,0 +1,169 @@
+"""
+Posts relacionados pré-calculados por categoria
+
+Antes, cada página de detalhe buscava "mesma categoria, publicados, exceto o
+próprio post, LIMIT 3", sem ordem definida e sem cache. Aqui cada categoria
+guarda, por ranking, os LIMIT+1 primeiros posts publicados como cards prontos
+(RelatedPosts). Há um a mais para quando o próprio post está na lista: os
+relacionados de um post são essa lista sem ele. A leitura busca o updated_at
+da linha pela chave única (categoria, ranking) e os cards no cache, com esse
+updated_at na chave: quando qualquer processo recalcula a lista, os demais
+passam a procurar a chave nova, mesmo com um cache por processo (LocMem). O
+custo não depende do tamanho da categoria.
+
+Rankings (settings.RELATED_POSTS['RANKING']):
+- recent: mais recentes primeiro. O índice (category, -created_at) resolve
+  com LIMIT, então a lista é recalculada sempre que um post entra ou sai da
+  categoria.
+- views: mais vistos primeiro. Exige ordenar a categoria inteira, então só é
+  recalculado quando um post da lista muda ou sai (ou a lista está
+  incompleta) e pelo comando build_related_posts. Rode o comando com
+  --interval para acompanhar as visualizações.
+
+As listas são atualizadas pelos sinais de Post (blog/signals.py) depois do
+commit. Operações em massa (bulk_create, QuerySet.update) não disparam sinais:
+rode build_related_posts depois delas. O views_count exibido nos cards é o do
+último recálculo. Posts sem categoria não têm relacionados.
+"""
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.urls import reverse
+
+from .models import Post, RelatedPosts
+
+RANKINGS = {
+    RelatedPosts.RECENT: ('-created_at', '-id'),
+    RelatedPosts.VIEWS: ('-views_count', '-id'),
+}
+CARD_FIELDS = ('id', 'title', 'slug', 'author', 'views_count')
+
+
+def _config():
+    return getattr(settings, 'RELATED_POSTS', {})
+
+
+def default_ranking():
+    return _config().get('RANKING', RelatedPosts.RECENT)
+
+
+def _limit():
+    return _config().get('LIMIT', 3)
+
+
+def _cache_key(category_id, ranking, updated_at):
+    return f"related:{category_id}:{ranking}:{updated_at.timestamp()}"
+
+
+def _cache_timeout():
+    return _config().get('CACHE_TIMEOUT', 300)
+
+
+class Author:
+    def __init__(self, username):
+        self.username = username
+
+
+class RelatedCard:
+    """Post relacionado como guardado na lista (exibido sem consultar o banco)"""
+
+    def __init__(self, id, title, slug, author, views_count):
+        self.id = id
+        self.title = title
+        self.slug = slug
+        self.author = Author(author)
+        self.views_count = views_count
+
+    def get_absolute_url(self):
+        return reverse('blog:post_detail', kwargs={'slug': self.slug})
+
+
+def build_cards(category_id, ranking):
+    rows = (
+        Post.objects.filter(category_id=category_id, published=True)
+        .order_by(*RANKINGS[ranking])
+        .values_list('id', 'title', 'slug', 'author__username', 'views_count')[:_limit() + 1]
+    )
+    return [dict(zip(CARD_FIELDS, row)) for row in rows]
+
+
+def refresh(category_id, ranking):
+    """Recalcula e grava a lista da categoria; retorna os cards"""
+    cards = build_cards(category_id, ranking)
+    row, _ = RelatedPosts.objects.update_or_create(
+        category_id=category_id, ranking=ranking, defaults={'posts': cards}
+    )
+    cache.set(_cache_key(category_id, ranking, row.updated_at), cards, _cache_timeout())
+    return cards
+
+
+def stored_cards(category_id, ranking):
+    """Cards da lista: versão (updated_at) pelo banco, cards pelo cache (linha criada na primeira leitura)"""
+    rows = RelatedPosts.objects.filter(category_id=category_id, ranking=ranking)
+    updated_at = rows.values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        return refresh(category_id, ranking)
+    key = _cache_key(category_id, ranking, updated_at)
+    cards = cache.get(key)
+    if cards is None:
+        cards = rows.filter(updated_at=updated_at).values_list('posts', flat=True).first()
+        if cards is None:
+            # Recalculada entre as duas consultas: lê a versão nova
+            return stored_cards(category_id, ranking)
+        cache.set(key, cards, _cache_timeout())
+    return cards
+
+
+async def astored_cards(category_id, ranking):
+    rows = RelatedPosts.objects.filter(category_id=category_id, ranking=ranking)
+    updated_at = await rows.values_list('updated_at', flat=True).afirst()
+    if updated_at is None:
+        return await sync_to_async(refresh)(category_id, ranking)
+    key = _cache_key(category_id, ranking, updated_at)
+    cards = await cache.aget(key)
+    if cards is None:
+        cards = await rows.filter(updated_at=updated_at).values_list('posts', flat=True).afirst()
+        if cards is None:
+            return await astored_cards(category_id, ranking)
+        await cache.aset(key, cards, _cache_timeout())
+    return cards
+
+
+def _exclude(cards, post):
+    return [RelatedCard(**card) for card in cards if card['id'] != post.id][:_limit()]
+
+
+def related_posts(post, ranking=None):
+    """Até LIMIT posts da mesma categoria, no ranking configurado"""
+    if post.category_id is None:
+        return []
+    ranking = ranking or default_ranking()
+    return _exclude(stored_cards(post.category_id, ranking), post)
+
+
+async def arelated_posts(post, ranking=None):
+    if post.category_id is None:
+        return []
+    ranking = ranking or default_ranking()
+    return _exclude(await astored_cards(post.category_id, ranking), post)
+
+
+def post_changed(post_id, old_category_id, new_category_id, card_changed):
+    """Recalcula as listas afetadas por um post salvo ou apagado (blog/signals.py)
+
+    old/new: categoria em que o post era/é listado (None = fora das listas);
+    card_changed: título, slug ou autor mudaram.
+    """
+    moved = old_category_id != new_category_id
+    if not moved and not card_changed:
+        return
+    for category_id in {old_category_id, new_category_id} - {None}:
+        for ranking in RANKINGS:
+            if ranking == RelatedPosts.RECENT and moved:
+                refresh(category_id, ranking)
+                continue
+            cards = stored_cards(category_id, ranking)
+            listed = any(card['id'] == post_id for card in cards)
+            if listed or (moved and len(cards) <= _limit()):
+                refresh(category_id, ranking)
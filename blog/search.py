@@ -0,0 +1,207 @@
+"""
+Busca textual nos posts com o índice FTS5 (migração 0004_post_fts)
+
+Em vez de LIKE '%termo%' (leitura de todo o conteúdo de todos os posts), a
+busca consulta o índice invertido e ordena por relevância com bm25, dando
+peso maior ao título.
+
+O bm25 percorre a lista inteira de documentos de cada termo para calcular o
+IDF (dezenas de ms por termo comum com 1M de posts), e um termo presente em
+quase todos os posts tem IDF perto de zero: não muda a ordem. Por isso,
+termos que aparecem em mais de SEARCH['COMMON_TERM_DOCS'] posts são tratados
+como stopwords:
+
+- se a busca tem algum termo seletivo, só os seletivos filtram e ranqueiam:
+  os resultados podem não conter os termos comuns (SearchResults.ignored_terms)
+- se todos são comuns, casam todos e a ordem é do mais recente (rowid), sem bm25
+
+Os trechos (snippet) são texto do post escapado como HTML, com os termos
+encontrados entre <mark> e </mark>.
+"""
+
+import html
+import logging
+import re
+from importlib import import_module
+
+from django.conf import settings
+from django.db import connections, router
+from django.db.models import BooleanField, Q
+from django.db.models.expressions import RawSQL
+
+from .models import Post
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'blog_post_fts'
+FTS_TRIGGERS = ('blog_post_fts_insert', 'blog_post_fts_delete', 'blog_post_fts_update')
+# Pesos do bm25 por coluna: (title, content)
+BM25_WEIGHTS = (10.0, 1.0)
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+# Delimitadores do snippet (área de uso privado do Unicode): o trecho é
+# escapado e só depois eles viram <mark>, então o conteúdo não injeta HTML
+_MARK_OPEN, _MARK_CLOSE = '\ue000', '\ue001'
+
+
+def match_expression(query):
+    """Converte o texto digitado em uma expressão MATCH segura
+
+    Cada palavra vira um termo entre aspas (sem operadores FTS5 vindos do
+    usuário), e todas precisam aparecer: 'django orm' -> '"django" "orm"'.
+    Sem busca por prefixo: "orm*" mescla as listas de todos os termos que
+    começam com "orm" a cada consulta (centenas de ms com 1M de posts).
+    Retorna None se não houver palavras.
+    """
+    tokens = _TOKEN_RE.findall(query or '')
+    if not tokens:
+        return None
+    return ' '.join(f'"{token}"' for token in tokens)
+
+
+def fts_available(using):
+    return connections[using].vendor == 'sqlite'
+
+
+def ensure_fts_triggers(sender, using='default', **kwargs):
+    """Receiver de post_migrate: recria os triggers do índice se sumiram
+
+    No SQLite, migrações que recriam a tabela blog_post (o AddField padrão
+    do Django com NOT NULL, por exemplo) apagam os triggers junto com a
+    tabela antiga, e o índice deixa de acompanhar os posts. Os comandos da
+    migração 0004 são idempotentes e terminam com um 'rebuild' do índice.
+    """
+    if not fts_available(using):
+        return
+    with connections[using].cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name IN (%s, %s, %s, %s)",
+            [FTS_TABLE, *FTS_TRIGGERS],
+        )
+        existing = {row[0] for row in cursor.fetchall()}
+        if FTS_TABLE not in existing or existing >= set(FTS_TRIGGERS):
+            return
+        logger.warning('Triggers do índice FTS ausentes; recriando e reindexando %s', FTS_TABLE)
+        for sql in import_module('blog.migrations.0004_post_fts').CREATE:
+            cursor.execute(sql)
+
+
+class SearchResults:
+    """Página de resultados: ids na ordem de relevância, trechos destacados e termos ignorados"""
+
+    def __init__(self, ids, snippets, has_next, ignored_terms=()):
+        self.ids = ids
+        self.snippets = snippets
+        self.has_next = has_next
+        self.ignored_terms = list(ignored_terms)
+
+
+def _highlight(snippet):
+    return html.escape(snippet).replace(_MARK_OPEN, '<mark>').replace(_MARK_CLOSE, '</mark>')
+
+
+def _is_common(cursor, term, common_docs):
+    """O termo aparece em mais de common_docs posts? (lê só o início da lista do índice)"""
+    cursor.execute(
+        f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s LIMIT 1 OFFSET %s",
+        [term, common_docs],
+    )
+    return cursor.fetchone() is not None
+
+
+def search_post_ids(query, limit, offset=0, snippets=True):
+    """Busca posts publicados; retorna SearchResults com até `limit` ids"""
+    config = getattr(settings, 'SEARCH', {})
+    expression = match_expression(query)
+    if expression is None:
+        return SearchResults([], {}, False)
+
+    using = router.db_for_read(Post)
+    if not fts_available(using):
+        return _search_fallback(query, limit, offset)
+
+    common_docs = config.get('COMMON_TERM_DOCS', 2000)
+    with connections[using].cursor() as cursor:
+        terms = expression.split(' ')
+        selective = terms
+        if common_docs:
+            selective = [term for term in terms if not _is_common(cursor, term, common_docs)]
+        ignored = []
+        if selective:
+            ignored = [term.strip('"') for term in terms if term not in selective]
+            expression = ' '.join(selective)
+            weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+            order_by = f'bm25({FTS_TABLE}, {weights})'
+        else:
+            order_by = 'f.rowid DESC'
+        cursor.execute(
+            f"SELECT f.rowid FROM {FTS_TABLE} f JOIN blog_post p ON p.id = f.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s AND p.published "
+            f"ORDER BY {order_by} LIMIT %s OFFSET %s",
+            [expression, limit + 1, offset],
+        )
+        ids = [row[0] for row in cursor.fetchall()]
+        has_next = len(ids) > limit
+        ids = ids[:limit]
+
+        found = {}
+        if ids and snippets:
+            # Trechos só para a página exibida (snippet relê o conteúdo do post)
+            placeholders = ', '.join(['%s'] * len(ids))
+            cursor.execute(
+                f"SELECT rowid, snippet({FTS_TABLE}, 1, %s, %s, '…', 16) "
+                f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s AND rowid IN ({placeholders})",
+                [_MARK_OPEN, _MARK_CLOSE, expression] + ids,
+            )
+            found = {post_id: _highlight(snippet) for post_id, snippet in cursor.fetchall()}
+
+    return SearchResults(ids, found, has_next, ignored)
+
+
+def _filter_like(queryset, query):
+    """Bancos sem FTS5: todas as palavras no título ou no conteúdo (LIKE)"""
+    for token in _TOKEN_RE.findall(query):
+        queryset = queryset.filter(Q(title__icontains=token) | Q(content__icontains=token))
+    return queryset
+
+
+def _search_fallback(query, limit, offset):
+    ids = list(
+        _filter_like(Post.objects.filter(published=True), query)
+        .order_by('-created_at', '-id')
+        .values_list('id', flat=True)[offset:offset + limit + 1]
+    )
+    return SearchResults(ids[:limit], {}, len(ids) > limit)
+
+
+def admin_search_filter(queryset, search_term):
+    """Restringe um queryset de Post aos posts que casam com o termo (sem ranking)
+
+    Com algum termo seletivo, a lista de ids do índice é curta (id IN ...).
+    Se todos os termos são comuns, essa lista seria quase a tabela inteira:
+    cada post listado é conferido no índice (EXISTS), e a página segue a ordem
+    do índice de created_at.
+    """
+    expression = match_expression(search_term)
+    if expression is None:
+        return queryset
+    if not fts_available(queryset.db):
+        return _filter_like(queryset, search_term)
+
+    common_docs = getattr(settings, 'SEARCH', {}).get('COMMON_TERM_DOCS', 2000)
+    with connections[queryset.db].cursor() as cursor:
+        broad = common_docs and all(
+            _is_common(cursor, term, common_docs) for term in expression.split(' ')
+        )
+    if broad:
+        table = Post._meta.db_table
+        return queryset.filter(RawSQL(
+            f'EXISTS (SELECT 1 FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+            f'AND rowid = "{table}"."id")',
+            [expression],
+            output_field=BooleanField(),
+        ))
+    return queryset.filter(
+        id__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression])
+    )
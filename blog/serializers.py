@@ -0,0 +1,124 @@
+"""
+Serialização rápida de posts para a API JSON
+
+Em vez de instanciar Post/User/Category com select_related (e carregar o
+campo content inteiro, que a resposta nem usa), busca apenas as colunas
+necessárias como tuplas com values_list. Cada post vira um fragmento JSON
+já codificado, guardado no cache por (id, updated_at), e a resposta é
+montada concatenando os fragmentos, sem codificar tudo de novo.
+"""
+
+import json
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .page_cache import current_versions
+
+# Campo público da API -> coluna buscada com values_list
+POST_FIELDS = {
+    'id': 'id',
+    'title': 'title',
+    'slug': 'slug',
+    'author': 'author__username',
+    'category': 'category__name',
+    'created_at': 'created_at',
+    'views_count': 'views_count',
+}
+DEFAULT_FIELDS = tuple(POST_FIELDS)
+
+# Campos copiados de outro modelo -> versão incrementada quando ele é salvo
+# (blog/signals.py): renomear não toca no updated_at do post
+FIELD_VERSIONS = {
+    'author': 'authors',
+    'category': 'categories',
+}
+
+# Colunas sempre buscadas: chave do cursor e versão do fragmento
+_BASE_COLUMNS = ('id', 'created_at', 'updated_at', 'views_count')
+
+
+def parse_fields(value):
+    """Converte ?fields=a,b,c em uma tupla validada (ValueError se inválido)"""
+    if not value:
+        return DEFAULT_FIELDS
+    fields = tuple(dict.fromkeys(name.strip() for name in value.split(',') if name.strip()))
+    unknown = [name for name in fields if name not in POST_FIELDS]
+    if unknown or not fields:
+        raise ValueError(
+            f"Campos inválidos: {', '.join(unknown) or value}. "
+            f"Disponíveis: {', '.join(POST_FIELDS)}"
+        )
+    return fields
+
+
+def parse_api_params(params):
+    """?fields= e ?limit= da API de posts: (campos, limite); ValueError se inválidos"""
+    fields = parse_fields(params.get('fields'))
+    limit = int(params.get('limit', settings.API_POSTS_DEFAULT_LIMIT))
+    return fields, max(1, min(limit, settings.API_POSTS_MAX_LIMIT))
+
+
+class PostRowSerializer:
+    """Serializa linhas de Post (tuplas de values_list) para JSON"""
+
+    def __init__(self, fields=DEFAULT_FIELDS):
+        self.fields = fields
+        extra = [POST_FIELDS[name] for name in fields if POST_FIELDS[name] not in _BASE_COLUMNS]
+        self.columns = _BASE_COLUMNS + tuple(extra)
+        index = {column: position for position, column in enumerate(self.columns)}
+        self._positions = [(name, index[POST_FIELDS[name]]) for name in fields]
+        self._fields_key = ','.join(fields)
+        # views_count muda sem alterar updated_at (UPDATE com F()), então
+        # entra na versão do fragmento apenas quando faz parte da resposta
+        self._versioned_views = 'views_count' in fields
+        self._versions = [FIELD_VERSIONS[name] for name in fields if name in FIELD_VERSIONS]
+
+    def queryset(self, queryset):
+        return queryset.values_list(*self.columns)
+
+    @staticmethod
+    def key(row):
+        """(created_at, id) da linha, para o KeysetPaginator"""
+        return row[1], row[0]
+
+    def _cache_key(self, row, versions):
+        post_id, _, updated_at, views_count = row[:4]
+        version = f"{updated_at.timestamp()}"
+        if self._versioned_views:
+            version += f":{views_count}"
+        return f"api_post:{self._fields_key}:{post_id}:{version}{versions}"
+
+    def _encode(self, row):
+        data = {}
+        for name, position in self._positions:
+            value = row[position]
+            if name == 'created_at':
+                value = value.isoformat()
+            data[name] = value
+        return json.dumps(data)
+
+    def encode_rows(self, rows):
+        """Retorna os fragmentos JSON das linhas, usando o cache quando possível"""
+        versions = f":{current_versions(self._versions)}" if self._versions else ''
+        keys = [self._cache_key(row, versions) for row in rows]
+        cached = cache.get_many(keys)
+
+        fragments = []
+        missing = {}
+        for key, row in zip(keys, rows):
+            fragment = cached.get(key)
+            if fragment is None:
+                fragment = missing[key] = self._encode(row)
+            fragments.append(fragment)
+
+        if missing:
+            cache.set_many(missing, getattr(settings, 'API_POSTS_FRAGMENT_TIMEOUT', 600))
+        return fragments
+
+    def render(self, rows, **extra):
+        """Monta o corpo {"posts": [...], **extra} juntando os fragmentos"""
+        body = '{"posts": [' + ', '.join(self.encode_rows(rows)) + ']'
+        for name, value in extra.items():
+            body += f', {json.dumps(name)}: {json.dumps(value)}'
+        return (body + '}').encode()
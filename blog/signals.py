@@ -0,0 +1,135 @@
+"""
+Sinais que mantêm dados derivados de Post/Category em dia
+
+- Category.published_post_count: ajustado com UPDATE ... F() sempre que um
+  post é criado, apagado, publicado/despublicado ou muda de categoria.
+- Versões das páginas de categoria em cache (blog/page_cache.py):
+  incrementadas quando a categoria muda ou um post muda algum campo exibido
+  na listagem (Post.LISTING_FIELDS). Salvar só o views_count, como faz
+  Post.increment_views(), não invalida nada.
+- Versões usadas nos ETags e nos fragmentos em cache (blog/conditional.py,
+  blog/serializers.py, blog/fragments.py): 'posts' muda quando um post entra ou sai da listagem
+  (apagado, publicado/despublicado, outra categoria), casos em que o maior
+  updated_at pode continuar o mesmo; 'categories' e 'authors' mudam quando
+  uma categoria ou um usuário é salvo (o nome exibido pode ter mudado).
+- Listas de posts relacionados (blog/related.py): recalculadas depois do
+  commit quando um post entra/sai de uma categoria ou muda o card.
+
+Operações em massa (bulk_create, QuerySet.update) não disparam sinais: use os
+comandos reconcile_category_counts e build_related_posts depois delas.
+"""
+
+from functools import partial
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import related
+from .models import Category, Post
+from .page_cache import bump_versions
+
+_UNKNOWN = object()
+
+
+def _adjust(category_id, delta):
+    if category_id is None or not delta:
+        return
+    Category.objects.filter(pk=category_id).update(
+        published_post_count=Greatest(F('published_post_count') + delta, 0)
+    )
+
+
+def _invalidate_categories(*category_ids):
+    bump_versions(*{f'category:{pk}' for pk in category_ids if pk is not None})
+
+
+def _listing_changed(instance, created, update_fields):
+    """True se o save alterou algum campo exibido nas páginas de categoria"""
+    state = instance.listing_state()
+    previous = getattr(instance, '_listing_state', None)
+    instance._listing_state = state
+    if created:
+        return True
+    if update_fields is not None:
+        fields = {Post._meta.get_field(name).attname for name in update_fields}
+        if not fields & set(Post.LISTING_FIELDS):
+            return False
+    # Sem o estado carregado (ex.: campos adiados), invalida por segurança
+    return previous != state
+
+
+def _refresh_related(instance, old, new):
+    card_changed = getattr(instance, '_card_state', None) != instance.card_state()
+    instance._card_state = instance.card_state()
+    transaction.on_commit(partial(related.post_changed, instance.pk, old, new, card_changed))
+
+
+@receiver(pre_save, sender=Post)
+def remember_counter_state(sender, instance, raw, update_fields, **kwargs):
+    """Busca o estado anterior quando o post não foi carregado do banco"""
+    # Instância nova sem pk: não há estado anterior. Com pk (ex.: Post(pk=...)
+    # montado à mão), _state.adding é True mas o save pode ser um UPDATE
+    if raw or instance.pk is None or hasattr(instance, '_counter_state'):
+        return
+    if update_fields is not None and not {'category', 'published'} & set(update_fields):
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list('category_id', 'published').first()
+    if previous is None:
+        instance._counter_state = None
+    else:
+        category_id, published = previous
+        instance._counter_state = category_id if published else None
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, raw, update_fields, **kwargs):
+    """Ajusta os contadores, invalida as páginas e os relacionados da categoria antiga e da nova"""
+    if raw:
+        return
+
+    old = None if created else getattr(instance, '_counter_state', _UNKNOWN)
+    new = instance.counter_state()
+    if old is _UNKNOWN:
+        old = new
+
+    if _listing_changed(instance, created, update_fields):
+        _invalidate_categories(old, new)
+    _refresh_related(instance, old, new)
+    if update_fields is not None and not {'category', 'published'} & set(update_fields):
+        return
+    if old != new:
+        _adjust(old, -1)
+        _adjust(new, 1)
+        bump_versions('posts')
+    instance._counter_state = new
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    """Decrementa o contador quando um post publicado é apagado"""
+    state = getattr(instance, '_counter_state', instance.counter_state())
+    _adjust(state, -1)
+    _invalidate_categories(state)
+    bump_versions('posts')
+    _refresh_related(instance, state, None)
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def category_changed(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _invalidate_categories(instance.pk)
+        bump_versions('categories')
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, raw, update_fields, **kwargs):
+    """Nome do autor pode ter mudado: invalida ETags e fragmentos que o exibem"""
+    # O login grava só last_login (update_fields): não muda nada exibido
+    if raw or (update_fields is not None and 'username' not in update_fields):
+        return
+    bump_versions('authors')
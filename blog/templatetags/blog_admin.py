@@ -0,0 +1,16 @@
+from django import template
+from django.contrib.admin.templatetags.base import InclusionAdminNode
+
+register = template.Library()
+
+
+@register.tag(name='indexed_date_hierarchy')
+def indexed_date_hierarchy_tag(parser, token):
+    """{% indexed_date_hierarchy cl %}: date_hierarchy do admin para LargeTableChangeList"""
+    return InclusionAdminNode(
+        parser,
+        token,
+        func=lambda cl: cl.date_hierarchy_context(),
+        template_name='date_hierarchy.html',
+        takes_context=False,
+    )
@@ -0,0 +1,12 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.fragments import render_post_cards
+
+register = template.Library()
+
+
+@register.simple_tag
+def post_cards(posts, variant='list', cached=False):
+    """Renderiza os cards dos posts: {% post_cards page_obj "list" cached=True %}"""
+    return mark_safe('\n'.join(render_post_cards(posts, variant, cached=cached)))
@@ -1,3 +1,1625 @@
-from django.test import TestCase
+"""
+Testes dos subsistemas do blog
+Execute: python manage.py test blog
+"""
 
-# Create your tests here.
+import asyncio
+import hashlib
+import json
+import multiprocessing
+import os
+import re
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from itertools import count
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError, connection
+from django.db.backends.sqlite3.base import DatabaseWrapper
+from django.db.models import F, QuerySet
+from django.http import HttpResponse
+from django.template import engines
+from django.template.defaultfilters import truncatewords
+from django.test import (
+    RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from blogproject import db_routing, middleware, sqlite_cache, sqlite_profile
+from blogproject.db_routing import PrimaryReplicaRouter, ReplicaPinningMiddleware
+from blogproject.jsonl import BufferedJSONLWriter
+from blogproject.middleware import (
+    ProfilingMiddleware, ServerTimingMiddleware, TrafficRecorderMiddleware,
+)
+from loadtest.replay import TrafficReplay, replay_headers, status_matches
+from blogproject.sqlite_cache import SQLiteCache
+
+from . import related
+from .admin_changelist import (
+    CachedBooleanFieldListFilter, EstimatedCountPaginator, IndexedDates, QueryTimeout,
+    estimate_count, time_budget,
+)
+from .excerpts import EXCERPT_WORDS, backfill_excerpts, make_excerpt
+from .fragments import VIEWS_MARKER, card_cache_key, card_versions, render_post_cards
+from .jobs import JobQueue, job_handler, queue as job_queue
+from .management.commands import sqlite_profile as sqlite_profile_command, sync_replica
+from .models import Category, Job, Post, RelatedPosts
+from .page_cache import bump_versions, current_versions, versioned_page_cache
+from .pagination import NEXT, KeysetPaginator, decode_cursor, encode_cursor, paginate_posts
+from .search import FTS_TRIGGERS, ensure_fts_triggers, search_post_ids
+from .serializers import DEFAULT_FIELDS, PostRowSerializer, parse_fields
+from .view_counter import BufferedViewCounter
+
+_slugs = count(1)
+
+
+def make_post(author, category=None, **fields):
+    """Cria um post publicado com slug único"""
+    number = next(_slugs)
+    fields.setdefault('title', f'Post {number}')
+    fields.setdefault('slug', f'post-teste-{number}')
+    fields.setdefault('content', f'Conteúdo do post {number}')
+    return Post.objects.create(author=author, category=category, **fields)
+
+
+class BlogTestCase(TestCase):
+    """Autor, duas categorias e o cache limpo (as versões ficam no cache)"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user('autor', password='x')
+        cls.django = Category.objects.create(name='Django')
+        cls.python = Category.objects.create(name='Python')
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def views(self, post):
+        return Post.objects.values_list('views_count', flat=True).get(pk=post.pk)
+
+
+class BufferedViewCounterTests(BlogTestCase):
+    def counter(self, **kwargs):
+        # Intervalo longo: o flush só acontece por limite ou chamado pelo teste
+        return BufferedViewCounter(**{'flush_interval': 3600, 'flush_threshold': 100, **kwargs})
+
+    def test_increments_wait_in_memory_until_flush(self):
+        first, second = make_post(self.author), make_post(self.author)
+        counter = self.counter()
+        for _ in range(3):
+            counter.increment(first.pk)
+        counter.increment(second.pk)
+
+        self.assertEqual(counter.pending(first.pk), 3)
+        self.assertEqual(counter.pending(), 4)
+        self.assertEqual(self.views(first), 0)
+
+        self.assertEqual(counter.flush(), 4)
+        self.assertEqual(self.views(first), 3)
+        self.assertEqual(self.views(second), 1)
+        self.assertEqual(counter.pending(), 0)
+
+    def test_flush_adds_to_concurrent_updates(self):
+        post = make_post(self.author, views_count=10)
+        counter = self.counter()
+        counter.increment(post.pk, 2)
+        # Outro processo gravou no meio tempo: o flush soma, não sobrescreve
+        Post.objects.filter(pk=post.pk).update(views_count=50)
+        counter.flush()
+        self.assertEqual(self.views(post), 52)
+
+    def test_threshold_triggers_flush(self):
+        post = make_post(self.author)
+        counter = self.counter(flush_threshold=3)
+        counter.increment(post.pk)
+        counter.increment(post.pk)
+        self.assertEqual(self.views(post), 0)
+        counter.increment(post.pk)
+        self.assertEqual(self.views(post), 3)
+        self.assertEqual(counter.pending(), 0)
+
+    def test_failed_flush_keeps_increments(self):
+        post = make_post(self.author)
+        counter = self.counter()
+        counter.increment(post.pk, 5)
+        with mock.patch.object(QuerySet, 'update', side_effect=DatabaseError), \
+                self.assertLogs('blog.view_counter', 'ERROR'):
+            self.assertEqual(counter.flush(), 0)
+        self.assertEqual(counter.pending(post.pk), 5)
+
+        self.assertEqual(counter.flush(), 5)
+        self.assertEqual(self.views(post), 5)
+
+    def test_empty_flush_does_nothing(self):
+        with self.assertNumQueries(0):
+            self.assertEqual(self.counter().flush(), 0)
+
+
+class KeysetPaginationTests(BlogTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        # 7 posts, com empates de created_at para exercitar o desempate por id
+        now = timezone.now()
+        cls.posts = [make_post(cls.author) for _ in range(7)]
+        for index, post in enumerate(cls.posts):
+            post.created_at = now - timedelta(hours=index // 2)
+            Post.objects.filter(pk=post.pk).update(created_at=post.created_at)
+        cls.expected = [
+            post.pk for post in sorted(cls.posts, key=lambda post: (post.created_at, post.pk), reverse=True)
+        ]
+
+    def paginator(self, queryset=None, **kwargs):
+        return KeysetPaginator(Post.objects.all() if queryset is None else queryset, 3, **kwargs)
+
+    def ids(self, page):
+        return [post.pk for post in page]
+
+    def test_cursor_round_trip(self):
+        created_at = timezone.now()
+        token = encode_cursor(created_at, 42, NEXT)
+        self.assertNotIn('=', token)
+        self.assertEqual(decode_cursor(token), (created_at, 42, NEXT))
+
+    def test_invalid_cursors_decode_to_none(self):
+        for token in ('', 'lixo', encode_cursor(timezone.now(), 1, 'x'), 'W1siYSJdXQ'):
+            with self.subTest(token=token):
+                self.assertIsNone(decode_cursor(token))
+
+    def test_next_pages_cover_every_post_once(self):
+        paginator = self.paginator()
+        page = paginator.get_page()
+        self.assertFalse(page.has_previous())
+        seen = self.ids(page)
+        while page.has_next():
+            page = paginator.get_page(page.next_cursor)
+            self.assertTrue(page.has_previous())
+            seen += self.ids(page)
+        self.assertEqual(seen, self.expected)
+
+    def test_previous_cursor_returns_the_earlier_page(self):
+        paginator = self.paginator()
+        second = paginator.get_page(paginator.get_page().next_cursor)
+        third = paginator.get_page(second.next_cursor)
+
+        back = paginator.get_page(third.previous_cursor)
+        self.assertEqual(self.ids(back), self.ids(second))
+        first = paginator.get_page(back.previous_cursor)
+        self.assertEqual(self.ids(first), self.expected[:3])
+        self.assertFalse(first.has_previous())
+        self.assertEqual(self.ids(paginator.get_page(first.next_cursor)), self.ids(second))
+
+    def test_invalid_cursor_starts_over(self):
+        self.assertEqual(self.ids(self.paginator().get_page('lixo')), self.expected[:3])
+
+    def test_values_list_rows_with_custom_key(self):
+        rows = Post.objects.values_list('id', 'created_at')
+        paginator = self.paginator(rows, key=lambda row: (row[1], row[0]))
+        page = paginator.get_page()
+        page = paginator.get_page(page.next_cursor)
+        self.assertEqual([row[0] for row in page], self.expected[3:6])
+
+    def test_paginate_posts_switches_to_keyset_with_cursor(self):
+        factory = RequestFactory()
+        ordered = Post.objects.order_by('-created_at', '-id')
+        offset = paginate_posts(factory.get('/posts/', {'page': 2}), ordered, 3)
+        self.assertEqual(offset.number, 2)
+        self.assertEqual(self.ids(offset), self.expected[3:6])
+
+        first = paginate_posts(factory.get('/posts/', {'pagination': 'keyset'}), Post.objects.all(), 3)
+        second = paginate_posts(factory.get('/posts/', {'cursor': first.next_cursor}), Post.objects.all(), 3)
+        self.assertTrue(second.is_keyset)
+        self.assertEqual(self.ids(second), self.expected[3:6])
+
+    def test_api_posts_follows_cursors(self):
+        response = self.client.get('/api/posts/', {'limit': 4, 'fields': 'id'})
+        body = response.json()
+        self.assertEqual([post['id'] for post in body['posts']], self.expected[:4])
+        self.assertIsNone(body['previous'])
+
+        body = self.client.get('/api/posts/', {'limit': 4, 'fields': 'id', 'cursor': body['next']}).json()
+        self.assertEqual([post['id'] for post in body['posts']], self.expected[4:])
+        self.assertIsNone(body['next'])
+        self.assertIsNotNone(body['previous'])
+
+
+class CategoryCounterTests(BlogTestCase):
+    def counts(self):
+        return dict(Category.objects.values_list('name', 'published_post_count'))
+
+    def test_create_and_delete(self):
+        post = make_post(self.author, self.django)
+        make_post(self.author, self.django, published=False)
+        make_post(self.author)
+        self.assertEqual(self.counts(), {'Django': 1, 'Python': 0})
+        post.delete()
+        self.assertEqual(self.counts(), {'Django': 0, 'Python': 0})
+
+    def test_publish_unpublish_and_move(self):
+        post = make_post(self.author, self.django, published=False)
+        post.published = True
+        post.save()
+        self.assertEqual(self.counts(), {'Django': 1, 'Python': 0})
+
+        post.category = self.python
+        post.save()
+        self.assertEqual(self.counts(), {'Django': 0, 'Python': 1})
+
+        post.published = False
+        post.save(update_fields=['published'])
+        self.assertEqual(self.counts(), {'Django': 0, 'Python': 0})
+
+    def test_instance_not_loaded_from_database(self):
+        post = make_post(self.author, self.django)
+        # Instância montada à mão: o estado anterior vem de uma consulta no pre_save
+        detached = Post(pk=post.pk, title=post.title, slug=post.slug, content='novo',
+                        author=self.author, category=self.python, published=True,
+                        created_at=post.created_at)
+        detached.save()
+        self.assertEqual(self.counts(), {'Django': 0, 'Python': 1})
+
+    def test_saving_other_fields_keeps_counts(self):
+        post = make_post(self.author, self.django)
+        post.increment_views()
+        Post.objects.get(pk=post.pk).save(update_fields=['views_count'])
+        Post.objects.only('id', 'title').get(pk=post.pk).save(update_fields=['title'])
+        self.assertEqual(self.counts(), {'Django': 1, 'Python': 0})
+
+    def test_counter_never_goes_negative(self):
+        post = make_post(self.author, self.django)
+        Category.objects.update(published_post_count=0)
+        post.delete()
+        self.assertEqual(self.counts()['Django'], 0)
+
+    def test_reconcile_fixes_bulk_changes(self):
+        make_post(self.author, self.django)
+        # QuerySet.update não dispara sinais
+        Post.objects.update(category=self.python)
+        output = StringIO()
+        call_command('reconcile_category_counts', '--dry-run', stdout=output)
+        self.assertEqual(self.counts(), {'Django': 1, 'Python': 0})
+        call_command('reconcile_category_counts', stdout=output)
+        self.assertEqual(self.counts(), {'Django': 0, 'Python': 1})
+
+
+class PostRowSerializerTests(BlogTestCase):
+    def render(self, fields=DEFAULT_FIELDS, **extra):
+        serializer = PostRowSerializer(fields)
+        rows = list(serializer.queryset(Post.objects.order_by('-created_at', '-id')))
+        return json.loads(serializer.render(rows, **extra))
+
+    def test_parse_fields(self):
+        self.assertEqual(parse_fields(None), DEFAULT_FIELDS)
+        self.assertEqual(parse_fields(' title, id,title '), ('title', 'id'))
+        for value in ('content', 'id,senha', ',,'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_fields(value)
+
+    def test_render_matches_model_values(self):
+        post = make_post(self.author, self.django, views_count=7)
+        body = self.render(next='abc')
+        self.assertEqual(body['next'], 'abc')
+        self.assertEqual(body['posts'], [{
+            'id': post.pk,
+            'title': post.title,
+            'slug': post.slug,
+            'author': 'autor',
+            'category': 'Django',
+            'created_at': post.created_at.isoformat(),
+            'views_count': 7,
+        }])
+
+    def test_projection_and_no_content_column(self):
+        make_post(self.author)
+        serializer = PostRowSerializer(('slug', 'category'))
+        self.assertNotIn('content', serializer.columns)
+        self.assertEqual(list(self.render(('slug', 'category'))['posts'][0]), ['slug', 'category'])
+
+    def test_cached_fragments_follow_edits_and_views(self):
+        post = make_post(self.author)
+        self.render()
+        Post.objects.filter(pk=post.pk).update(views_count=99)
+        self.assertEqual(self.render()['posts'][0]['views_count'], 99)
+        post.title = 'Título novo'
+        post.save()
+        self.assertEqual(self.render()['posts'][0]['title'], 'Título novo')
+
+    def test_fragments_are_reused(self):
+        make_post(self.author)
+        self.render()
+        with mock.patch.object(PostRowSerializer, '_encode') as encode:
+            self.render()
+        encode.assert_not_called()
+
+    def test_api_rejects_unknown_fields(self):
+        response = self.client.get('/api/posts/', {'fields': 'id,content'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('content', response.json()['error'])
+
+
+class VersionedPageCacheTests(BlogTestCase):
+    factory = RequestFactory()
+
+    def cached_view(self, status=200, **options):
+        """View que conta as execuções, com cache dependente da versão 'test:page'"""
+        calls = []
+
+        def view(request):
+            calls.append(request.path)
+            return HttpResponse(f'resposta {len(calls)}', status=status)
+
+        options = {'timeout': 60, 'stale_timeout': 60, 'lock_timeout': 5, 'beta': 0, **options}
+        return versioned_page_cache(lambda request: ['test:page'], **options)(view), calls
+
+    def lock_key(self, path='/pagina/'):
+        digest = hashlib.md5(path.encode()).hexdigest()
+        return f"page:{digest}:{current_versions(['test:page'])}:lock"
+
+    def get(self, view, path='/pagina/'):
+        return view(self.factory.get(path))
+
+    def test_hit_after_miss_and_miss_after_bump(self):
+        view, calls = self.cached_view()
+        self.assertEqual(self.get(view)['X-Page-Cache'], 'miss')
+        response = self.get(view)
+        self.assertEqual(response['X-Page-Cache'], 'hit')
+        self.assertEqual(response.content, b'resposta 1')
+
+        bump_versions('test:page')
+        self.assertEqual(self.get(view).content, b'resposta 2')
+        self.assertEqual(len(calls), 2)
+
+    def test_post_requests_bypass_the_cache(self):
+        view, calls = self.cached_view()
+        view(self.factory.post('/pagina/'))
+        view(self.factory.post('/pagina/'))
+        self.assertEqual(len(calls), 2)
+
+    def test_error_responses_are_not_stored(self):
+        view, calls = self.cached_view(status=404)
+        self.get(view)
+        self.get(view)
+        self.assertEqual(len(calls), 2)
+
+    def test_expired_entry_is_served_stale_while_locked(self):
+        view, calls = self.cached_view(timeout=0)
+        self.get(view)
+        cache.add(self.lock_key(), 1, 5)
+        response = self.get(view)
+        self.assertEqual(response['X-Page-Cache'], 'stale')
+        self.assertEqual(len(calls), 1)
+
+        cache.delete(self.lock_key())
+        self.assertEqual(self.get(view)['X-Page-Cache'], 'miss')
+
+    def test_waiter_takes_over_when_lock_is_released_without_entry(self):
+        # O request que regenerava terminou sem guardar nada (ex.: 404)
+        view, calls = self.cached_view(status=404, lock_timeout=5)
+        cache.add(self.lock_key(), 1, 5)
+        threading.Timer(0.1, cache.delete, [self.lock_key()]).start()
+
+        started = time.monotonic()
+        response = self.get(view)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(cache.get(self.lock_key()))
+
+    def test_bump_versions_without_previous_value(self):
+        self.assertEqual(current_versions(['novo']), 'novo=1')
+        bump_versions('novo')
+        bump_versions('novo')
+        self.assertEqual(current_versions(['novo']), 'novo=3')
+
+
+class CategoryPageInvalidationTests(BlogTestCase):
+    def version(self, category):
+        return current_versions([f'category:{category.pk}'])
+
+    def test_category_page_is_cached_until_a_listed_post_changes(self):
+        post = make_post(self.author, self.django)
+        url = f'/category/{self.django.pk}/'
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'miss')
+        self.assertEqual(self.client.get(url)['X-Page-Cache'], 'hit')
+
+        post.title = 'Título novo'
+        post.save()
+        response = self.client.get(url)
+        self.assertEqual(response['X-Page-Cache'], 'miss')
+        self.assertContains(response, 'Título novo')
+
+    def test_view_count_saves_keep_the_category_version(self):
+        post = make_post(self.author, self.django)
+        before = self.version(self.django)
+        post.increment_views()
+        Post.objects.defer('content').get(pk=post.pk).increment_views()
+        post.save(update_fields=['views_count'])
+        self.assertEqual(self.version(self.django), before)
+
+    def test_listed_fields_bump_old_and_new_category(self):
+        post = make_post(self.author, self.django)
+        django_version, python_version = self.version(self.django), self.version(self.python)
+        post.category = self.python
+        post.save()
+        self.assertNotEqual(self.version(self.django), django_version)
+        self.assertNotEqual(self.version(self.python), python_version)
+
+    def test_category_rename_bumps_its_version(self):
+        before = self.version(self.django)
+        self.django.description = 'Nova descrição'
+        self.django.save()
+        self.assertNotEqual(self.version(self.django), before)
+
+
+@job_handler('test_echo')
+def _echo_job(**params):
+    return {'params': params}
+
+
+@job_handler('test_fail')
+def _failing_job():
+    raise ValueError('falhou')
+
+
+@job_handler('test_abandoned')
+def _abandoned_job(job_id):
+    # Simula outro processo dando o job como abandonado durante a execução
+    JobQueue()._abandon(Job.objects.get(pk=job_id))
+    return {'ok': True}
+
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        self.queue = JobQueue(workers=1, stale_after=60, keep_finished=0)
+        patcher = mock.patch.object(self.queue, '_get_executor')
+        self.executor = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def run_job(self, job):
+        self.queue._run(job.pk)
+        job.refresh_from_db()
+        return job
+
+    def test_identical_jobs_are_deduplicated(self):
+        job, created = self.queue.enqueue('test_echo', n=1)
+        again, created_again = self.queue.enqueue('test_echo', n=1)
+        other, created_other = self.queue.enqueue('test_echo', n=2)
+        self.assertTrue(created)
+        self.assertEqual((again.pk, created_again), (job.pk, False))
+        self.assertTrue(created_other)
+        self.assertEqual(self.executor.submit.call_count, 2)
+
+    def test_finished_job_is_not_reused(self):
+        job, _ = self.queue.enqueue('test_echo', n=1)
+        self.run_job(job)
+        again, created = self.queue.enqueue('test_echo', n=1)
+        self.assertTrue(created)
+        self.assertNotEqual(again.pk, job.pk)
+
+    def test_unknown_kind_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.queue.enqueue('inexistente')
+
+    def test_run_stores_result(self):
+        job, _ = self.queue.enqueue('test_echo', n=1)
+        job = self.run_job(job)
+        self.assertEqual(job.status, Job.DONE)
+        self.assertEqual(job.result, {'params': {'n': 1}})
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+
+    def test_run_stores_error(self):
+        job, _ = self.queue.enqueue('test_fail')
+        with self.assertLogs('blog.jobs', 'ERROR'):
+            job = self.run_job(job)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIn('falhou', job.error)
+        self.assertIsNone(job.result)
+
+    def test_abandoned_job_stays_failed(self):
+        job = Job.objects.create(kind='test_abandoned', key='abandonado')
+        job.params = {'job_id': job.pk}
+        job.save(update_fields=['params'])
+        with self.assertLogs('blog.jobs', 'WARNING'):
+            job = self.run_job(job)
+        self.assertEqual(job.status, Job.FAILED)
+        self.assertIsNone(job.result)
+        self.assertTrue(job.error.startswith('Abandonado'))
+
+    def test_only_queued_jobs_are_claimed(self):
+        job, _ = self.queue.enqueue('test_echo', n=1)
+        Job.objects.filter(pk=job.pk).update(status=Job.RUNNING)
+        job = self.run_job(job)
+        self.assertEqual(job.status, Job.RUNNING)
+        self.assertIsNone(job.result)
+
+    def test_stale_job_is_replaced(self):
+        job, _ = self.queue.enqueue('test_echo', n=1)
+        Job.objects.filter(pk=job.pk).update(
+            status=Job.RUNNING, started_at=timezone.now() - timedelta(seconds=61)
+        )
+        fresh, created = self.queue.enqueue('test_echo', n=1)
+        self.assertTrue(created)
+        self.assertNotEqual(fresh.pk, job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Job.FAILED)
+
+    def test_slow_endpoint_answers_202_with_location(self):
+        with mock.patch.object(job_queue, '_get_executor') as executor:
+            first = self.client.get('/api/slow/')
+            second = self.client.get('/api/slow/')
+        self.assertEqual(first.status_code, 202)
+        self.assertEqual(executor.return_value.submit.call_count, 1)
+        self.assertFalse(first.json()['deduplicated'])
+        self.assertTrue(second.json()['deduplicated'])
+        self.assertEqual(first['Location'], second['Location'])
+
+        status = self.client.get(first['Location']).json()
+        self.assertEqual((status['id'], status['status']), (first.json()['job_id'], Job.QUEUED))
+
+
+class RelatedPostsTests(BlogTestCase):
+    def create(self, count, category=None, **fields):
+        with self.captureOnCommitCallbacks(execute=True):
+            return [make_post(self.author, category or self.django, **fields) for _ in range(count)]
+
+    def titles(self, cards):
+        return [card['title'] if isinstance(card, dict) else card.title for card in cards]
+
+    def test_refresh_keeps_limit_plus_one_recent_posts(self):
+        posts = self.create(5)
+        cards = related.refresh(self.django.pk, RelatedPosts.RECENT)
+        self.assertEqual(self.titles(cards), [post.title for post in posts[::-1][:4]])
+        self.assertEqual(cards[0]['author'], 'autor')
+
+    def test_new_post_refreshes_the_stored_list(self):
+        self.create(2)
+        stored = related.stored_cards(self.django.pk, RelatedPosts.RECENT)
+        [newest] = self.create(1)
+        cards = related.stored_cards(self.django.pk, RelatedPosts.RECENT)
+        self.assertEqual(len(cards), len(stored) + 1)
+        self.assertEqual(cards[0]['id'], newest.pk)
+
+    def test_unpublished_post_leaves_the_list(self):
+        posts = self.create(2)
+        with self.captureOnCommitCallbacks(execute=True):
+            posts[1].published = False
+            posts[1].save()
+        cards = related.stored_cards(self.django.pk, RelatedPosts.RECENT)
+        self.assertEqual([card['id'] for card in cards], [posts[0].pk])
+
+    def test_title_change_of_listed_post_refreshes(self):
+        post = self.create(2)[1]
+        related.stored_cards(self.django.pk, RelatedPosts.RECENT)
+        with self.captureOnCommitCallbacks(execute=True):
+            post.title = 'Título novo'
+            post.save()
+        cards = related.stored_cards(self.django.pk, RelatedPosts.RECENT)
+        self.assertEqual(cards[0]['title'], 'Título novo')
+
+    def test_rebuild_by_another_process_is_seen(self):
+        self.create(2)
+        related.stored_cards(self.django.pk, RelatedPosts.RECENT)
+        # Outro processo (com outro cache) regravou a lista
+        RelatedPosts.objects.filter(category=self.django).update(
+            posts=[{'id': 0, 'title': 'Outro processo', 'slug': 'outro', 'author': 'autor', 'views_count': 0}],
+            updated_at=timezone.now() + timedelta(seconds=1),
+        )
+        cards = related.stored_cards(self.django.pk, RelatedPosts.RECENT)
+        self.assertEqual(self.titles(cards), ['Outro processo'])
+
+    def test_related_posts_excludes_the_post_and_respects_limit(self):
+        posts = self.create(5)
+        self.create(1, category=self.python)
+        newest = posts[-1]
+        related_cards = related.related_posts(newest, RelatedPosts.RECENT)
+        self.assertEqual([card.id for card in related_cards], [post.pk for post in posts[-2:-5:-1]])
+        self.assertEqual(related_cards[0].get_absolute_url(), posts[-2].get_absolute_url())
+
+        oldest_listed = posts[1]
+        self.assertEqual(len(related.related_posts(oldest_listed, RelatedPosts.RECENT)), 3)
+        self.assertNotIn(oldest_listed.pk, [card.id for card in related.related_posts(oldest_listed)])
+
+    def test_post_without_category_has_no_related(self):
+        post = make_post(self.author)
+        self.assertEqual(related.related_posts(post), [])
+
+    def test_views_ranking_orders_by_views(self):
+        posts = self.create(3)
+        Post.objects.filter(pk=posts[0].pk).update(views_count=10)
+        cards = related.refresh(self.django.pk, RelatedPosts.VIEWS)
+        self.assertEqual(cards[0]['id'], posts[0].pk)
+
+
+class ExcerptTests(BlogTestCase):
+    long_content = ' '.join(f'palavra{n}' for n in range(200))
+
+    def excerpt(self, post):
+        return Post.objects.values_list('excerpt', flat=True).get(pk=post.pk)
+
+    def test_excerpt_truncates_like_truncatewords(self):
+        excerpt = make_excerpt(self.long_content)
+        self.assertEqual(len(excerpt.split()), EXCERPT_WORDS + 1)
+        for words in (30, EXCERPT_WORDS):
+            self.assertEqual(truncatewords(excerpt, words), truncatewords(self.long_content, words))
+        self.assertEqual(make_excerpt('curto'), 'curto')
+
+    def test_save_writes_the_excerpt(self):
+        post = make_post(self.author, content=self.long_content)
+        self.assertEqual(self.excerpt(post), make_excerpt(self.long_content))
+
+    def test_update_fields_with_content_include_the_excerpt(self):
+        post = make_post(self.author)
+        post.content = self.long_content
+        post.save(update_fields=['content'])
+        self.assertEqual(self.excerpt(post), make_excerpt(self.long_content))
+
+    def test_deferred_content_keeps_the_excerpt(self):
+        post = make_post(self.author, content=self.long_content)
+        deferred = Post.objects.defer('content').get(pk=post.pk)
+        deferred.title = 'Outro título'
+        deferred.save()
+        self.assertEqual(self.excerpt(post), make_excerpt(self.long_content))
+        # O save não carregou o content só para recalcular o trecho
+        self.assertEqual(deferred.get_deferred_fields(), {'content'})
+
+    def test_backfill_fills_missing_excerpts(self):
+        posts = [make_post(self.author, content=f'{self.long_content} {n}') for n in range(5)]
+        Post.objects.filter(pk__in=[post.pk for post in posts[:3]]).update(excerpt='')
+        done = []
+        self.assertEqual(backfill_excerpts(Post, batch_size=2, progress=done.append), 3)
+        self.assertEqual(done, [2, 3])
+        for post in posts:
+            self.assertEqual(self.excerpt(post), make_excerpt(post.content))
+
+    def test_backfill_command_recalculates_all_with_flag(self):
+        posts = [make_post(self.author) for _ in range(3)]
+        Post.objects.update(excerpt='antigo')
+        out = StringIO()
+        call_command('backfill_excerpts', stdout=out)
+        self.assertIn('0 trecho(s)', out.getvalue())
+
+        call_command('backfill_excerpts', '--all', '--batch-size', '2', stdout=out)
+        self.assertIn('3 trecho(s)', out.getvalue())
+        for post in posts:
+            self.assertEqual(self.excerpt(post), make_excerpt(post.content))
+
+
+class ConditionalGetTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.older = make_post(self.author, self.django)
+        self.post = make_post(self.author, self.django)
+
+    def revalidate(self, url, response):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+
+    def count_view(self, post):
+        # Como as views e o contador bufferizado: sem tocar no updated_at
+        Post.objects.filter(pk=post.pk).update(views_count=F('views_count') + 1)
+
+    def test_detail_answers_304_and_counts_the_view(self):
+        url = f'/post/{self.post.slug}/optimized/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('W/"'))
+        self.assertIn('no-cache', response['Cache-Control'])
+        self.assertIn('Last-Modified', response)
+
+        not_modified = self.revalidate(url, response)
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.content, b'')
+        self.assertEqual(self.views(self.post), 2)
+
+    def test_detail_changes_etag_when_post_is_edited(self):
+        url = f'/post/{self.post.slug}/optimized/'
+        response = self.client.get(url)
+        self.post.title = 'Título novo'
+        self.post.save()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_detail_of_missing_post_is_404(self):
+        response = self.client.get('/post/inexistente/optimized/', HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+    def test_detail_answers_304_to_if_modified_since(self):
+        url = f'/post/{self.post.slug}/optimized/'
+        response = self.client.get(url)
+        not_modified = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_api_etag_changes_when_older_post_is_unpublished(self):
+        response = self.client.get('/api/posts/')
+        self.assertEqual(self.revalidate('/api/posts/', response).status_code, 304)
+
+        # O maior updated_at continua o do post mais novo
+        self.older.published = False
+        self.older.save()
+        response = self.revalidate('/api/posts/', response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([post['id'] for post in response.json()['posts']], [self.post.pk])
+
+    def test_api_etag_changes_on_category_and_author_renames(self):
+        response = self.client.get('/api/posts/')
+        self.django.name = 'Django 5'
+        self.django.save()
+        response = self.revalidate('/api/posts/', response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posts'][0]['category'], 'Django 5')
+
+        self.author.username = 'autora'
+        self.author.save()
+        response = self.revalidate('/api/posts/', response)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posts'][0]['author'], 'autora')
+
+    def test_api_etag_ignores_unrelated_user_saves(self):
+        response = self.client.get('/api/posts/')
+        self.author.last_login = timezone.now()
+        self.author.save(update_fields=['last_login'])
+        self.assertEqual(self.revalidate('/api/posts/', response).status_code, 304)
+
+    def test_api_etag_follows_views_count_only_when_returned(self):
+        with_views = self.client.get('/api/posts/')
+        without_views = self.client.get('/api/posts/', {'fields': 'id,title'})
+        self.count_view(self.post)
+
+        response = self.revalidate('/api/posts/', with_views)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['posts'][0]['views_count'], 1)
+        self.assertEqual(self.revalidate('/api/posts/', response).status_code, 304)
+
+        not_modified = self.client.get(
+            '/api/posts/', {'fields': 'id,title'}, HTTP_IF_NONE_MATCH=without_views['ETag']
+        )
+        self.assertEqual(not_modified.status_code, 304)
+
+    def test_api_views_of_later_pages_change_their_etag(self):
+        first = self.client.get('/api/posts/', {'limit': 1})
+        url = f"/api/posts/?limit=1&cursor={first.json()['next']}"
+        second = self.client.get(url)
+        self.count_view(self.older)
+        self.assertEqual(self.revalidate('/api/posts/?limit=1', first).status_code, 304)
+        self.assertEqual(self.revalidate(url, second).status_code, 200)
+
+    def test_api_invalid_parameters_are_not_conditional(self):
+        response = self.client.get('/api/posts/')
+        invalid = self.client.get('/api/posts/', {'fields': 'senha'}, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(invalid.status_code, 400)
+
+    def test_category_page_answers_304_until_a_post_is_deleted(self):
+        url = f'/category/{self.django.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response).status_code, 304)
+
+        self.older.delete()
+        self.assertEqual(self.revalidate(url, response).status_code, 200)
+
+    def test_post_requests_are_not_conditional(self):
+        response = self.client.get('/api/posts/')
+        response = self.client.post('/api/posts/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+
+def _incr_many(path, times):
+    backend = SQLiteCache(path, {})
+    for _ in range(times):
+        backend.incr('contador')
+
+
+class SQLiteCacheTests(TestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'cache.sqlite3')
+        self.backend = self.make_cache()
+        self.addCleanup(self.close_connection)
+
+    def make_cache(self, **options):
+        return SQLiteCache(self.path, {'OPTIONS': options})
+
+    def close_connection(self):
+        connection = getattr(sqlite_cache._local, 'connections', {}).pop(self.path, None)
+        if connection is not None:
+            connection.close()
+
+    def test_set_get_and_expiry(self):
+        self.backend.set('numero', 7)
+        self.backend.set('lista', [1, 'dois'])
+        self.backend.set('sim', True)
+        self.assertEqual(self.backend.get('numero'), 7)
+        self.assertEqual(self.backend.get('lista'), [1, 'dois'])
+        self.assertIs(self.backend.get('sim'), True)
+
+        self.backend.set('expirada', 1, timeout=0)
+        self.assertIsNone(self.backend.get('expirada'))
+        self.assertEqual(self.backend.get('expirada', 'padrão'), 'padrão')
+        self.assertFalse(self.backend.has_key('expirada'))
+
+    def test_add_only_replaces_missing_or_expired_keys(self):
+        self.assertTrue(self.backend.add('lock', 'a'))
+        self.assertFalse(self.backend.add('lock', 'b'))
+        self.assertEqual(self.backend.get('lock'), 'a')
+
+        self.backend.set('lock', 'a', timeout=0)
+        self.assertTrue(self.backend.add('lock', 'c'))
+        self.assertEqual(self.backend.get('lock'), 'c')
+
+    def test_incr(self):
+        self.backend.set('versao', 1)
+        self.assertEqual(self.backend.incr('versao'), 2)
+        self.assertEqual(self.backend.incr('versao', 10), 12)
+        self.backend.set('decimal', 1.5)
+        self.assertEqual(self.backend.incr('decimal'), 2.5)
+        self.assertEqual(self.backend.get('decimal'), 2.5)
+        with self.assertRaises(ValueError):
+            self.backend.incr('ausente')
+        self.backend.set('expirada', 1, timeout=0)
+        with self.assertRaises(ValueError):
+            self.backend.incr('expirada')
+
+    def test_incr_is_atomic_across_processes(self):
+        self.backend.set('contador', 0)
+        context = multiprocessing.get_context('fork')
+        workers = [context.Process(target=_incr_many, args=(self.path, 200)) for _ in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join(30)
+            self.assertEqual(worker.exitcode, 0)
+        self.assertEqual(self.backend.get('contador'), 800)
+
+    def test_get_many_touch_delete_and_clear(self):
+        self.backend.set_many({'a': 1, 'b': 2})
+        self.backend.set('c', 3, timeout=0)
+        self.assertEqual(self.backend.get_many(['a', 'b', 'c', 'd']), {'a': 1, 'b': 2})
+
+        self.assertTrue(self.backend.touch('a', timeout=0))
+        self.assertFalse(self.backend.touch('c'))
+        self.assertIsNone(self.backend.get('a'))
+
+        self.assertTrue(self.backend.delete('b'))
+        self.assertFalse(self.backend.delete('b'))
+        self.backend.set('e', 5)
+        self.backend.clear()
+        self.assertEqual(self.backend.get_many(['b', 'e']), {})
+
+    def test_cull_evicts_least_recently_accessed(self):
+        backend = self.make_cache(MAX_ENTRIES=10, CULL_FREQUENCY=2, TOUCH_INTERVAL=0)
+        # Relógio só do backend: a expiração (BaseCache) segue o horário real
+        with mock.patch.object(sqlite_cache, 'time') as clock:
+            clock.time.side_effect = count(1000)
+            for n in range(10):
+                backend.set(f'chave{n}', n)
+            backend.get('chave0')
+            backend.set('chave10', 10)
+            kept = backend.get_many([f'chave{n}' for n in range(11)])
+        # Sobram 10 - 10 // 2 entradas: a lida por último e as mais novas
+        self.assertEqual(sorted(kept), ['chave0', 'chave10', 'chave7', 'chave8', 'chave9'])
+
+    def test_cull_removes_expired_entries_first(self):
+        backend = self.make_cache(MAX_ENTRIES=3)
+        backend.set('velha', 1, timeout=0)
+        for n in range(3):
+            backend.set(f'chave{n}', n)
+        self.assertEqual(len(backend.get_many([f'chave{n}' for n in range(3)])), 3)
+
+    def test_cull_by_bytes(self):
+        backend = self.make_cache(MAX_BYTES=10_000, CULL_FREQUENCY=2)
+        for n in range(4):
+            backend.set(f'chave{n}', 'x' * 3000)
+        # A 4ª passou de 10 KB: sobram entradas até 10_000 - 10_000 // 2 bytes
+        entries, size = backend._connection().execute(
+            'SELECT entries, bytes FROM cache_stats'
+        ).fetchone()
+        self.assertEqual(entries, 1)
+        self.assertLessEqual(size, 5000)
+        self.assertEqual(list(backend.get_many([f'chave{n}' for n in range(4)])), ['chave3'])
+
+
+@override_settings(SEARCH={'DEFAULT_LIMIT': 20, 'MAX_LIMIT': 50, 'MAX_PAGE': 100, 'COMMON_TERM_DOCS': 3})
+class SearchTests(BlogTestCase):
+    def test_title_matches_rank_first(self):
+        in_content = make_post(self.author, title='Outro assunto', content='Um texto sobre sqlite e índices')
+        in_title = make_post(self.author, title='Guia de sqlite', content='Um texto sobre índices')
+        found = search_post_ids('sqlite', 10)
+        self.assertEqual(found.ids, [in_title.pk, in_content.pk])
+        self.assertFalse(found.has_next)
+
+    def test_unpublished_posts_are_excluded(self):
+        make_post(self.author, content='rascunho secreto', published=False)
+        self.assertEqual(search_post_ids('secreto', 10).ids, [])
+
+    def test_common_terms_are_ignored_when_others_are_selective(self):
+        posts = [make_post(self.author, content=f'palavra frequente {n}') for n in range(4)]
+        rare = make_post(self.author, content='termo raríssimo')
+        found = search_post_ids('frequente raríssimo', 10)
+        self.assertEqual(found.ids, [rare.pk])
+        self.assertEqual(found.ignored_terms, ['frequente'])
+
+        # Só termos comuns: todos precisam aparecer, do mais recente ao mais antigo
+        found = search_post_ids('frequente palavra', 10)
+        self.assertEqual(found.ids, [post.pk for post in reversed(posts)])
+        self.assertEqual(found.ignored_terms, [])
+
+    def test_triggers_keep_the_index_in_sync(self):
+        with connection.cursor() as cursor:
+            for trigger in FTS_TRIGGERS:
+                cursor.execute(f'DROP TRIGGER {trigger}')
+        with self.assertLogs('blog.search', 'WARNING'):
+            ensure_fts_triggers(sender=None)
+
+        post = make_post(self.author, content='conteúdo inicial')
+        self.assertEqual(search_post_ids('inicial', 10).ids, [post.pk])
+        post.content = 'conteúdo revisado'
+        post.save()
+        self.assertEqual(search_post_ids('inicial', 10).ids, [])
+        self.assertEqual(search_post_ids('revisado', 10).ids, [post.pk])
+        post.delete()
+        self.assertEqual(search_post_ids('revisado', 10).ids, [])
+
+    def test_snippet_is_escaped_except_for_marks(self):
+        post = make_post(self.author, content='antes <script>alert(1)</script> perigoso & depois')
+        snippet = search_post_ids('perigoso', 10).snippets[post.pk]
+        self.assertIn('&lt;script&gt;', snippet)
+        self.assertNotIn('<script>', snippet)
+        self.assertIn('<mark>perigoso</mark>', snippet)
+        self.assertIn('&amp;', snippet)
+
+    def test_api_rejects_pages_past_the_limit(self):
+        make_post(self.author, content='django')
+        response = self.client.get('/api/search/', {'q': 'django', 'page': 10 ** 20})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'django', 'page': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/', {'q': 'django', 'page': 100}).status_code, 200)
+
+
+class ProfilingMiddlewareTests(SimpleTestCase):
+    factory = RequestFactory()
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.dir = directory.name
+
+    def middleware(self, get_response=None, **config):
+        config = {'SECRET': 's3nha', 'DIR': self.dir, 'INTERVAL': 0.0005, **config}
+        with self.settings(PROFILING=config):
+            return ProfilingMiddleware(get_response or (lambda request: HttpResponse('ok')))
+
+    def profiles(self):
+        return sorted(os.listdir(os.path.join(self.dir, 'requests')))
+
+    def test_disabled_without_secret(self):
+        with self.assertRaises(MiddlewareNotUsed):
+            self.middleware(SECRET=None)
+
+    def test_wrong_secret_is_not_profiled(self):
+        response = self.middleware()(self.factory.get('/', HTTP_X_PROFILE='errado'))
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(self.profiles(), [])
+
+    def test_right_secret_writes_profile(self):
+        for mode, suffix in (('sample', '.folded'), ('cprofile', '.prof')):
+            response = self.middleware(MODE=mode)(self.factory.get('/', HTTP_X_PROFILE='s3nha'))
+            self.assertTrue(response['X-Profile'].endswith(suffix))
+            self.assertIn(response['X-Profile'], self.profiles())
+        self.assertEqual(os.listdir(os.path.join(self.dir, 'views')), [f'unresolved.{os.getpid()}.folded'])
+
+    def test_sample_rate_selects_requests_without_header(self):
+        profiler = self.middleware(SAMPLE_RATE=0.1)
+        with mock.patch.object(middleware.random, 'random', side_effect=[0.5, 0.05]):
+            self.assertNotIn('X-Profile', profiler(self.factory.get('/')))
+            self.assertIn('X-Profile', profiler(self.factory.get('/')))
+        # Header errado não cai no sorteio
+        with mock.patch.object(middleware.random, 'random', return_value=0.0):
+            self.assertNotIn('X-Profile', profiler(self.factory.get('/', HTTP_X_PROFILE='errado')))
+
+    def test_old_profiles_are_rotated(self):
+        profiler = self.middleware(MAX_FILES=2)
+        names = [profiler(self.factory.get('/', HTTP_X_PROFILE='s3nha'))['X-Profile'] for _ in range(4)]
+        self.assertEqual(self.profiles(), names[-2:])
+
+    def test_async_requests_pass_through(self):
+        async def view(request):
+            return HttpResponse('ok')
+
+        profiler = self.middleware(view, SAMPLE_RATE=1.0)
+        response = asyncio.run(profiler(self.factory.get('/', HTTP_X_PROFILE='s3nha')))
+        self.assertEqual(response.content, b'ok')
+        self.assertNotIn('X-Profile', response)
+        self.assertEqual(self.profiles(), [])
+
+
+class ReplicaRoutingTests(SimpleTestCase):
+    factory = RequestFactory()
+    router = PrimaryReplicaRouter()
+
+    def pinning(self, view):
+        config = {'ENABLED': True, 'PIN_COOKIE': 'db_pin', 'PIN_SECONDS': 5}
+        with self.settings(REPLICA=config):
+            return ReplicaPinningMiddleware(view)
+
+    def test_reads_go_to_replica_until_a_write(self):
+        def view(request):
+            routes.append(self.router.db_for_read(Post))
+            routes.append(self.router.db_for_read(Job))
+            routes.append(self.router.db_for_write(Post))
+            routes.append(self.router.db_for_read(Post))
+            return HttpResponse()
+
+        routes = []
+        response = self.pinning(view)(self.factory.get('/'))
+        self.assertEqual(routes, ['replica', 'default', 'default', 'default'])
+        # Escrita colateral de um GET não fixa a sessão
+        self.assertNotIn('db_pin', response.cookies)
+
+    def test_unsafe_write_sets_pin_cookie_for_next_requests(self):
+        def view(request):
+            routes.append(self.router.db_for_read(Post))
+            if request.method == 'POST':
+                self.router.db_for_write(Post)
+            return HttpResponse()
+
+        routes = []
+        pinning = self.pinning(view)
+        response = pinning(self.factory.post('/'))
+        cookie = response.cookies['db_pin']
+        self.assertEqual(cookie['max-age'], 5)
+
+        self.factory.cookies['db_pin'] = cookie.value
+        self.addCleanup(self.factory.cookies.clear)
+        pinning(self.factory.get('/'))
+        self.assertEqual(routes, ['replica', 'default'])
+
+    def test_post_without_write_does_not_pin(self):
+        response = self.pinning(lambda request: HttpResponse())(self.factory.post('/'))
+        self.assertNotIn('db_pin', response.cookies)
+
+    def test_outside_a_request_uses_default(self):
+        self.assertEqual(self.router.db_for_read(Post), 'default')
+        self.assertEqual(self.router.db_for_write(Post), 'default')
+
+    def test_only_default_is_migrated(self):
+        self.assertTrue(self.router.allow_migrate('default', 'blog'))
+        self.assertFalse(self.router.allow_migrate(db_routing.REPLICA_ALIAS, 'blog'))
+
+    def test_middleware_is_off_unless_enabled(self):
+        with self.settings(REPLICA={'ENABLED': False}), self.assertRaises(MiddlewareNotUsed):
+            ReplicaPinningMiddleware(lambda request: HttpResponse())
+
+
+@skipUnless('replica' in settings.DATABASES, 'Réplica desligada: DB_REPLICA=1 python manage.py test blog')
+class ReplicaMirrorTests(TransactionTestCase):
+    """Com DB_REPLICA=1 o alias 'replica' espelha o banco de teste (TEST['MIRROR'])
+
+    O espelho é outra conexão: só enxerga o que foi commitado, por isso
+    TransactionTestCase em vez de TestCase.
+    """
+    databases = '__all__'
+
+    def setUp(self):
+        self.author = User.objects.create_user('autor', password='x')
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_requests_read_posts_from_the_replica(self):
+        post = make_post(self.author)
+        response = self.client.get(f'/post/{post.slug}/optimized/')
+        self.assertContains(response, post.title)
+        self.assertEqual(Post.objects.get(pk=post.pk).views_count, 1)
+
+    def test_queryset_routing_inside_a_request(self):
+        def view(request):
+            databases.append(Post.objects.all().db)
+            make_post(self.author)
+            databases.append(Post.objects.all().db)
+            return HttpResponse()
+
+        databases = []
+        ReplicaPinningMiddleware(view)(RequestFactory().get('/'))
+        self.assertEqual(databases, ['replica', 'default'])
+
+
+class SyncReplicaCommandTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.primary = os.path.join(directory.name, 'primario.sqlite3')
+        self.replica = os.path.join(directory.name, 'replica.sqlite3')
+        with sqlite3.connect(self.primary) as db:
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('CREATE TABLE item (nome TEXT)')
+            db.execute("INSERT INTO item VALUES ('primeiro')")
+        db.close()
+
+    def sync(self, engine='django.db.backends.sqlite3', replica=None):
+        fake_settings = SimpleNamespace(
+            DATABASES={'default': {'ENGINE': engine, 'NAME': self.primary}},
+            REPLICA={'PATH': replica or self.replica},
+        )
+        out = StringIO()
+        with mock.patch.object(sync_replica, 'settings', fake_settings):
+            call_command('sync_replica', stdout=out)
+        return out.getvalue()
+
+    def test_copies_the_primary(self):
+        self.assertIn('Réplica atualizada', self.sync())
+        replica = sqlite3.connect(self.replica)
+        self.addCleanup(replica.close)
+        self.assertEqual(replica.execute('SELECT nome FROM item').fetchall(), [('primeiro',)])
+        self.assertEqual(replica.execute('PRAGMA journal_mode').fetchone(), ('delete',))
+        self.assertEqual(os.listdir(os.path.dirname(self.replica)).count('replica.sqlite3'), 1)
+
+    def test_rejects_other_engines_and_the_primary_itself(self):
+        with self.assertRaises(CommandError):
+            self.sync(engine='django.db.backends.postgresql')
+        with self.assertRaises(CommandError):
+            self.sync(replica=self.primary)
+
+
+class PostCardCacheTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        self.post = make_post(self.author, self.django, title='Card')
+
+    def key(self, variant='list'):
+        post = Post.objects.get(pk=self.post.pk)
+        return card_cache_key(post, variant, card_versions(variant))
+
+    def cards(self, variant='list'):
+        posts = Post.objects.select_related('author', 'category').order_by('pk')
+        return render_post_cards(posts, variant)
+
+    def test_edits_and_renames_change_the_key(self):
+        keys = {self.key()}
+        self.post.title = 'Card editado'
+        self.post.save()
+        keys.add(self.key())
+        self.django.name = 'Django 5'
+        self.django.save()
+        keys.add(self.key())
+        self.author.username = 'autora'
+        self.author.save()
+        keys.add(self.key())
+        self.assertEqual(len(keys), 4)
+
+        [card] = self.cards()
+        self.assertIn('Card editado', card)
+        self.assertIn('Django 5', card)
+        self.assertIn('autora', card)
+
+    def test_category_rename_keeps_cards_without_category(self):
+        key = self.key('category')
+        self.django.name = 'Django 5'
+        self.django.save()
+        self.assertEqual(self.key('category'), key)
+
+    def test_views_count_stays_live_on_cached_cards(self):
+        self.cards()
+        self.assertIn(VIEWS_MARKER, cache.get(self.key()))
+        Post.objects.filter(pk=self.post.pk).update(views_count=42)
+        [card] = self.cards()
+        self.assertIn('Visualizações: 42', card)
+        self.assertNotIn(VIEWS_MARKER, card)
+        self.assertEqual(render_post_cards([Post.objects.get(pk=self.post.pk)], cached=False), [card])
+
+    def test_page_of_cards_does_one_get_many(self):
+        for _ in range(4):
+            make_post(self.author, self.django)
+        with mock.patch.object(cache, 'get_many', wraps=cache.get_many) as get_many:
+            cards = self.cards()
+        self.assertEqual(len(cards), 5)
+        # O outro get_many é o das versões (current_versions)
+        card_lookups = [
+            call.args[0] for call in get_many.call_args_list
+            if all(key.startswith('post_card:') for key in call.args[0])
+        ]
+        self.assertEqual([len(keys) for keys in card_lookups], [5])
+
+    def test_stats_endpoint_counts_hits_and_misses(self):
+        make_post(self.author, self.django)
+        before = self.client.get('/api/fragments/stats/').json()
+        self.client.get('/posts/optimized/')
+        self.client.get('/posts/optimized/')
+        after = self.client.get('/api/fragments/stats/').json()
+        self.assertEqual(after['misses'] - before['misses'], 2)
+        self.assertEqual(after['hits'] - before['hits'], 2)
+        self.assertIsNotNone(after['hit_rate'])
+
+
+ADMIN_CHANGELIST = {'COUNT_TIME_BUDGET': 0.2, 'ESTIMATE_SAMPLE': 10, 'CACHE_SECONDS': 60, 'FACETS_CACHE_SECONDS': 600}
+
+
+@override_settings(ADMIN_CHANGELIST=ADMIN_CHANGELIST)
+class AdminChangelistTests(BlogTestCase):
+    def create_posts(self, count, **fields):
+        start = next(_slugs)
+        for _ in range(count - 1):
+            next(_slugs)
+        Post.objects.bulk_create(
+            Post(author=self.author, category=self.django, title=f'Post {n}', slug=f'lote-{n}',
+                 content='x' * 50, **fields)
+            for n in range(start, start + count)
+        )
+
+    def test_exact_count_within_budget(self):
+        self.create_posts(30)
+        paginator = EstimatedCountPaginator(Post.objects.filter(published=True).order_by('pk'), 10)
+        self.assertEqual(paginator.count, 30)
+        self.assertFalse(paginator.estimated)
+
+    def test_time_budget_interrupts_slow_queries(self):
+        slow = (
+            'WITH RECURSIVE n(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM n WHERE x < 100000000) '
+            'SELECT count(*) FROM n'
+        )
+        with self.assertRaises(QueryTimeout), time_budget('default', 0.01), connection.cursor() as cursor:
+            cursor.execute(slow)
+        # O handler é removido ao sair do bloco
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+
+    def test_count_is_estimated_when_budget_trips(self):
+        self.create_posts(2000)
+        budget = {**ADMIN_CHANGELIST, 'COUNT_TIME_BUDGET': 1e-9}
+        with self.settings(ADMIN_CHANGELIST=budget):
+            paginator = EstimatedCountPaginator(
+                Post.objects.filter(content__contains='x').order_by('pk'), 10
+            )
+            count = paginator.count
+        self.assertTrue(paginator.estimated)
+        # O COUNT da tabela estourou; a janela de 10 posts coube no orçamento
+        self.assertEqual(count, 2000)
+
+    def test_estimate_extrapolates_the_newest_window(self):
+        self.create_posts(30)
+        newest = Post.objects.order_by('-pk')[:10].values_list('pk', flat=True)
+        Post.objects.filter(pk__in=list(newest[4:])).update(published=False)
+        # 4 dos 10 mais recentes publicados: 30 * 4 / 10
+        self.assertEqual(estimate_count(Post.objects.filter(published=True)), 12)
+
+    def test_indexed_dates_match_django_date_hierarchy(self):
+        self.create_posts(6)
+        moments = ['2023-12-31T23:30', '2024-01-01T02:00', '2024-01-15T12:00',
+                   '2024-03-01T01:00', '2024-03-01T05:00', '2025-07-04T00:00']
+        for pk, moment in zip(Post.objects.order_by('pk').values_list('pk', flat=True), moments):
+            Post.objects.filter(pk=pk).update(
+                created_at=datetime.fromisoformat(f'{moment}+00:00')
+            )
+
+        for tz in ('UTC', 'America/Sao_Paulo'):
+            with timezone.override(tz):
+                for kind, filters in (('year', {}), ('month', {'created_at__year': 2024}),
+                                      ('day', {'created_at__year': 2024, 'created_at__month': 3})):
+                    queryset = Post.objects.filter(**filters)
+                    cache.clear()
+                    with self.subTest(tz=tz, kind=kind):
+                        self.assertEqual(
+                            IndexedDates(queryset, 'created_at').datetimes('created_at', kind),
+                            list(queryset.datetimes('created_at', kind)),
+                        )
+
+    def test_admin_changelist_caches_facets(self):
+        User.objects.create_superuser('admin', password='x')
+        self.client.login(username='admin', password='x')
+        self.create_posts(5)
+        original = CachedBooleanFieldListFilter.get_facet_counts
+        with mock.patch.object(
+            CachedBooleanFieldListFilter, 'get_facet_counts', autospec=True, side_effect=original
+        ) as facet_counts:
+            first = self.client.get('/admin/blog/post/?_facets=1')
+            second = self.client.get('/admin/blog/post/?_facets=1')
+        self.assertEqual((first.status_code, second.status_code), (200, 200))
+        self.assertEqual(facet_counts.call_count, 1)
+        self.assertContains(second, 'Post')
+
+
+SERVER_TIMING_RE = re.compile(
+    r'db;dur=(?P<db>\d+\.\d{3});desc="(?P<queries>\d+) queries", '
+    r'tpl;dur=(?P<tpl>\d+\.\d{3}), app;dur=(?P<app>\d+\.\d{3}), total;dur=(?P<total>\d+\.\d{3})'
+)
+
+
+class ServerTimingTests(BlogTestCase):
+    def timings(self, response):
+        match = SERVER_TIMING_RE.fullmatch(response['Server-Timing'])
+        self.assertIsNotNone(match, response['Server-Timing'])
+        return {name: float(value) for name, value in match.groupdict().items()}
+
+    def test_header_format_and_query_count(self):
+        for _ in range(3):
+            make_post(self.author, self.django)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/posts/')
+        timings = self.timings(response)
+        self.assertEqual(timings['queries'], len(queries))
+        self.assertGreater(timings['tpl'], 0)
+        parts = timings['db'] + timings['tpl'] + timings['app']
+        self.assertAlmostEqual(parts, timings['total'], delta=0.01)
+
+    def test_queries_inside_templates_count_only_as_db(self):
+        def slow_query(execute, sql, params, many, context):
+            time.sleep(0.05)
+            return execute(sql, params, many, context)
+
+        def view(request):
+            template = engines['django'].from_string('{% for post in posts %}{{ post.title }}{% endfor %}')
+            with connection.execute_wrapper(slow_query):
+                return HttpResponse(template.render({'posts': Post.objects.all()}))
+
+        make_post(self.author)
+        response = ServerTimingMiddleware(view)(RequestFactory().get('/'))
+        timings = self.timings(response)
+        self.assertEqual(timings['queries'], 1)
+        self.assertGreaterEqual(timings['db'], 50)
+        self.assertLess(timings['tpl'], 50)
+        self.assertGreaterEqual(timings['total'], timings['db'] + timings['tpl'])
+
+    def test_async_views_are_timed(self):
+        async def view(request):
+            return HttpResponse('ok')
+
+        response = asyncio.run(ServerTimingMiddleware(view)(RequestFactory().get('/')))
+        self.assertEqual(self.timings(response)['queries'], 0)
+
+    def test_optional_jsonl_log(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, 'timing.jsonl')
+        with self.settings(SERVER_TIMING={'LOG_PATH': path, 'LOG_BUFFER': 1}):
+            response = self.client.get('/posts/optimized/')
+        with open(path) as log:
+            [record] = [json.loads(line) for line in log]
+        timings = self.timings(response)
+        self.assertEqual(record['view'], 'blog:post_list_optimized')
+        self.assertEqual((record['method'], record['path'], record['status']), ('GET', '/posts/optimized/', 200))
+        self.assertEqual(record['queries'], timings['queries'])
+        self.assertEqual(record['total_ms'], round(timings['total'], 3))
+
+
+class BufferedJSONLWriterTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'logs', 'registros.jsonl')
+
+    def lines(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path) as log:
+            return [json.loads(line) for line in log]
+
+    def test_writes_in_blocks(self):
+        writer = BufferedJSONLWriter(self.path, buffer_size=3, flush_interval=3600)
+        writer.write({'n': 1})
+        writer.write({'n': 2})
+        self.assertEqual(self.lines(), [])
+        writer.write({'n': 3, 'quando': datetime(2024, 1, 1)})
+        self.assertEqual([line['n'] for line in self.lines()], [1, 2, 3])
+        self.assertEqual(self.lines()[2]['quando'], '2024-01-01 00:00:00')
+
+    def test_flush_interval_and_explicit_flush(self):
+        writer = BufferedJSONLWriter(self.path, buffer_size=100, flush_interval=0)
+        writer.write({'n': 1})
+        self.assertEqual(len(self.lines()), 1)
+        writer.flush()
+        self.assertEqual(len(self.lines()), 1)
+
+
+class TrafficRecorderTests(BlogTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'requests.jsonl')
+        config = {
+            'ENABLED': True,
+            'PATH': self.path,
+            'BUFFER': 1,
+            'HEADERS': ['Accept-Language', 'If-None-Match'],
+            'EXCLUDE_PREFIXES': ['/static/'],
+        }
+        override = self.settings(TRAFFIC_RECORDER=config)
+        override.enable()
+        self.addCleanup(override.disable)
+
+    def records(self):
+        with open(self.path) as log:
+            return [json.loads(line) for line in log]
+
+    def test_records_requests_with_selected_headers(self):
+        make_post(self.author, self.django)
+        self.client.cookies['sessionid'] = 'segredo'
+        response = self.client.get(
+            '/posts/optimized/?page=1', HTTP_ACCEPT_LANGUAGE='pt-BR', HTTP_USER_AGENT='teste'
+        )
+        self.client.get('/static/admin/css/base.css')
+        self.client.get('/inexistente/')
+
+        first, missing = self.records()
+        self.assertEqual(first['method'], 'GET')
+        self.assertEqual((first['path'], first['query']), ('/posts/optimized/', 'page=1'))
+        self.assertEqual(first['headers'], {'Accept-Language': 'pt-BR'})
+        self.assertEqual(first['view'], 'blog:post_list_optimized')
+        self.assertEqual((first['status'], first['size']), (200, len(response.content)))
+        self.assertEqual((missing['status'], missing['view']), (404, None))
+
+    def test_streaming_responses_are_not_consumed(self):
+        make_post(self.author)
+        response = self.client.get('/api/posts/slugs/')
+        [record] = self.records()
+        self.assertIsNone(record['size'])
+        self.assertTrue(b''.join(response.streaming_content))
+
+    def test_disabled_by_default(self):
+        with self.settings(TRAFFIC_RECORDER={'ENABLED': False}), self.assertRaises(MiddlewareNotUsed):
+            TrafficRecorderMiddleware(lambda request: HttpResponse())
+
+
+class TrafficReplayTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'requests.jsonl')
+
+    def write(self, *records):
+        with open(self.path, 'w') as recording:
+            for record in records:
+                recording.write((record if isinstance(record, str) else json.dumps(record)) + '\n')
+
+    def test_conditional_headers_are_not_replayed(self):
+        record = {'headers': {'Accept-Language': 'pt-BR', 'If-None-Match': 'W/"x"',
+                              'If-Modified-Since': 'Mon, 01 Jan 2024 00:00:00 GMT'}}
+        self.assertEqual(replay_headers(record), {'Accept-Language': 'pt-BR'})
+        self.assertEqual(replay_headers({}), {})
+
+    def test_status_classes(self):
+        self.assertTrue(status_matches(200, 200))
+        self.assertTrue(status_matches(304, 200))
+        self.assertTrue(status_matches(None, 500))
+        self.assertFalse(status_matches(200, 304))
+        self.assertFalse(status_matches(200, 500))
+
+    def test_reads_records_in_order_and_skips_invalid(self):
+        self.write(
+            {'ts': 10.0, 'method': 'GET', 'path': '/a/'},
+            'não é json',
+            {'ts': 11.0, 'method': 'POST', 'path': '/b/'},
+            {'ts': 12.0, 'method': 'get', 'path': '/c/'},
+        )
+        replay = TrafficReplay(self.path, speed=0, loop=False)
+        self.addCleanup(replay.close)
+        self.assertIsNone(replay.next_request())  # Ainda não aberta
+        replay.open()
+        paths = []
+        while (item := replay.next_request()) is not None:
+            paths.append(item[0]['path'])
+        self.assertEqual(paths, ['/a/', '/c/'])
+        self.assertEqual(replay.skipped, 2)
+
+    def test_missing_file_fails_on_open(self):
+        replay = TrafficReplay(os.path.join(self.path, 'ausente.jsonl'))
+        with self.assertRaises(OSError):
+            replay.open()
+        self.assertIsNone(replay.next_request())
+
+
+class SQLiteProfileTests(SimpleTestCase):
+    # Conexões próprias num arquivo temporário, fora do banco de testes
+    databases = {'default'}
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, 'banco.sqlite3')
+        patcher = mock.patch.object(sqlite_profile, '_journal_checked', False)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def connect(self, profile='performance'):
+        """Conexão nova do alias 'default' com o arquivo temporário"""
+        with self.settings(DB_PROFILE=profile, SQLITE_PROFILE=settings.SQLITE_PROFILES[profile]):
+            wrapper = DatabaseWrapper({**connection.settings_dict, 'NAME': self.path}, alias='default')
+            wrapper.ensure_connection()
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def pragma(self, wrapper, name):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f'PRAGMA {name}')
+            return cursor.fetchone()[0]
+
+    def test_pragmas_are_applied_to_new_connections(self):
+        with self.assertLogs('blogproject.sqlite_profile', 'WARNING') as logs:
+            wrapper = self.connect()
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 1)  # NORMAL
+        self.assertEqual(self.pragma(wrapper, 'cache_size'), -64 * 1024)
+        self.assertEqual(self.pragma(wrapper, 'busy_timeout'), 5000)
+        self.assertEqual(self.pragma(wrapper, 'temp_store'), 2)  # MEMORY
+        self.assertEqual(self.pragma(wrapper, 'mmap_size'), 256 * 1024 * 1024)
+        # O arquivo novo está em DELETE, não no WAL do perfil
+        self.assertIn('sqlite_profile', logs.output[0])
+
+    def test_default_profile_keeps_sqlite_defaults(self):
+        wrapper = self.connect('default')
+        self.assertEqual(self.pragma(wrapper, 'synchronous'), 2)  # FULL
+        self.assertEqual(self.pragma(wrapper, 'journal_mode'), 'delete')
+
+    def run_command(self, wrapper, *args):
+        out = StringIO()
+        with mock.patch.object(sqlite_profile_command, 'connections', {'default': wrapper}):
+            call_command('sqlite_profile', *args, stdout=out)
+        return out.getvalue()
+
+    def test_command_writes_the_journal_mode(self):
+        wrapper = self.connect('default')
+        self.assertIn('journal_mode=wal', self.run_command(wrapper, '--journal-mode', 'WAL'))
+        other = sqlite3.connect(self.path)
+        self.addCleanup(other.close)
+        self.assertEqual(other.execute('PRAGMA journal_mode').fetchone(), ('wal',))
+
+        other.close()
+        with self.settings(DB_PROFILE='default', SQLITE_PROFILE=settings.SQLITE_PROFILES['default']):
+            self.assertIn('journal_mode=delete', self.run_command(wrapper))
+
+    def test_command_fails_when_the_mode_does_not_change(self):
+        wrapper = self.connect('default')
+        # O SQLite não sai do WAL com outra conexão aberta e retorna o modo atual
+        with mock.patch.object(sqlite_profile_command, 'set_journal_mode', return_value='wal'):
+            with self.assertRaisesMessage(CommandError, 'journal_mode=wal'):
+                self.run_command(wrapper, '--journal-mode', 'DELETE')
+
+    def test_unknown_profile_is_improperly_configured(self):
+        result = subprocess.run(
+            [sys.executable, '-c', 'import blogproject.settings'],
+            cwd=settings.BASE_DIR, env={**os.environ, 'DB_PROFILE': 'rapido'},
+            capture_output=True, text=True,
+        )
+        self.assertNotEqual(result.returncode, 0)
+        self.assertIn('ImproperlyConfigured', result.stderr)
+        self.assertIn('default, performance', result.stderr)
+
+
+class PopulateDbCommandTests(TestCase):
+    options = ['--posts', '30', '--users', '7', '--categories', '6', '--seed', '42', '--batch-size', '10']
+
+    def populate(self):
+        call_command('populate_db', *self.options, stdout=StringIO())
+        # created_at vem do relógio; o resto depende só da semente
+        return list(Post.objects.order_by('slug').values_list(
+            'slug', 'author__username', 'category__name', 'published', 'views_count', 'content',
+        ))
+
+    def test_creates_the_requested_rows(self):
+        self.populate()
+        self.assertEqual(Post.objects.count(), 30)
+        self.assertEqual(User.objects.count(), 8)  # autores + admin
+        self.assertEqual(Category.objects.count(), 6)
+        self.assertEqual(Post.objects.filter(slug__startswith='post-exemplo-').count(), 25)
+
+    def test_same_seed_produces_the_same_posts(self):
+        first = self.populate()
+        Post.objects.all().delete()
+        self.assertEqual(self.populate(), first)
+
+    def test_second_run_skips_existing_rows(self):
+        first = self.populate()
+        self.assertEqual(self.populate(), first)
+        self.assertEqual(User.objects.count(), 8)
+        self.assertEqual(Category.objects.count(), 6)
@@ -1,5 +1,5 @@
 from django.urls import path
-from . import views
+from . import async_views, views
 
 app_name = 'blog'
 
@@ -10,10 +10,25 @@ urlpatterns = [
     path('posts/optimized/', views.post_list_optimized, name='post_list_optimized'),
     path('post/<slug:slug>/', views.post_detail, name='post_detail'),
     path('post/<slug:slug>/optimized/', views.post_detail_optimized, name='post_detail_optimized'),
+    path('post/<slug:slug>/buffered/', views.post_detail_buffered, name='post_detail_buffered'),
     path('category/<int:category_id>/', views.category_posts, name='category_posts'),
+    path('category/<int:category_id>/cache-page/', views.category_posts_cache_page, name='category_posts_cache_page'),
     
     # API endpoints
     path('api/posts/', views.api_posts, name='api_posts'),
+    path('api/posts/unoptimized/', views.api_posts_unoptimized, name='api_posts_unoptimized'),
+    path('api/posts/slugs/', views.api_post_slugs, name='api_post_slugs'),
+    path('api/search/', views.api_search, name='api_search'),
     path('api/health/', views.health_check, name='health_check'),
+    path('api/fragments/stats/', views.fragment_cache_stats, name='fragment_cache_stats'),
     path('api/slow/', views.slow_endpoint, name='slow_endpoint'),
+    path('api/slow/blocking/', views.slow_endpoint_blocking, name='slow_endpoint_blocking'),
+    path('api/jobs/<int:job_id>/', views.job_status, name='job_status'),
+    
+    # Versões assíncronas (sirva via ASGI: uvicorn blogproject.asgi:application)
+    path('async/', async_views.home, name='async_home'),
+    path('async/posts/optimized/', async_views.post_list_optimized, name='async_post_list_optimized'),
+    path('async/post/<slug:slug>/optimized/', async_views.post_detail_optimized, name='async_post_detail_optimized'),
+    path('async/api/posts/', async_views.api_posts, name='async_api_posts'),
+    path('async/api/slow/', async_views.slow_endpoint, name='async_slow_endpoint'),
 ]
@@ -0,0 +1,136 @@
+"""
+Contador de visualizações com escrita adiada (write-behind)
+
+Em vez de um UPDATE por page view, os incrementos são acumulados em memória
+e gravados em lote: um único UPDATE por flush, disparado por intervalo de
+tempo ou por quantidade de incrementos pendentes.
+
+Cada processo (worker do gunicorn/uwsgi, runserver...) mantém o seu próprio
+buffer. Como o flush soma deltas (views_count = views_count + N), vários
+processos podem gravar em paralelo sem perder incrementos.
+"""
+
+import atexit
+import logging
+import os
+import threading
+import time
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections, transaction
+from django.db.models import Case, F, PositiveIntegerField, When
+
+logger = logging.getLogger(__name__)
+
+
+class BufferedViewCounter:
+    """Acumula incrementos de views_count e grava em lote"""
+
+    def __init__(self, flush_interval=5.0, flush_threshold=500):
+        self.flush_interval = flush_interval
+        self.flush_threshold = flush_threshold
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self._pending = Counter()
+        self._pending_total = 0
+        self._last_flush = time.monotonic()
+        self._timer = None
+        self._pid = os.getpid()
+
+    def _check_fork(self):
+        # Após um fork (ex.: gunicorn --preload) o buffer e a thread do
+        # processo pai não pertencem a este worker
+        if self._pid != os.getpid():
+            self._lock = threading.Lock()
+            self._reset()
+
+    def _ensure_timer(self):
+        if self._timer is None and self.flush_interval:
+            self._timer = threading.Thread(
+                target=self._run_timer, name='view-counter-flush', daemon=True
+            )
+            self._timer.start()
+
+    def _run_timer(self):
+        while True:
+            time.sleep(self.flush_interval)
+            if self._pid != os.getpid():
+                return
+            try:
+                self.flush()
+            finally:
+                close_old_connections()
+
+    def increment(self, post_id, amount=1):
+        """Registra uma visualização; grava no banco apenas quando necessário"""
+        self._check_fork()
+        with self._lock:
+            self._pending[post_id] += amount
+            self._pending_total += amount
+            self._ensure_timer()
+            due = (
+                self._pending_total >= self.flush_threshold
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def pending(self, post_id=None):
+        """Incrementos ainda não gravados (de um post ou no total)"""
+        with self._lock:
+            if post_id is None:
+                return self._pending_total
+            return self._pending.get(post_id, 0)
+
+    def flush(self):
+        """Grava os incrementos pendentes com um único UPDATE"""
+        from .models import Post
+
+        with self._lock:
+            pending = self._pending
+            self._pending = Counter()
+            self._pending_total = 0
+            self._last_flush = time.monotonic()
+
+        if not pending:
+            return 0
+
+        # Agrupa posts com o mesmo delta para reduzir o tamanho do CASE
+        by_delta = defaultdict(list)
+        for post_id, delta in pending.items():
+            by_delta[delta].append(post_id)
+
+        whens = [
+            When(id__in=post_ids, then=F('views_count') + delta)
+            for delta, post_ids in by_delta.items()
+        ]
+        try:
+            with transaction.atomic():
+                Post.objects.filter(id__in=list(pending)).update(
+                    views_count=Case(
+                        *whens,
+                        default=F('views_count'),
+                        output_field=PositiveIntegerField(),
+                    )
+                )
+        except DatabaseError:
+            # Devolve os incrementos ao buffer para a próxima tentativa
+            logger.exception('Falha ao gravar contadores de visualização')
+            with self._lock:
+                self._pending.update(pending)
+                self._pending_total += sum(pending.values())
+            return 0
+
+        return sum(pending.values())
+
+
+view_counter = BufferedViewCounter(
+    flush_interval=getattr(settings, 'VIEW_COUNTER_FLUSH_INTERVAL', 5),
+    flush_threshold=getattr(settings, 'VIEW_COUNTER_FLUSH_THRESHOLD', 500),
+)
+
+# Garante que nenhum incremento se perca quando o processo termina
+atexit.register(view_counter.flush)
@@ -1,25 +1,44 @@
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
-from django.core.paginator import Paginator
+from django.urls import reverse
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.db.models import F, Count
 from django.views.decorators.cache import cache_page
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
 from django.views.generic import ListView
-from .models import Post, Category
+from .fragments import stats as fragment_stats
+from .jobs import queue as job_queue
+from . import related
+from .conditional import (
+    api_posts_validators, category_posts_validators, conditional_page,
+    count_post_view, post_detail_validators,
+)
+from .models import Job, Post, Category
+from .page_cache import category_page_cache
+from .pagination import KeysetPaginator, paginate_posts
+from .search import search_post_ids
+from .serializers import PostRowSerializer, parse_api_params
+from .view_counter import view_counter
+import inspect
 import time
 import random
 
 
 def home(request):
     """View simples para homepage"""
-    recent_posts = Post.objects.filter(published=True)[:5]
+    # Os cards usam o trecho gravado (excerpt): a coluna content não é lida
+    recent_posts = Post.objects.filter(published=True)\
+                              .select_related('author', 'category')\
+                              .defer('content')[:5]
+    # published_post_count é desnormalizado: nenhuma COUNT por categoria
     categories = Category.objects.all()
     
     context = {
         'recent_posts': recent_posts,
         'categories': categories,
-        'page_title': 'Blog Home'
+        'page_title': 'Blog Home',
+        'cache_post_cards': True,
     }
     return render(request, 'blog/home.html', context)
 
@@ -28,14 +47,13 @@ def post_list(request):
     """View com paginação - versão SEM otimização"""
     # Problema N+1 Queries
     # Para 10 posts, isso pode gerar 11 queries (1 para posts + 10 para autores)
-    posts = Post.objects.filter(published=True).order_by('-created_at')
+    posts = Post.objects.filter(published=True).defer('content').order_by('-created_at')
     
     # Adiciona um delay artificial para simular processamento
     time.sleep(0.1)
     
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # ?page=N (Paginator) ou ?cursor=... (keyset, sem COUNT/OFFSET)
+    page_obj = paginate_posts(request, posts, 10)
     
     context = {
         'page_obj': page_obj,
@@ -51,15 +69,17 @@ def post_list_optimized(request):
     # Para 10 posts, isso gera apenas 2 queries (1 para posts + 1 para autores e categorias)
     posts = Post.objects.filter(published=True)\
                        .select_related('author', 'category')\
+                       .defer('content')\
                        .order_by('-created_at')
     
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # ?page=N (Paginator) ou ?cursor=... (keyset, sem COUNT/OFFSET)
+    page_obj = paginate_posts(request, posts, 10)
     
     context = {
         'page_obj': page_obj,
-        'page_title': 'Todos os Posts (Otimizado)'
+        'page_title': 'Todos os Posts (Otimizado)',
+        # Cards renderizados uma vez e reaproveitados do cache (blog/fragments.py)
+        'cache_post_cards': True,
     }
     return render(request, 'blog/post_list.html', context)
 
@@ -85,6 +105,7 @@ def post_detail(request, slug):
     return render(request, 'blog/post_detail.html', context)
 
 
+@conditional_page(post_detail_validators, on_not_modified=count_post_view)
 def post_detail_optimized(request, slug):
     """View de detalhes do post - versão OTIMIZADA"""
     post = get_object_or_404(
@@ -96,49 +117,154 @@ def post_detail_optimized(request, slug):
     # Incrementa views de forma eficiente (usando F)
     Post.objects.filter(id=post.id).update(views_count=F('views_count') + 1)
     
-    # Busca posts relacionados de forma eficiente
-    related_posts = Post.objects.filter(
-        category=post.category, 
+    context = {
+        'post': post,
+        # Pré-calculados por categoria (blog/related.py): cache ou uma consulta por chave
+        'related_posts': related.related_posts(post),
+        'page_title': post.title
+    }
+    return render(request, 'blog/post_detail.html', context)
+
+
+def post_detail_buffered(request, slug):
+    """View de detalhes do post - contador de views com escrita adiada"""
+    post = get_object_or_404(
+        Post.objects.select_related('author', 'category'), 
+        slug=slug, 
         published=True
-    ).exclude(id=post.id).select_related('author')[:3]
+    )
+    
+    # Nenhuma escrita por request: o incremento fica em memória e é gravado
+    # em lote pelo view_counter (um UPDATE a cada intervalo/limite)
+    view_counter.increment(post.id)
     
     context = {
         'post': post,
-        'related_posts': related_posts,
+        'related_posts': related.related_posts(post),
         'page_title': post.title
     }
     return render(request, 'blog/post_detail.html', context)
 
 
-@cache_page(60 * 5)  # Cache por 5 minutos
+@conditional_page(category_posts_validators)  # 304 antes até do cache de página
+@category_page_cache  # Invalidado por eventos, com proteção contra stampede
 def category_posts(request, category_id):
     """View de posts por categoria"""
     category = get_object_or_404(Category, id=category_id)
     posts = Post.objects.filter(
         category=category, 
         published=True
-    ).select_related('author').order_by('-created_at')
+    ).select_related('author').defer('content').order_by('-created_at')
     
-    paginator = Paginator(posts, 10)
-    page_number = request.GET.get('page')
-    page_obj = paginator.get_page(page_number)
+    # ?page=N (Paginator) ou ?cursor=... (keyset, sem COUNT/OFFSET)
+    page_obj = paginate_posts(request, posts, 10)
     
     context = {
         'category': category,
         'page_obj': page_obj,
-        'page_title': f'Posts em {category.name}'
+        'page_title': f'Posts em {category.name}',
+        'cache_post_cards': True,
     }
     return render(request, 'blog/category_posts.html', context)
 
 
+@cache_page(settings.CATEGORY_PAGE_CACHE['TIMEOUT'])
+def category_posts_cache_page(request, category_id):
+    """View de posts por categoria com @cache_page cego (para comparação)
+
+    Posts novos ou editados ficam invisíveis até a entrada expirar, e na
+    expiração todos os requests simultâneos regeneram a página ao mesmo tempo.
+    """
+    return inspect.unwrap(category_posts)(request, category_id)
+
+
+@conditional_page(api_posts_validators)
 def api_posts(request):
-    """API simples para retornar posts em JSON"""
+    """API de posts em JSON - versão OTIMIZADA (values_list + fragmentos em cache)
+
+    Parâmetros: ?cursor= (paginação), ?limit= (padrão 20) e
+    ?fields=id,title,... (projeção dos campos retornados)
+    """
+    try:
+        fields, limit = parse_api_params(request.GET)
+    except ValueError as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    
+    # Apenas as colunas necessárias, como tuplas: sem instanciar modelos
+    # e sem carregar o campo content
+    serializer = PostRowSerializer(fields)
+    rows = serializer.queryset(Post.objects.filter(published=True))
+    page = KeysetPaginator(rows, limit, key=serializer.key).get_page(request.GET.get('cursor'))
+    
+    body = serializer.render(page, next=page.next_cursor, previous=page.previous_cursor)
+    return HttpResponse(body, content_type='application/json')
+
+
+@require_http_methods(["GET"])
+def api_search(request):
+    """Busca textual ranqueada (índice FTS5): ?q=termos&page=N&limit=20
+
+    A ordem é por relevância (bm25, título com peso maior); `snippet` traz o
+    trecho do conteúdo escapado como HTML, com os termos marcados por <mark>.
+
+    Termos muito comuns (SEARCH['COMMON_TERM_DOCS']) são ignorados quando a
+    busca tem outros mais seletivos: aí nem todo resultado contém todas as
+    palavras. Eles voltam em `ignored_terms`; se todos os termos são comuns,
+    todos precisam aparecer e `ignored_terms` fica vazio.
+    """
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'Informe o parâmetro q'}, status=400)
+    max_page = settings.SEARCH['MAX_PAGE']
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+        limit = int(request.GET.get('limit', settings.SEARCH['DEFAULT_LIMIT']))
+        if page > max_page:
+            raise ValueError
+    except ValueError:
+        return JsonResponse(
+            {'error': f'page e limit devem ser inteiros (page até {max_page})'}, status=400
+        )
+    limit = max(1, min(limit, settings.SEARCH['MAX_LIMIT']))
+    
+    found = search_post_ids(query, limit, offset=(page - 1) * limit)
+    rows = Post.objects.filter(id__in=found.ids).values_list(
+        'id', 'title', 'slug', 'author__username', 'category__name', 'created_at'
+    )
+    by_id = {row[0]: row for row in rows}
+    
+    results = []
+    for post_id in found.ids:
+        if post_id not in by_id:
+            continue
+        _, title, slug, author, category, created_at = by_id[post_id]
+        results.append({
+            'id': post_id,
+            'title': title,
+            'slug': slug,
+            'author': author,
+            'category': category,
+            'created_at': created_at.isoformat(),
+            'snippet': found.snippets.get(post_id),
+        })
+    
+    return JsonResponse({
+        'query': query,
+        'ignored_terms': found.ignored_terms,
+        'results': results,
+        'page': page,
+        'next_page': page + 1 if found.has_next else None,
+    })
+
+
+def api_posts_unoptimized(request):
+    """API de posts em JSON - versão SEM otimização (instâncias completas)"""
     posts = Post.objects.filter(published=True)\
-                       .select_related('author', 'category')\
-                       .order_by('-created_at')[:20]
+                       .select_related('author', 'category')
+    page = KeysetPaginator(posts, 20).get_page(request.GET.get('cursor'))
     
     data = []
-    for post in posts:
+    for post in page:
         data.append({
             'id': post.id,
             'title': post.title,
@@ -149,11 +275,33 @@ def api_posts(request):
             'views_count': post.views_count
         })
     
-    return JsonResponse({'posts': data})
+    return JsonResponse({
+        'posts': data,
+        'next': page.next_cursor,
+        'previous': page.previous_cursor,
+    })
 
 
 def slow_endpoint(request):
-    """Endpoint intencionalmente lento para demonstrar problemas de performance"""
+    """Endpoint lento - o trabalho pesado vai para o pool de jobs (blog/jobs.py)
+
+    Responde 202 na hora com o id do job; o resultado sai em /api/jobs/<id>/.
+    Requests simultâneos reaproveitam o job que já está em andamento.
+    """
+    job, created = job_queue.enqueue('slow_report')
+    status_url = reverse('blog:job_status', args=[job.pk])
+    response = JsonResponse({
+        'job_id': job.pk,
+        'status': job.status,
+        'deduplicated': not created,
+        'status_url': status_url,
+    }, status=202)
+    response['Location'] = status_url
+    return response
+
+
+def slow_endpoint_blocking(request):
+    """Endpoint lento - versão SEM otimização (trabalho dentro do request)"""
     # Simula processamento pesado
     time.sleep(random.uniform(1, 3))
     
@@ -172,6 +320,33 @@ def slow_endpoint(request):
     })
 
 
+@require_http_methods(["GET"])
+def job_status(request, job_id):
+    """Status e resultado de um job em segundo plano"""
+    job = get_object_or_404(Job, pk=job_id)
+    return JsonResponse(job.as_dict())
+
+
+@require_http_methods(["GET"])
+def api_post_slugs(request):
+    """Catálogo de slugs publicados, um por linha (usado pelos testes de carga)
+
+    A resposta é gerada em streaming com iterator(): a memória do servidor
+    não cresce com o número de posts. ?limit= restringe o tamanho.
+    """
+    slugs = Post.objects.filter(published=True).order_by('id').values_list('slug', flat=True)
+    if request.GET.get('limit', '').isdigit():
+        slugs = slugs[:int(request.GET['limit'])]
+    lines = (f"{slug}\n" for slug in slugs.iterator(chunk_size=5000))
+    return StreamingHttpResponse(lines, content_type='text/plain; charset=utf-8')
+
+
+@require_http_methods(["GET"])
+def fragment_cache_stats(request):
+    """Hits/misses do cache de cards de post neste processo"""
+    return JsonResponse(fragment_stats.as_dict())
+
+
 @require_http_methods(["GET"])
 def health_check(request):
     """Endpoint simples para health check"""
@@ -0,0 +1,109 @@
+"""
+Roteamento leitura/escrita entre o banco primário e uma réplica
+
+Com DB_REPLICA=1, as leituras de Post e Category feitas durante um request
+vão para o alias 'replica' (localmente, uma cópia do SQLite atualizada por
+`python manage.py sync_replica`), e todas as escritas vão para 'default'.
+As escritas do contador de views deixam de disputar o lock do arquivo com as
+leituras das listas e da API.
+
+Read-your-writes:
+- no mesmo request: a primeira escrita fixa o request no primário, então as
+  leituras seguintes já enxergam o que foi gravado;
+- na mesma sessão: um request não seguro (POST, PUT...) que escreveu devolve
+  o cookie REPLICA['PIN_COOKIE'], e os requests seguintes desse cliente leem
+  do primário por REPLICA['PIN_SECONDS'] (mais que o atraso da réplica).
+  Escritas colaterais de GET (contador de views) não fixam a sessão.
+
+Fora de um request (comandos, jobs, shell) tudo usa o primário.
+"""
+
+import contextvars
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+REPLICA_ALIAS = 'replica'
+
+# Modelos servidos pela réplica; os demais (sessões, auth, jobs) precisam
+# sempre do dado mais recente
+REPLICA_MODELS = {'blog.post', 'blog.category'}
+
+_state = contextvars.ContextVar('db_routing', default=None)
+
+
+class RoutingState:
+    """Estado do request atual; mutável para valer também nas threads do ORM async"""
+    __slots__ = ('pinned', 'wrote')
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.wrote = False
+
+
+class PrimaryReplicaRouter:
+    """Leituras de REPLICA_MODELS na réplica, escritas sempre no primário"""
+
+    def db_for_read(self, model, **hints):
+        state = _state.get()
+        if state is None or state.pinned:
+            return 'default'
+        if model._meta.label_lower in REPLICA_MODELS:
+            return REPLICA_ALIAS
+        return 'default'
+
+    def db_for_write(self, model, **hints):
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # A réplica é uma cópia do primário: os objetos podem se relacionar
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # O schema chega à réplica junto com os dados (sync_replica)
+        return db == 'default'
+
+
+class ReplicaPinningMiddleware:
+    """Cria o estado de roteamento do request e aplica/renova o cookie de fixação"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'REPLICA', {})
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.cookie = config.get('PIN_COOKIE', 'db_pin')
+        self.pin_seconds = config.get('PIN_SECONDS', 5)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = RoutingState(pinned=self.cookie in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response, state)
+
+    async def __acall__(self, request):
+        state = RoutingState(pinned=self.cookie in request.COOKIES)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        return self._finish(request, response, state)
+
+    def _finish(self, request, response, state):
+        if state.wrote and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+            response.set_cookie(self.cookie, '1', max_age=self.pin_seconds, httponly=True, samesite='Lax')
+        return response
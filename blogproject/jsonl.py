@@ -0,0 +1,53 @@
+"""
+Escrita bufferizada de registros JSONL (um objeto JSON por linha)
+
+Usado pelos middlewares de instrumentação: os registros ficam em memória e
+são gravados em blocos, para que o log não vire um write() por request.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+
+class BufferedJSONLWriter:
+    """Acumula registros e grava no arquivo a cada `buffer_size` ou `flush_interval`"""
+
+    def __init__(self, path, buffer_size=100, flush_interval=5.0):
+        self.path = Path(path)
+        self.buffer_size = buffer_size
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        atexit.register(self.flush)
+
+    def write(self, record):
+        line = json.dumps(record, separators=(',', ':'), default=str)
+        with self._lock:
+            self._buffer.append(line)
+            due = (
+                len(self._buffer) >= self.buffer_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines, self._buffer = self._buffer, []
+            self._last_flush = time.monotonic()
+            if not lines:
+                return
+            # Um único write com O_APPEND: vários processos podem gravar no
+            # mesmo arquivo sem intercalar linhas pela metade
+            data = ('\n'.join(lines) + '\n').encode()
+            fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+            try:
+                os.write(fd, data)
+            finally:
+                os.close(fd)
@@ -0,0 +1,308 @@
+"""
+Middlewares de instrumentação do projeto
+
+ServerTimingMiddleware mede, para cada request, quanto tempo foi gasto no
+banco (número de queries e duração, via execute_wrappers da conexão), na
+renderização de templates e no restante do código Python, e devolve os
+valores no header Server-Timing:
+
+    Server-Timing: db;dur=4.210;desc="7 queries", tpl;dur=3.502, app;dur=1.130, total;dur=8.842
+
+O tempo de templates desconta as queries disparadas durante a renderização
+(ex.: N+1 em post.author), então db + tpl + app = total.
+
+Os dois middlewares aceitam views síncronas e assíncronas: sob ASGI um
+middleware só-síncrono obrigaria o Django a rodar as views async em threads.
+
+TrafficRecorderMiddleware grava cada request recebido em JSONL (método,
+caminho, query string, headers selecionados, status, tamanho da resposta e
+instante de chegada), no formato reproduzido por locustfile_replay.py.
+
+ProfilingMiddleware perfila requests escolhidos pelo header X-Profile (com o
+segredo de settings.PROFILING) ou por sorteio (SAMPLE_RATE), com os profilers
+de blogproject/profiling.py. Sem segredo configurado fica desligado.
+"""
+
+import contextvars
+import cProfile
+import hmac
+import random
+import threading
+import time
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+
+from .jsonl import BufferedJSONLWriter
+from .profiling import ProfileStore, StackSampler, format_folded
+
+_current = contextvars.ContextVar('server_timing', default=None)
+
+
+class RequestTimings:
+    __slots__ = ('queries', 'db', 'template', 'template_depth')
+
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.template = 0.0
+        self.template_depth = 0
+
+
+def _db_wrapper(execute, sql, params, many, context):
+    timings = _current.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.db += time.perf_counter() - started
+        timings.queries += 1
+
+
+def _install_db_timer(connection, **kwargs):
+    """Registra _db_wrapper uma única vez em cada conexão
+
+    As conexões são por thread e, sob ASGI, o ORM roda em threads diferentes
+    da do middleware; por isso o wrapper fica na conexão (inerte fora de um
+    request medido) em vez de ser instalado a cada request.
+    """
+    if _db_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_db_wrapper)
+
+
+def _install_template_timer():
+    """Envolve Template.render do backend Django uma única vez"""
+    from django.template.backends.django import Template
+
+    if getattr(Template.render, '_server_timing', False):
+        return
+    original = Template.render
+
+    @wraps(original)
+    def render(self, context=None, request=None):
+        timings = _current.get()
+        # Renderizações aninhadas (ex.: cards em cache) já estão no tempo da externa
+        if timings is None or timings.template_depth:
+            return original(self, context, request)
+        timings.template_depth += 1
+        db_before = timings.db
+        started = time.perf_counter()
+        try:
+            return original(self, context, request)
+        finally:
+            timings.template_depth -= 1
+            elapsed = time.perf_counter() - started
+            timings.template += elapsed - (timings.db - db_before)
+
+    render._server_timing = True
+    Template.render = render
+
+
+class ServerTimingMiddleware:
+    """Adiciona o header Server-Timing (e opcionalmente um log JSONL) a cada resposta"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = getattr(settings, 'SERVER_TIMING', {})
+        log_path = config.get('LOG_PATH')
+        self.log = BufferedJSONLWriter(log_path, config.get('LOG_BUFFER', 100)) if log_path else None
+        _install_template_timer()
+        connection_created.connect(_install_db_timer, dispatch_uid='server_timing_db_timer')
+        for connection in connections.all(initialized_only=True):
+            _install_db_timer(connection)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = _current.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self._finish(request, response, timings, time.perf_counter() - started)
+
+    def _finish(self, request, response, timings, total):
+        app = max(total - timings.db - timings.template, 0.0)
+        response['Server-Timing'] = (
+            f'db;dur={timings.db * 1000:.3f};desc="{timings.queries} queries", '
+            f'tpl;dur={timings.template * 1000:.3f}, '
+            f'app;dur={app * 1000:.3f}, '
+            f'total;dur={total * 1000:.3f}'
+        )
+
+        if self.log is not None:
+            match = request.resolver_match
+            self.log.write({
+                'ts': time.time(),
+                'method': request.method,
+                'path': request.path,
+                'view': match.view_name if match else None,
+                'status': response.status_code,
+                'queries': timings.queries,
+                'db_ms': round(timings.db * 1000, 3),
+                'tpl_ms': round(timings.template * 1000, 3),
+                'app_ms': round(app * 1000, 3),
+                'total_ms': round(total * 1000, 3),
+            })
+        return response
+
+
+class TrafficRecorderMiddleware:
+    """Grava o tráfego recebido para ser reproduzido depois no Locust"""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'TRAFFIC_RECORDER', {})
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.log = BufferedJSONLWriter(config['PATH'], config.get('BUFFER', 200))
+        self.headers = config.get('HEADERS', ())
+        self.exclude = tuple(config.get('EXCLUDE_PREFIXES', ()))
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        arrived = time.time()
+        return self._record(request, self.get_response(request), arrived)
+
+    async def __acall__(self, request):
+        arrived = time.time()
+        return self._record(request, await self.get_response(request), arrived)
+
+    def _record(self, request, response, arrived):
+        if request.path.startswith(self.exclude):
+            return response
+
+        if response.has_header('Content-Length'):
+            size = int(response['Content-Length'])
+        elif getattr(response, 'streaming', False):
+            size = None  # Não consome o stream só para medir
+        else:
+            size = len(response.content)
+
+        match = request.resolver_match
+        self.log.write({
+            'ts': round(arrived, 6),
+            'method': request.method,
+            'path': request.path,
+            'query': request.META.get('QUERY_STRING', ''),
+            'headers': {name: request.headers[name] for name in self.headers if name in request.headers},
+            'view': match.view_name if match else None,
+            'status': response.status_code,
+            'size': size,
+        })
+        return response
+
+
+class ProfilingMiddleware:
+    """Perfila requests marcados (header com o segredo) ou sorteados
+
+    Cada request perfilado grava um arquivo em <DIR>/requests/ (pilhas
+    folded ou .prof, conforme MODE) e responde com o nome dele no header
+    X-Profile. No modo 'sample', as pilhas também são somadas por view em
+    <DIR>/views/<view>.<pid>.folded, prontas para um flamegraph.
+
+    Só perfila requests síncronos (WSGI). Sob ASGI, a thread do event loop
+    intercala outros requests, e o perfil não seria deste request.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'PROFILING', {})
+        self.secret = config.get('SECRET')
+        if not self.secret:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.header = config.get('HEADER', 'X-Profile')
+        self.sample_rate = config.get('SAMPLE_RATE', 0.0)
+        self.mode = config.get('MODE', 'sample')
+        if self.mode not in ('sample', 'cprofile'):
+            raise ValueError(f"PROFILING['MODE'] deve ser 'sample' ou 'cprofile', não {self.mode!r}")
+        self.interval = config.get('INTERVAL', 0.001)
+        self.store = ProfileStore(config['DIR'], config.get('MAX_FILES', 500))
+        # Um cProfile por vez: a partir do Python 3.12 só um pode estar ativo
+        self._cprofile_lock = threading.Lock()
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not self._selected(request):
+            return self.get_response(request)
+        if self.mode == 'cprofile':
+            return self._cprofile(request)
+        return self._sample(request)
+
+    async def __acall__(self, request):
+        return await self.get_response(request)
+
+    def _selected(self, request):
+        value = request.headers.get(self.header)
+        if value is not None:
+            return hmac.compare_digest(value.encode(), self.secret.encode())
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _view_name(self, request):
+        match = request.resolver_match
+        return match.view_name if match else None
+
+    def _sample(self, request):
+        sampler = StackSampler(threading.get_ident(), self.interval, root_code=self._sample.__code__)
+        sampler.start()
+        try:
+            response = self.get_response(request)
+        finally:
+            sampler.stop()
+        view_name = self._view_name(request)
+        path = self.store.request_path(view_name, '.folded')
+        self.store.save_request(path, format_folded(sampler.stacks))
+        self.store.add_view_stacks(view_name, sampler.stacks)
+        response[self.header] = path.name
+        return response
+
+    def _cprofile(self, request):
+        if not self._cprofile_lock.acquire(blocking=False):
+            # Outro request da mesma instância já está sendo perfilado
+            return self.get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            self._cprofile_lock.release()
+        path = self.store.request_path(self._view_name(request), '.prof')
+        profiler.dump_stats(path)
+        self.store.rotate()
+        response[self.header] = path.name
+        return response
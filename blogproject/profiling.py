@@ -0,0 +1,125 @@
+"""
+Profilers usados pelo ProfilingMiddleware (blogproject/middleware.py)
+
+- StackSampler: uma thread auxiliar lê a pilha da thread do request a cada
+  INTERVAL segundos (sys._current_frames) e conta as pilhas no formato
+  "folded" (raiz;...;folha N), lido por flamegraph.pl, inferno e speedscope.
+  Custo baixo e independente do número de chamadas. Com código só de CPU, o
+  GIL limita a frequência real a uma amostra a cada ~5ms
+  (sys.getswitchinterval); esperas de I/O e sleep são amostradas normalmente.
+- cProfile: tempo exato de cada função, com overhead por chamada (.prof para
+  pstats/snakeviz).
+
+ProfileStore grava os perfis de cada request num diretório com rotação (os
+MAX_FILES mais recentes) e mantém, por view, as pilhas somadas de todos os
+requests amostrados do processo.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+
+from django.conf import settings
+
+
+def _short_path(filename):
+    """Caminho relativo ao projeto ou ao site-packages, para rótulos curtos"""
+    base = str(settings.BASE_DIR) + os.sep
+    if filename.startswith(base):
+        return filename[len(base):]
+    _, marker, rest = filename.rpartition(f'site-packages{os.sep}')
+    return rest if marker else os.path.basename(filename)
+
+
+class StackSampler:
+    """Amostra a pilha de uma thread, da folha até `root_code` (exclusive)"""
+
+    def __init__(self, thread_id, interval, root_code=None):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.root_code = root_code
+        self.stacks = Counter()
+        self._labels = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='profiling-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.stacks[self._fold(frame)] += 1
+
+    def _label(self, code):
+        label = self._labels.get(code)
+        if label is None:
+            label = f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+            self._labels[code] = label
+        return label
+
+    def _fold(self, frame):
+        labels = []
+        while frame is not None and frame.f_code is not self.root_code:
+            labels.append(self._label(frame.f_code))
+            frame = frame.f_back
+        return ';'.join(reversed(labels))
+
+
+def format_folded(stacks):
+    return ''.join(f"{stack} {count}\n" for stack, count in sorted(stacks.items()) if stack)
+
+
+class ProfileStore:
+    """Diretório de perfis: requests/ (com rotação) e views/ (pilhas somadas por view)"""
+
+    def __init__(self, directory, max_files):
+        self.requests_dir = Path(directory) / 'requests'
+        self.views_dir = Path(directory) / 'views'
+        self.max_files = max_files
+        self.requests_dir.mkdir(parents=True, exist_ok=True)
+        self.views_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._views = defaultdict(Counter)
+
+    def request_path(self, view_name, suffix):
+        """Caminho do perfil de um request; o nome começa pelo instante (ordem de rotação)"""
+        now = time.time_ns()
+        stamp = time.strftime('%Y%m%dT%H%M%S', time.localtime(now // 1_000_000_000))
+        stamp += f'.{now % 1_000_000_000:09d}'
+        return self.requests_dir / f"{stamp}_{_safe(view_name)}_{os.getpid()}{suffix}"
+
+    def save_request(self, path, data):
+        path.write_text(data)
+        self.rotate()
+
+    def rotate(self):
+        with self._lock:
+            names = sorted(entry.name for entry in os.scandir(self.requests_dir))
+            for name in names[:max(len(names) - self.max_files, 0)]:
+                try:
+                    os.unlink(self.requests_dir / name)
+                except FileNotFoundError:
+                    pass  # Outro processo já apagou
+
+    def add_view_stacks(self, view_name, stacks):
+        """Soma as pilhas à view e regrava views/<view>.<pid>.folded"""
+        path = self.views_dir / f"{_safe(view_name)}.{os.getpid()}.folded"
+        temporary = path.with_suffix('.tmp')
+        with self._lock:
+            total = self._views[view_name]
+            total.update(stacks)
+            temporary.write_text(format_folded(total))
+            os.replace(temporary, path)
+
+
+def _safe(view_name):
+    return (view_name or 'unresolved').replace(':', '.').replace('/', '_')
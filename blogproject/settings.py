@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/3.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -41,6 +44,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Primeiro da lista para que o tempo total inclua os demais middlewares
+    'blogproject.middleware.ServerTimingMiddleware',
+    # Desligado (MiddlewareNotUsed) a menos que TRAFFIC_RECORD=1
+    'blogproject.middleware.TrafficRecorderMiddleware',
+    # Desligado a menos que PROFILING_SECRET esteja definido
+    'blogproject.middleware.ProfilingMiddleware',
+    # Roteamento primário/réplica (desligado a menos que DB_REPLICA=1)
+    'blogproject.db_routing.ReplicaPinningMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -81,6 +92,60 @@ DATABASES = {
     }
 }
 
+# Perfil do SQLite (blogproject/sqlite_profile.py): DB_PROFILE=performance
+# liga PRAGMAs ajustados e conexões persistentes. PRAGMAS valem por conexão;
+# o JOURNAL_MODE fica gravado no arquivo e é trocado uma vez, com
+# `python manage.py sqlite_profile` (o perfil "default" volta ao journal
+# padrão), não a cada conexão.
+DB_PROFILE = os.environ.get('DB_PROFILE', 'default')
+SQLITE_PROFILES = {
+    'default': {
+        'JOURNAL_MODE': 'DELETE',
+        'PRAGMAS': {},
+    },
+    'performance': {
+        'JOURNAL_MODE': 'WAL',
+        'PRAGMAS': {
+            'synchronous': 'NORMAL',
+            'mmap_size': 256 * 1024 * 1024,  # bytes
+            'cache_size': -64 * 1024,  # negativo = KiB (64 MB)
+            'busy_timeout': 5000,  # ms
+            'temp_store': 'MEMORY',
+        },
+    },
+}
+if DB_PROFILE not in SQLITE_PROFILES:
+    raise ImproperlyConfigured(
+        f"DB_PROFILE={DB_PROFILE!r} desconhecido; use um de: {', '.join(SQLITE_PROFILES)}"
+    )
+SQLITE_PROFILE = SQLITE_PROFILES[DB_PROFILE]
+
+if DB_PROFILE == 'performance':
+    DATABASES['default'].update({
+        'CONN_MAX_AGE': 600,  # Reaproveita a conexão (e os PRAGMAs) entre requests
+        'CONN_HEALTH_CHECKS': True,
+        # BEGIN IMMEDIATE: o escritor pega o lock no início da transação, em vez
+        # de falhar ao tentar promover uma leitura a escrita
+        'OPTIONS': {'transaction_mode': 'IMMEDIATE'},
+    })
+
+# Réplica de leitura (blogproject/db_routing.py): DB_REPLICA=1 liga.
+# Localmente é uma cópia do SQLite: python manage.py sync_replica [--interval 2]
+REPLICA = {
+    'ENABLED': os.environ.get('DB_REPLICA') == '1',
+    'PATH': os.environ.get('DB_REPLICA_PATH') or BASE_DIR / 'db_replica.sqlite3',
+    'PIN_COOKIE': 'db_pin',  # Sessão lê do primário após um POST que escreveu
+    'PIN_SECONDS': 5,  # Deve ser maior que o atraso da réplica
+}
+
+if REPLICA['ENABLED']:
+    DATABASES['replica'] = {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': REPLICA['PATH'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_ROUTERS = ['blogproject.db_routing.PrimaryReplicaRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/3.2/ref/settings/#auth-password-validators
@@ -126,9 +191,136 @@ STATIC_URL = '/static/'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Cache Configuration (para demonstração de otimização)
-CACHES = {
-    'default': {
+# CACHE_BACKEND=sqlite: um arquivo SQLite compartilhado por todos os processos
+# da máquina (blogproject/sqlite_cache.py), com LRU e incr/add atômicos.
+# 'locmem' (padrão) é por processo; 'file' fica para comparação (bench_cache)
+CACHE_BACKEND = os.environ.get('CACHE_BACKEND', 'locmem')
+CACHE_BACKENDS = {
+    'locmem': {
         'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
         'LOCATION': 'unique-snowflake',
-    }
+    },
+    'sqlite': {
+        'BACKEND': 'blogproject.sqlite_cache.SQLiteCache',
+        'LOCATION': os.environ.get('CACHE_PATH') or BASE_DIR / 'cache.sqlite3',
+        'OPTIONS': {
+            'MAX_ENTRIES': 100_000,
+            'MAX_BYTES': 256 * 1024 * 1024,
+            'CULL_FREQUENCY': 10,  # Despeja 10% das entradas (LRU) ao passar do limite
+            'TOUCH_INTERVAL': 10,  # segundos
+        },
+    },
+    'file': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get('CACHE_PATH') or BASE_DIR / 'cache_files',
+    },
+}
+CACHES = {
+    'default': CACHE_BACKENDS[CACHE_BACKEND],
+}
+
+
+# Contador de visualizações com escrita adiada (blog/view_counter.py)
+# Os incrementos são gravados em lote a cada intervalo ou ao atingir o limite
+VIEW_COUNTER_FLUSH_INTERVAL = 5  # segundos
+VIEW_COUNTER_FLUSH_THRESHOLD = 500  # incrementos pendentes
+
+# Paginação das listas de posts (blog/pagination.py)
+# 'offset': Paginator do Django (?page=N, COUNT + OFFSET)
+# 'keyset': cursor por (created_at, id) (?cursor=..., custo constante)
+BLOG_PAGINATION_MODE = 'offset'
+
+# Busca textual FTS5 (blog/search.py)
+# COMMON_TERM_DOCS: termos presentes em mais posts que isso viram stopwords
+# (não filtram nem ranqueiam se houver termos seletivos; 0 = desliga)
+SEARCH = {
+    'DEFAULT_LIMIT': 20,
+    'MAX_LIMIT': 50,
+    # Última página aceita: o OFFSET cresce com a página (e precisa caber num INTEGER)
+    'MAX_PAGE': 100,
+    'COMMON_TERM_DOCS': 2000,
+}
+
+# Admin de posts em tabelas grandes (blog/admin_changelist.py)
+# COUNT_TIME_BUDGET: segundos para o COUNT exato; acima disso a contagem é estimada
+# ESTIMATE_SAMPLE: posts mais recentes usados para estimar a fração filtrada
+# CACHE_SECONDS: contagens e date_hierarchy; FACETS_CACHE_SECONDS: contagens das facetas
+ADMIN_CHANGELIST = {
+    'COUNT_TIME_BUDGET': 0.2,
+    'ESTIMATE_SAMPLE': 2000,
+    'CACHE_SECONDS': 60,
+    'FACETS_CACHE_SECONDS': 600,
+}
+
+# Posts relacionados pré-calculados (blog/related.py)
+# RANKING: 'recent' (mais recentes) ou 'views' (mais vistos) da mesma categoria
+RELATED_POSTS = {
+    'LIMIT': 3,
+    'RANKING': os.environ.get('RELATED_RANKING', 'recent'),
+    'CACHE_TIMEOUT': 300,
+}
+
+# Jobs em segundo plano (blog/jobs.py), usados pelo slow_endpoint
+# WORKERS: threads do pool em cada processo (limita o trabalho pesado simultâneo)
+# STALE_AFTER: job em andamento há mais tempo que isso é considerado abandonado
+# KEEP_FINISHED: por quantos segundos os resultados ficam consultáveis
+JOBS = {
+    'WORKERS': int(os.environ.get('JOBS_WORKERS', 2)),
+    'STALE_AFTER': 300,
+    'KEEP_FINISHED': 60 * 60,
+}
+
+# API de posts (blog/serializers.py)
+API_POSTS_DEFAULT_LIMIT = 20
+API_POSTS_MAX_LIMIT = 100  # Maior valor aceito em ?limit=
+API_POSTS_FRAGMENT_TIMEOUT = 60 * 10  # Validade dos fragmentos JSON no cache
+
+# Cache dos cards de post nas listas (blog/fragments.py)
+POST_CARD_CACHE_TIMEOUT = 60 * 60
+
+# Cache das páginas de categoria (blog/page_cache.py)
+# TIMEOUT: tempo em que a página é servida como "fresca"
+# STALE_TIMEOUT: tempo extra em que a versão vencida ainda é servida
+#   enquanto um único request a regenera (stale-while-revalidate)
+# EARLY_REFRESH_BETA: agressividade da renovação antecipada (0 desliga)
+CATEGORY_PAGE_CACHE = {
+    'TIMEOUT': int(os.environ.get('CATEGORY_PAGE_CACHE_TIMEOUT', 60 * 5)),
+    'STALE_TIMEOUT': 60,
+    'LOCK_TIMEOUT': 10,
+    'EARLY_REFRESH_BETA': 1.0,
+}
+
+# Instrumentação por request (blogproject/middleware.py)
+# O header Server-Timing é sempre enviado; defina SERVER_TIMING_LOG para
+# também gravar um registro JSONL por request
+SERVER_TIMING = {
+    'LOG_PATH': os.environ.get('SERVER_TIMING_LOG') or None,
+    'LOG_BUFFER': 100,  # Registros acumulados antes de cada gravação
+}
+
+# Profiling por request (blogproject/middleware.py, ProfilingMiddleware).
+# Só liga com PROFILING_SECRET definido: perfila os requests com o header
+# X-Profile: <segredo> e, se PROFILING_SAMPLE_RATE > 0, essa fração dos demais.
+# MODE 'sample': pilhas amostradas a cada INTERVAL s (folded, somadas por
+# view); 'cprofile': um .prof por request (tempo exato, mais overhead)
+PROFILING = {
+    'SECRET': os.environ.get('PROFILING_SECRET') or None,
+    'HEADER': 'X-Profile',
+    'SAMPLE_RATE': float(os.environ.get('PROFILING_SAMPLE_RATE', 0)),
+    'MODE': os.environ.get('PROFILING_MODE', 'sample'),
+    'INTERVAL': 0.001,  # segundos entre amostras
+    'DIR': os.environ.get('PROFILING_DIR') or BASE_DIR / 'profiles',
+    'MAX_FILES': 500,  # Perfis de request mantidos (os mais recentes)
+}
+
+# Gravação de tráfego para replay no Locust (locustfile_replay.py)
+# TRAFFIC_RECORD=1 liga; TRAFFIC_RECORD_PATH muda o arquivo de saída
+TRAFFIC_RECORDER = {
+    'ENABLED': os.environ.get('TRAFFIC_RECORD') == '1',
+    'PATH': os.environ.get('TRAFFIC_RECORD_PATH') or BASE_DIR / 'recordings' / 'requests.jsonl',
+    'BUFFER': 200,
+    # Headers que mudam a resposta; Cookie/Authorization ficam de fora de propósito
+    'HEADERS': ['Accept', 'Accept-Encoding', 'Accept-Language', 'User-Agent',
+                'If-None-Match', 'If-Modified-Since'],
+    'EXCLUDE_PREFIXES': ['/static/', '/media/'],
 }
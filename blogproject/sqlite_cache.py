@@ -0,0 +1,348 @@
+"""
+Cache compartilhado entre processos em um arquivo SQLite (CACHE_BACKEND=sqlite)
+
+O LocMemCache é por processo: com N workers (gunicorn -w N) cada um tem a sua
+cópia fria do cache, a taxa de acerto cai a cada worker adicionado e a
+memória é duplicada N vezes. Os locks de cache.add (proteção contra stampede
+em blog/page_cache.py) e os contadores de cache.incr (versões das páginas)
+também só valem dentro de um processo. Aqui todos os processos da máquina
+usam o mesmo arquivo, sem serviço externo:
+
+- WAL: leituras simultâneas não bloqueiam a escrita. synchronous=OFF, porque
+  perder o cache numa queda de energia não é problema.
+- add e incr são um único comando SQL (INSERT ... ON CONFLICT e
+  UPDATE ... RETURNING), atômicos entre processos.
+- Limite por entradas (MAX_ENTRIES) e por bytes (MAX_BYTES). Ao passar de um
+  deles, apaga as entradas expiradas e depois as acessadas há mais tempo
+  (LRU) até sobrar 1 - 1/CULL_FREQUENCY do limite. Os totais ficam numa
+  linha mantida por triggers, sem COUNT(*) a cada escrita.
+- O horário de acesso é regravado no máximo a cada TOUCH_INTERVAL segundos
+  por chave (LRU aproximado), para que cada leitura não vire uma escrita.
+
+Inteiros são gravados como INTEGER (o incr soma no próprio SQL); os demais
+valores, com pickle. Cada thread tem a sua conexão, reaberta após fork.
+"""
+
+import os
+import pickle
+import sqlite3
+import threading
+import time
+
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS cache_entry (
+        key TEXT PRIMARY KEY,
+        value BLOB,
+        expires REAL,
+        accessed REAL NOT NULL,
+        size INTEGER NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS cache_entry_expires ON cache_entry (expires)",
+    "CREATE INDEX IF NOT EXISTS cache_entry_accessed ON cache_entry (accessed)",
+    """
+    CREATE TABLE IF NOT EXISTS cache_stats (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    )
+    """,
+    "INSERT OR IGNORE INTO cache_stats (id, entries, bytes) VALUES (1, 0, 0)",
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entry_insert AFTER INSERT ON cache_entry BEGIN
+        UPDATE cache_stats SET entries = entries + 1, bytes = bytes + new.size WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entry_delete AFTER DELETE ON cache_entry BEGIN
+        UPDATE cache_stats SET entries = entries - 1, bytes = bytes - old.size WHERE id = 1;
+    END
+    """,
+    """
+    CREATE TRIGGER IF NOT EXISTS cache_entry_resize AFTER UPDATE OF size ON cache_entry
+    WHEN new.size != old.size BEGIN
+        UPDATE cache_stats SET bytes = bytes + new.size - old.size WHERE id = 1;
+    END
+    """,
+]
+
+UPSERT = (
+    "INSERT INTO cache_entry (key, value, expires, accessed, size) VALUES (?, ?, ?, ?, ?) "
+    "ON CONFLICT (key) DO UPDATE SET value = excluded.value, expires = excluded.expires, "
+    "accessed = excluded.accessed, size = excluded.size"
+)
+# Só substitui uma entrada expirada: rowcount 0 = a chave já existia
+ADD = UPSERT + " WHERE cache_entry.expires <= ?"
+NOT_EXPIRED = "(expires IS NULL OR expires > ?)"
+
+# Conexões por thread: {caminho: conexão}, descartadas após fork
+_local = threading.local()
+# (pid, caminho) com o esquema já criado neste processo
+_ready = set()
+_ready_lock = threading.Lock()
+
+
+def _encode(value):
+    # bool é subclasse de int, mas precisa voltar como bool
+    if type(value) is int:
+        return value, 8
+    data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+    return data, len(data)
+
+
+def _decode(value):
+    return value if isinstance(value, int) else pickle.loads(value)
+
+
+class SQLiteCache(BaseCache):
+    """Backend de cache do Django em um arquivo SQLite compartilhado
+
+    LOCATION é o caminho do arquivo. OPTIONS: MAX_ENTRIES e CULL_FREQUENCY
+    (como nos backends do Django), MAX_BYTES (0 = sem limite de tamanho),
+    TOUCH_INTERVAL (segundos) e BUSY_TIMEOUT (segundos de espera pelo lock).
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._path = str(location)
+        self._max_bytes = options.get('MAX_BYTES', 0)
+        self._touch_interval = options.get('TOUCH_INTERVAL', 10)
+        self._busy_timeout = options.get('BUSY_TIMEOUT', 5)
+
+    # Conexão
+
+    def _connection(self):
+        pid = os.getpid()
+        if getattr(_local, 'pid', None) != pid:
+            _local.pid = pid
+            _local.connections = {}
+        connection = _local.connections.get(self._path)
+        if connection is None:
+            self._ensure_schema(pid)
+            connection = sqlite3.connect(
+                self._path, timeout=self._busy_timeout, isolation_level=None
+            )
+            connection.execute('PRAGMA synchronous = OFF')
+            _local.connections[self._path] = connection
+        return connection
+
+    def _ensure_schema(self, pid):
+        with _ready_lock:
+            if (pid, self._path) in _ready:
+                return
+            os.makedirs(os.path.dirname(os.path.abspath(self._path)), exist_ok=True)
+            connection = sqlite3.connect(
+                self._path, timeout=self._busy_timeout, isolation_level=None
+            )
+            try:
+                connection.execute('PRAGMA journal_mode = WAL')
+                for sql in SCHEMA:
+                    connection.execute(sql)
+            finally:
+                connection.close()
+            _ready.add((pid, self._path))
+
+    # Leitura
+
+    def _touch_stale(self, connection, keys, now):
+        if keys:
+            connection.executemany(
+                "UPDATE cache_entry SET accessed = ? WHERE key = ?", [(now, key) for key in keys]
+            )
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value, expires, accessed FROM cache_entry WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return default
+        value, expires, accessed = row
+        if expires is not None and expires <= now:
+            return default
+        if now - accessed > self._touch_interval:
+            self._touch_stale(connection, [key], now)
+        return _decode(value)
+
+    def get_many(self, keys, version=None):
+        keys = {self.make_and_validate_key(key, version=version): key for key in keys}
+        if not keys:
+            return {}
+        now = time.time()
+        connection = self._connection()
+        placeholders = ', '.join('?' * len(keys))
+        rows = connection.execute(
+            f"SELECT key, value, expires, accessed FROM cache_entry WHERE key IN ({placeholders})",
+            list(keys),
+        ).fetchall()
+        found, stale = {}, []
+        for key, value, expires, accessed in rows:
+            if expires is not None and expires <= now:
+                continue
+            if now - accessed > self._touch_interval:
+                stale.append(key)
+            found[keys[key]] = _decode(value)
+        self._touch_stale(connection, stale, now)
+        return found
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        row = self._connection().execute(
+            f"SELECT 1 FROM cache_entry WHERE key = ? AND {NOT_EXPIRED}", (key, time.time())
+        ).fetchone()
+        return row is not None
+
+    # Escrita
+
+    def _row(self, key, value, timeout, now):
+        data, size = _encode(value)
+        return (key, data, self.get_backend_timeout(timeout), now, size + len(key))
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        connection = self._connection()
+        connection.execute(UPSERT, self._row(key, value, timeout, now))
+        self._cull_if_needed(connection, now)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        now = time.time()
+        rows = [
+            self._row(self.make_and_validate_key(key, version=version), value, timeout, now)
+            for key, value in data.items()
+        ]
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.executemany(UPSERT, rows)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        self._cull_if_needed(connection, now)
+        return []
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        connection = self._connection()
+        added = connection.execute(ADD, (*self._row(key, value, timeout, now), now)).rowcount > 0
+        if added:
+            self._cull_if_needed(connection, now)
+        return added
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        connection = self._connection()
+        # fetchall: o comando (e a transação implícita) termina antes de retornar
+        rows = connection.execute(
+            "UPDATE cache_entry SET value = value + ? "
+            f"WHERE key = ? AND typeof(value) = 'integer' AND {NOT_EXPIRED} RETURNING value",
+            (delta, key, now),
+        ).fetchall()
+        if rows:
+            return rows[0][0]
+        # Ausente, ou valor que não é inteiro: mesmo comportamento do BaseCache,
+        # dentro de uma transação de escrita (nenhum outro processo grava no meio)
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute(
+                f"SELECT value, size FROM cache_entry WHERE key = ? AND {NOT_EXPIRED}", (key, now)
+            ).fetchone()
+            if row is None:
+                raise ValueError("Key '%s' not found." % key)
+            new_value = _decode(row[0]) + delta
+            data, size = _encode(new_value)
+            connection.execute(
+                "UPDATE cache_entry SET value = ?, size = ? WHERE key = ?",
+                (data, size + len(key), key),
+            )
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+        return new_value
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        now = time.time()
+        cursor = self._connection().execute(
+            f"UPDATE cache_entry SET expires = ?, accessed = ? WHERE key = ? AND {NOT_EXPIRED}",
+            (self.get_backend_timeout(timeout), now, key, now),
+        )
+        return cursor.rowcount > 0
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        cursor = self._connection().execute("DELETE FROM cache_entry WHERE key = ?", (key,))
+        return cursor.rowcount > 0
+
+    def delete_many(self, keys, version=None):
+        keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        if keys:
+            placeholders = ', '.join('?' * len(keys))
+            self._connection().execute(
+                f"DELETE FROM cache_entry WHERE key IN ({placeholders})", keys
+            )
+
+    def clear(self):
+        self._connection().execute("DELETE FROM cache_entry")
+
+    def close(self, **kwargs):
+        # Chamado ao fim de cada request: a conexão da thread é reaproveitada
+        pass
+
+    # Despejo
+
+    def _over_limit(self, entries, size):
+        return entries > self._max_entries or bool(self._max_bytes and size > self._max_bytes)
+
+    def _cull_if_needed(self, connection, now):
+        entries, size = connection.execute(
+            "SELECT entries, bytes FROM cache_stats WHERE id = 1"
+        ).fetchone()
+        if self._over_limit(entries, size):
+            self._cull(connection, now)
+
+    def _cull(self, connection, now):
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            connection.execute("DELETE FROM cache_entry WHERE expires <= ?", (now,))
+            entries, size = connection.execute(
+                "SELECT entries, bytes FROM cache_stats WHERE id = 1"
+            ).fetchone()
+            # Outro processo pode ter acabado de despejar
+            if self._over_limit(entries, size):
+                if self._cull_frequency == 0:
+                    connection.execute("DELETE FROM cache_entry")
+                else:
+                    self._evict_lru(connection, entries, size)
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+        connection.execute('COMMIT')
+
+    def _evict_lru(self, connection, entries, size):
+        excess_entries = entries - (self._max_entries - self._max_entries // self._cull_frequency)
+        excess_bytes = 0
+        if self._max_bytes:
+            excess_bytes = size - (self._max_bytes - self._max_bytes // self._cull_frequency)
+        victims = []
+        cursor = connection.execute("SELECT key, size FROM cache_entry ORDER BY accessed")
+        for key, entry_size in cursor:
+            if excess_entries <= 0 and excess_bytes <= 0:
+                break
+            victims.append((key,))
+            excess_entries -= 1
+            excess_bytes -= entry_size
+        cursor.close()
+        connection.executemany("DELETE FROM cache_entry WHERE key = ?", victims)
@@ -0,0 +1,73 @@
+"""
+Perfil de desempenho do SQLite (DB_PROFILE=performance)
+
+Os PRAGMAs de settings.SQLITE_PROFILE['PRAGMAS'] são aplicados a cada conexão
+nova do alias 'default' pelo sinal connection_created. Com o perfil
+"performance":
+
+- synchronous=NORMAL: em WAL, fsync só no checkpoint (seguro contra crash do
+  processo; uma queda de energia pode perder as últimas transações)
+- mmap_size / cache_size: páginas lidas via mmap e cache maior por conexão
+- busy_timeout: espera o lock em vez de falhar com "database is locked"
+
+Junto com CONN_MAX_AGE, os PRAGMAs são pagos uma vez por conexão, não por
+request. A réplica (db_routing) fica de fora: é substituída por
+os.replace e usada sem conexões persistentes.
+
+O journal_mode (WAL: leitores não bloqueiam o escritor nem são bloqueados
+por ele) fica gravado no arquivo do banco. Ele é trocado uma vez pelo comando
+sqlite_profile; aqui só a primeira conexão de cada processo confere o modo e
+avisa se o arquivo não está no modo do perfil.
+"""
+
+import logging
+
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+_journal_checked = False
+
+
+def apply_sqlite_pragmas(sender, connection, **kwargs):
+    """Receiver de connection_created"""
+    if connection.vendor != 'sqlite' or connection.alias != 'default':
+        return
+    profile = getattr(settings, 'SQLITE_PROFILE', {})
+    with connection.cursor() as cursor:
+        for name, value in profile.get('PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+        if not connection.is_in_memory_db():
+            _check_journal_mode(cursor, profile.get('JOURNAL_MODE'))
+
+
+def skip_journal_check():
+    """Para quem vai trocar o journal_mode (comando sqlite_profile): sem aviso"""
+    global _journal_checked
+    _journal_checked = True
+
+
+def _check_journal_mode(cursor, expected):
+    global _journal_checked
+    if _journal_checked or not expected:
+        return
+    _journal_checked = True
+    cursor.execute('PRAGMA journal_mode')
+    current = cursor.fetchone()[0]
+    if current.upper() != expected.upper():
+        logger.warning(
+            'O banco está em journal_mode=%s, mas o perfil %s usa %s: '
+            'rode "python manage.py sqlite_profile"',
+            current, getattr(settings, 'DB_PROFILE', 'default'), expected,
+        )
+
+
+def set_journal_mode(connection, mode):
+    """Grava o journal_mode no arquivo do banco e retorna o modo resultante
+
+    Sair do WAL exige que nenhuma outra conexão esteja com o banco aberto; se
+    não for possível, o SQLite mantém o modo atual (que é o retornado).
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(f'PRAGMA journal_mode = {mode}')
+        return cursor.fetchone()[0]
@@ -0,0 +1,6 @@
+"""
+Utilitários compartilhados pelos locustfiles deste projeto
+
+Os locustfiles ficam na raiz do repositório; o Locust adiciona esse diretório
+ao sys.path, então basta `import loadtest.<módulo>` dentro deles.
+"""
@@ -0,0 +1,41 @@
+"""
+Escolha do cliente HTTP dos usuários Locust
+
+HttpUser usa python-requests: simples, mas caro em CPU — o gerador de carga
+chega a 100% de CPU antes do Django saturar. FastHttpUser usa
+geventhttpclient, com pool de conexões keep-alive, e gera várias vezes mais
+requests por core. Troque com a variável de ambiente LOCUST_CLIENT:
+
+    LOCUST_CLIENT=fast locust -f locustfile_comparison.py ...
+
+Os dois aceitam LOCUST_REVALIDATE (GET condicional, loadtest/revalidation.py)
+e LOCUST_PROFILE_FRACTION (profiling no servidor, loadtest/profiling.py).
+"""
+
+import os
+
+from locust import FastHttpUser, HttpUser
+
+from .profiling import ProfilingMixin
+from .revalidation import RevalidationMixin
+
+CLIENT_TYPE = os.environ.get('LOCUST_CLIENT', 'requests').lower()
+if CLIENT_TYPE not in ('requests', 'fast'):
+    raise ValueError(f"LOCUST_CLIENT deve ser 'requests' ou 'fast', não {CLIENT_TYPE!r}")
+
+
+class FastBlogUser(ProfilingMixin, RevalidationMixin, FastHttpUser):
+    """FastHttpUser com conexões keep-alive reaproveitadas entre requests"""
+    abstract = True
+    concurrency = 4  # Conexões no pool de cada usuário
+    connection_timeout = 10.0
+    network_timeout = 30.0
+
+
+class RequestsBlogUser(ProfilingMixin, RevalidationMixin, HttpUser):
+    """HttpUser (python-requests)"""
+    abstract = True
+
+
+# Base dos usuários dos locustfiles: HttpUser (padrão) ou FastHttpUser
+BlogUser = FastBlogUser if CLIENT_TYPE == 'fast' else RequestsBlogUser
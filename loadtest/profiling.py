@@ -0,0 +1,65 @@
+"""
+Marca uma fração dos requests Locust para o ProfilingMiddleware
+
+    PROFILING_SECRET=s3nha python manage.py runserver
+    LOCUST_PROFILE_FRACTION=0.05 LOCUST_PROFILE_SECRET=s3nha locust -f locustfile_comparison.py ...
+
+Com essa probabilidade, cada request (get, post ou request) leva o header
+X-Profile com o segredo e aparece nas estatísticas com o sufixo _profiled
+(ex.: posts_unoptimized_profiled).
+Assim a latência inflada pelo profiler não entra nos percentis dos requests
+normais. O servidor responde com o nome do perfil no header X-Profile, e os
+perfis ficam em profiles/ (settings.PROFILING['DIR']).
+"""
+
+import os
+import random
+
+FRACTION = float(os.environ.get('LOCUST_PROFILE_FRACTION', '0'))
+if not 0 <= FRACTION <= 1:
+    raise ValueError(f"LOCUST_PROFILE_FRACTION deve estar entre 0 e 1, não {FRACTION}")
+SECRET = os.environ.get('LOCUST_PROFILE_SECRET', '')
+if FRACTION and not SECRET:
+    raise ValueError("LOCUST_PROFILE_FRACTION exige LOCUST_PROFILE_SECRET (o PROFILING_SECRET do servidor)")
+
+HEADER = 'X-Profile'
+SUFFIX = '_profiled'
+
+
+class ProfilingClient:
+    """Envolve o client do usuário e marca requests para profiling"""
+
+    def __init__(self, client, fraction=FRACTION, secret=SECRET):
+        self._client = client
+        self.fraction = fraction
+        self.secret = secret
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def _tag(self, url, name, headers):
+        if random.random() < self.fraction:
+            headers = {**(headers or {}), HEADER: self.secret}
+            name = f"{name or url}{SUFFIX}"
+        return name, headers
+
+    def request(self, method, url, name=None, headers=None, **kwargs):
+        name, headers = self._tag(url, name, headers)
+        return self._client.request(method, url, name=name, headers=headers, **kwargs)
+
+    def get(self, url, name=None, headers=None, **kwargs):
+        name, headers = self._tag(url, name, headers)
+        return self._client.get(url, name=name, headers=headers, **kwargs)
+
+    def post(self, url, data=None, name=None, headers=None, **kwargs):
+        name, headers = self._tag(url, name, headers)
+        return self._client.post(url, data=data, name=name, headers=headers, **kwargs)
+
+
+class ProfilingMixin:
+    """Troca o client do usuário por um ProfilingClient quando LOCUST_PROFILE_FRACTION > 0"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if FRACTION:
+            self.client = ProfilingClient(self.client)
@@ -0,0 +1,124 @@
+"""
+Leitura em streaming de gravações de tráfego (TrafficRecorderMiddleware)
+
+O arquivo é lido linha a linha conforme os usuários pedem o próximo request,
+então gravações de vários GB não precisam caber na memória. Cada registro vem
+com o instante em que deve ser enviado, preservando os intervalos originais
+entre chegadas (divididos por `speed`):
+
+    REPLAY_FILE=recordings/requests.jsonl   arquivo gravado
+    REPLAY_SPEED=1.0                        2.0 = duas vezes mais rápido; 0 = sem pausas
+    REPLAY_LOOP=0                           1 = recomeça do início ao terminar
+    REPLAY_METHODS=GET,HEAD                 métodos reproduzidos (o corpo não é gravado)
+
+If-None-Match e If-Modified-Since gravados não são reenviados: os validadores
+são do servidor gravado, e um servidor novo responderia 200 onde a gravação
+tem 304 (ou o contrário). Por isso um 304 gravado equivale a um 200.
+"""
+
+import json
+import logging
+import os
+import time
+
+logger = logging.getLogger(__name__)
+
+CONDITIONAL_HEADERS = {'if-none-match', 'if-modified-since'}
+
+
+def replay_headers(record):
+    """Headers gravados, sem os de GET condicional"""
+    headers = record.get('headers') or {}
+    return {name: value for name, value in headers.items() if name.lower() not in CONDITIONAL_HEADERS}
+
+
+def status_matches(recorded, replayed):
+    """Mesma classe de status (2xx, 4xx...); sem status gravado, qualquer um serve"""
+    if not recorded:
+        return True
+    if recorded == 304:
+        recorded = 200  # O request gravado era condicional; reproduzido, não é
+    return replayed // 100 == recorded // 100
+
+
+class TrafficReplay:
+    """Fonte de requests compartilhada por todos os usuários do processo"""
+
+    def __init__(self, path=None, speed=None, loop=None, methods=None):
+        self.path = path or os.environ.get('REPLAY_FILE', 'recordings/requests.jsonl')
+        self.speed = float(os.environ.get('REPLAY_SPEED', '1.0') if speed is None else speed)
+        if self.speed < 0:
+            raise ValueError(f"REPLAY_SPEED inválida: {self.speed}")
+        self.loop = os.environ.get('REPLAY_LOOP', '0') == '1' if loop is None else loop
+        methods = methods or os.environ.get('REPLAY_METHODS', 'GET,HEAD').split(',')
+        self.methods = {method.strip().upper() for method in methods if method.strip()}
+        self.sent = 0
+        self.in_flight = 0
+        self.skipped = 0
+        self.late = 0
+        self.max_lag = 0.0
+        self._file = None
+        self._first_ts = None
+        self._started = None
+
+    def open(self):
+        """Abre a gravação (OSError se não existir); chamado uma vez, no test_start"""
+        self._file = open(self.path, encoding='utf-8')
+        self._first_ts = None
+        self._started = None
+
+    def next_request(self):
+        """Retorna (registro, segundos até o envio) ou None quando a gravação acaba
+
+        Também retorna None se a gravação não foi aberta (open falhou).
+        Não há troca de greenlet durante a leitura (arquivo local, bloqueante),
+        então os usuários recebem os registros na ordem do arquivo.
+        """
+        if self._file is None:
+            return None
+        while True:
+            line = self._file.readline()
+            if not line:
+                if not self.loop or self._first_ts is None:
+                    return None
+                self._file.close()
+                self.open()
+                continue
+            try:
+                record = json.loads(line)
+                ts = float(record['ts'])
+                method = record['method'].upper()
+                record['path']
+            except (ValueError, KeyError, TypeError, AttributeError):
+                self.skipped += 1
+                continue
+            if method not in self.methods:
+                self.skipped += 1
+                continue
+
+            now = time.monotonic()
+            if self._first_ts is None:
+                self._first_ts = ts
+                self._started = now
+            if not self.speed:
+                return record, 0.0
+            delay = self._started + (ts - self._first_ts) / self.speed - now
+            if delay < 0:
+                # Usuários insuficientes para acompanhar o ritmo da gravação
+                self.max_lag = max(self.max_lag, -delay)
+                if delay < -1.0:
+                    self.late += 1
+            return record, delay
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def log_summary(self):
+        logger.info(
+            "Replay de %s: %d requests enviados, %d ignorados, %d com mais de 1s de atraso (máx. %.1fs)",
+            self.path, self.sent, self.skipped, self.late, self.max_lag,
+        )
+        if self.late:
+            logger.info("O replay ficou atrás da gravação: aumente --users ou reduza REPLAY_SPEED")
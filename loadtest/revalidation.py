@@ -0,0 +1,119 @@
+"""
+Revalidação (GET condicional) nos usuários Locust
+
+Com LOCUST_REVALIDATE=<fração> (ex.: 0.8), cada usuário guarda, por URL, o
+ETag e o Last-Modified das respostas, como o cache de um navegador. Ao pedir
+de novo uma URL já vista, com essa probabilidade envia If-None-Match e
+If-Modified-Since, e o servidor responde 304 sem corpo se nada mudou
+(blog/conditional.py):
+
+    LOCUST_REVALIDATE=0.8 locust -f locustfile_comparison.py ...
+
+Os requests revalidados aparecem nas estatísticas com o sufixo _revalidate
+(ex.: post_detail_optimized_revalidate), separados dos requests completos, e
+ao final o log mostra quantos deles receberam 304. Padrão 0: nenhum header
+condicional.
+"""
+
+import logging
+import os
+import random
+from collections import Counter
+
+from locust import events
+from locust.runners import WorkerRunner
+
+logger = logging.getLogger(__name__)
+
+FRACTION = float(os.environ.get('LOCUST_REVALIDATE', '0'))
+if not 0 <= FRACTION <= 1:
+    raise ValueError(f"LOCUST_REVALIDATE deve estar entre 0 e 1, não {FRACTION}")
+
+SUFFIX = '_revalidate'
+VALIDATOR_HEADERS = (('ETag', 'If-None-Match'), ('Last-Modified', 'If-Modified-Since'))
+
+
+class RevalidatingClient:
+    """Envolve o client do usuário (HttpSession ou FastHttpSession) e revalida os GETs"""
+
+    def __init__(self, client, fraction=FRACTION):
+        self._client = client
+        self.fraction = fraction
+        self._validators = {}
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def get(self, url, name=None, headers=None, **kwargs):
+        validators = self._validators.get(url)
+        if validators and random.random() < self.fraction:
+            headers = {**validators, **(headers or {})}
+            name = f"{name or url}{SUFFIX}"
+        response = self._client.get(url, name=name, headers=headers, **kwargs)
+        self._remember(url, response)
+        return response
+
+    def _remember(self, url, response):
+        if response.status_code == 304:
+            return
+        found = {}
+        if response.status_code == 200 and response.headers:
+            for header, conditional in VALIDATOR_HEADERS:
+                value = response.headers.get(header)
+                if value:
+                    found[conditional] = value
+        if found:
+            self._validators[url] = found
+        else:
+            self._validators.pop(url, None)
+
+
+class RevalidationMixin:
+    """Troca o client do usuário por um RevalidatingClient quando LOCUST_REVALIDATE > 0"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        if FRACTION:
+            self.client = RevalidatingClient(self.client)
+
+
+# Requests revalidados e quantos receberam 304, por nome
+stats = Counter()
+
+
+@events.request.add_listener
+def on_request(name, response=None, exception=None, **kwargs):
+    if not name.endswith(SUFFIX) or response is None:
+        return
+    stats[(name, 'sent')] += 1
+    if exception is None and response.status_code == 304:
+        stats[(name, 'not_modified')] += 1
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    stats.clear()
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data['revalidation'] = [[name, kind, count] for (name, kind), count in stats.items()]
+    stats.clear()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    for name, kind, count in data.get('revalidation', []):
+        stats[(name, kind)] += count
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner) or not stats:
+        return
+    lines = [f"{'Name':<50}{'Revalidados':>12}{'304':>10}{'%':>7}"]
+    for name in sorted({name for name, _ in stats}):
+        sent = stats[(name, 'sent')]
+        not_modified = stats[(name, 'not_modified')]
+        lines.append(f"{name[:49]:<50}{sent:>12}{not_modified:>10}{100 * not_modified / sent:>6.0f}%")
+    logger.info("Revalidação (GET condicional):\n%s", '\n'.join(lines))
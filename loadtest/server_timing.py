@@ -0,0 +1,153 @@
+"""
+Plugin Locust: coleta o header Server-Timing de cada resposta
+
+Importar este módulo em um locustfile registra os event hooks:
+
+    import loadtest.server_timing  # noqa: F401
+
+Para cada nome de request (posts_unoptimized, posts_optimized, ...) são
+agregados os tempos db/tpl/app/total reportados pelo servidor e o número de
+queries, em histogramas (como as estatísticas do próprio Locust). Com --csv,
+o resultado é gravado em <prefixo>_server_timing.csv ao lado dos CSVs padrão.
+Funciona também em modo distribuído: os workers enviam os histogramas ao
+master junto com os relatórios normais.
+"""
+
+import csv
+import logging
+from collections import Counter, defaultdict
+
+from locust import events
+from locust.runners import WorkerRunner
+
+logger = logging.getLogger(__name__)
+
+PERCENTILES = (0.5, 0.9, 0.95, 0.99)
+AGGREGATED = 'Aggregated'
+
+
+def parse_server_timing(header):
+    """Converte o header em {métrica: valor}; 'queries' vem do desc de db"""
+    metrics = {}
+    for part in header.split(','):
+        name, *params = [item.strip() for item in part.split(';')]
+        if not name:
+            continue
+        for param in params:
+            key, _, value = param.partition('=')
+            value = value.strip('"')
+            try:
+                if key == 'dur':
+                    metrics[name] = float(value)
+                elif key == 'desc' and name == 'db':
+                    metrics['queries'] = int(value.split()[0])
+            except (ValueError, IndexError):
+                continue
+    return metrics
+
+
+def _bucket(value):
+    """Arredonda o valor para manter o histograma pequeno (~2 dígitos significativos)"""
+    if value < 10:
+        return round(value, 1)
+    if value < 100:
+        return round(value)
+    if value < 1000:
+        return round(value, -1)
+    return round(value, -2)
+
+
+class ServerTimingStats:
+    """Histogramas por (nome do request, métrica)"""
+
+    def __init__(self):
+        self.histograms = defaultdict(Counter)
+
+    def add(self, name, metrics):
+        for metric, value in metrics.items():
+            bucket = _bucket(value)
+            self.histograms[(name, metric)][bucket] += 1
+            self.histograms[(AGGREGATED, metric)][bucket] += 1
+
+    def reset(self):
+        self.histograms.clear()
+
+    def serialize(self):
+        return [[name, metric, list(histogram.items())] for (name, metric), histogram in self.histograms.items()]
+
+    def merge(self, data):
+        for name, metric, items in data:
+            self.histograms[(name, metric)].update(dict(items))
+
+    def rows(self):
+        """Linhas da tabela: nome, métrica, contagem, média, percentis, máximo"""
+        for (name, metric) in sorted(self.histograms, key=lambda key: (key[0] == AGGREGATED, key)):
+            histogram = self.histograms[(name, metric)]
+            values = sorted(histogram)
+            count = sum(histogram.values())
+            mean = sum(value * histogram[value] for value in values) / count
+            percentiles = []
+            for percentile in PERCENTILES:
+                target = percentile * count
+                seen = 0
+                for value in values:
+                    seen += histogram[value]
+                    if seen >= target:
+                        percentiles.append(value)
+                        break
+            yield [name, metric, count, round(mean, 3), *percentiles, values[-1]]
+
+    def write_csv(self, path):
+        with open(path, 'w', newline='') as handle:
+            writer = csv.writer(handle)
+            writer.writerow(
+                ['Name', 'Metric', 'Count', 'Average']
+                + [f'{int(percentile * 100)}%' for percentile in PERCENTILES]
+                + ['Max']
+            )
+            writer.writerows(self.rows())
+
+
+stats = ServerTimingStats()
+
+
+@events.request.add_listener
+def on_request(name, response=None, exception=None, **kwargs):
+    if exception is not None or response is None:
+        return
+    header = response.headers.get('Server-Timing') if response.headers else None
+    if header:
+        stats.add(name, parse_server_timing(header))
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    stats.reset()
+
+
+@events.report_to_master.add_listener
+def on_report_to_master(client_id, data):
+    data['server_timing'] = stats.serialize()
+    stats.reset()
+
+
+@events.worker_report.add_listener
+def on_worker_report(client_id, data):
+    stats.merge(data.get('server_timing', []))
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if isinstance(environment.runner, WorkerRunner) or not stats.histograms:
+        return
+
+    lines = [f"{'Name':<40}{'Metric':<8}{'p50':>10}{'p95':>10}{'p99':>10}"]
+    for name, metric, count, mean, p50, p90, p95, p99, maximum in stats.rows():
+        lines.append(f"{name[:39]:<40}{metric:<8}{p50:>10}{p95:>10}{p99:>10}")
+    logger.info("Server-Timing (ms; queries em número absoluto):\n%s", '\n'.join(lines))
+
+    prefix = getattr(environment.parsed_options, 'csv_prefix', None)
+    if prefix:
+        path = f"{prefix}_server_timing.csv"
+        stats.write_csv(path)
+        logger.info("Server-Timing gravado em %s", path)
@@ -0,0 +1,93 @@
+"""
+Catálogo de slugs reais com seleção assimétrica (Zipf / uniforme / hot set)
+
+Em vez de sortear entre meia dúzia de slugs fixos (que ficam sempre quentes no
+cache do banco e em qualquer camada de cache), os usuários baixam o catálogo
+de /api/posts/slugs/ uma única vez por processo e sorteiam slugs com a
+distribuição escolhida:
+
+    SLUG_DISTRIBUTION=zipf     (padrão) P(rank k) ∝ 1 / k^SLUG_ZIPF_S
+    SLUG_DISTRIBUTION=uniform  todos os posts com a mesma chance
+    SLUG_DISTRIBUTION=hotset   SLUG_HOTSET_TRAFFIC dos acessos (ex.: 0.9) vão
+                               para SLUG_HOTSET_FRACTION dos posts (ex.: 0.01)
+
+SLUG_CATALOG_LIMIT limita o catálogo baixado e SLUG_SEED fixa quais posts são
+os "populares" (o catálogo é embaralhado antes de atribuir os ranks).
+"""
+
+import bisect
+import logging
+import os
+import random
+from itertools import accumulate
+
+from gevent.lock import Semaphore
+
+logger = logging.getLogger(__name__)
+
+# Usados se o catálogo não puder ser baixado (ex.: servidor antigo)
+FALLBACK_SLUGS = [
+    'post-exemplo-50', 'post-exemplo-49', 'post-exemplo-48',
+    'post-exemplo-47', 'post-exemplo-46', 'post-exemplo-45'
+]
+
+
+class SlugCatalog:
+    """Catálogo de slugs compartilhado por todos os usuários do processo"""
+
+    def __init__(self):
+        self.distribution = os.environ.get('SLUG_DISTRIBUTION', 'zipf').lower()
+        if self.distribution not in ('zipf', 'uniform', 'hotset'):
+            raise ValueError(f"SLUG_DISTRIBUTION inválida: {self.distribution!r}")
+        self.zipf_s = float(os.environ.get('SLUG_ZIPF_S', '1.0'))
+        self.hotset_fraction = float(os.environ.get('SLUG_HOTSET_FRACTION', '0.01'))
+        self.hotset_traffic = float(os.environ.get('SLUG_HOTSET_TRAFFIC', '0.9'))
+        self.limit = os.environ.get('SLUG_CATALOG_LIMIT')
+        self.seed = os.environ.get('SLUG_SEED', '42')
+        self.slugs = None
+        self._cum_weights = None
+        self._lock = Semaphore()
+
+    def load(self, client):
+        """Baixa o catálogo na primeira chamada; as demais retornam imediatamente"""
+        if self.slugs is not None:
+            return
+        with self._lock:
+            if self.slugs is not None:
+                return
+            url = "/api/posts/slugs/" + (f"?limit={self.limit}" if self.limit else "")
+            slugs = []
+            with client.get(url, name="slug_catalog", catch_response=True) as response:
+                if response.status_code == 200:
+                    slugs = response.text.split()
+                else:
+                    response.failure(f"Catálogo indisponível: HTTP {response.status_code}")
+            if not slugs:
+                logger.warning("Catálogo de slugs vazio; usando a lista fixa")
+                slugs = list(FALLBACK_SLUGS)
+            self._prepare(slugs)
+            logger.info("Catálogo: %d slugs, distribuição %s", len(slugs), self.distribution)
+
+    def _prepare(self, slugs):
+        # Ranks aleatórios (mas reproduzíveis): o post mais popular não é
+        # necessariamente o mais novo
+        random.Random(self.seed).shuffle(slugs)
+        if self.distribution == 'zipf':
+            self._cum_weights = list(accumulate(1 / (rank ** self.zipf_s) for rank in range(1, len(slugs) + 1)))
+        self._hot = max(1, int(len(slugs) * self.hotset_fraction))
+        self.slugs = slugs
+
+    def sample(self):
+        """Sorteia um slug segundo a distribuição configurada"""
+        slugs = self.slugs or FALLBACK_SLUGS
+        if self.slugs is None or self.distribution == 'uniform':
+            return random.choice(slugs)
+        if self.distribution == 'zipf':
+            position = bisect.bisect_left(self._cum_weights, random.random() * self._cum_weights[-1])
+            return slugs[min(position, len(slugs) - 1)]
+        if random.random() < self.hotset_traffic or self._hot == len(slugs):
+            return slugs[random.randrange(self._hot)]
+        return slugs[random.randrange(self._hot, len(slugs))]
+
+
+catalog = SlugCatalog()
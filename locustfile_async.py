@@ -0,0 +1,64 @@
+"""
+Teste Síncrono vs Assíncrono - views WSGI vs views async (ORM assíncrono) via ASGI
+Mesmo mix de requests nas duas classes; só muda o prefixo /async/. Rode cada
+classe contra o seu servidor com o MESMO número de workers e compare RPS e
+p95/p99 (principalmente de slow_endpoint, que segura uma thread por 1-3s; do
+lado síncrono é usada a versão bloqueante /api/slow/blocking/, já que /api/slow/
+delega o trabalho ao pool de jobs):
+
+    gunicorn blogproject.wsgi -w 4 -b 127.0.0.1:8000
+    locust -f locustfile_async.py SyncViewsUser --host=http://127.0.0.1:8000 \
+           --users 200 --spawn-rate 20 --run-time 60s --headless --csv=results/sync
+
+    uvicorn blogproject.asgi:application --workers 4 --port 8000
+    locust -f locustfile_async.py AsyncViewsUser --host=http://127.0.0.1:8000 \
+           --users 200 --spawn-rate 20 --run-time 60s --headless --csv=results/async
+"""
+
+from locust import task, between
+from loadtest.clients import BlogUser
+import loadtest.server_timing  # noqa: F401
+from loadtest.slugs import catalog
+
+
+class ViewsUser(BlogUser):
+    abstract = True
+    wait_time = between(0.5, 1.5)
+    prefix = ""
+    slow_path = "/api/slow/"
+
+    def on_start(self):
+        catalog.load(self.client)
+
+    @task(3)
+    def home(self):
+        self.client.get(f"{self.prefix}/", name="home")
+
+    @task(4)
+    def posts(self):
+        self.client.get(f"{self.prefix}/posts/optimized/", name="posts_optimized")
+
+    @task(4)
+    def post_detail(self):
+        slug = catalog.sample()
+        self.client.get(f"{self.prefix}/post/{slug}/optimized/", name="post_detail_optimized")
+
+    @task(3)
+    def api(self):
+        self.client.get(f"{self.prefix}/api/posts/", name="api_posts")
+
+    @task(1)
+    def slow(self):
+        # 1-3s de espera: sob WSGI ocupa uma thread/worker inteiro
+        self.client.get(f"{self.prefix}{self.slow_path}", name="slow_endpoint")
+
+
+class SyncViewsUser(ViewsUser):
+    """Views de views.py (sirva via WSGI: gunicorn blogproject.wsgi)"""
+    prefix = ""
+    slow_path = "/api/slow/blocking/"
+
+
+class AsyncViewsUser(ViewsUser):
+    """Views de async_views.py (sirva via ASGI: uvicorn blogproject.asgi:application)"""
+    prefix = "/async"
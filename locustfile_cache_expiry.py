@@ -0,0 +1,38 @@
+"""
+Teste de Expiração de Cache - @cache_page cego vs cache com stampede protection
+Rode o servidor com um TIMEOUT curto para cruzar várias expirações no teste:
+
+    CATEGORY_PAGE_CACHE_TIMEOUT=10 python manage.py runserver
+
+Com @cache_page, a cada expiração todos os usuários regeneram a página ao mesmo
+tempo e o p95/p99 dispara; com o cache versionado apenas um request regenera e
+os demais recebem a versão anterior (header X-Page-Cache: stale).
+"""
+
+from locust import task, between
+from loadtest.clients import BlogUser
+import loadtest.server_timing  # noqa: F401
+import os
+import random
+
+CATEGORY_IDS = [int(pk) for pk in os.environ.get('CATEGORY_IDS', '1,2,3,4,5').split(',')]
+
+
+class CacheExpiryUser(BlogUser):
+    wait_time = between(0.1, 0.3)  # Muitos requests simultâneos na expiração
+
+    @task
+    def category_cache_page(self):
+        """@cache_page(TIMEOUT): todos regeneram quando a entrada expira"""
+        category_id = random.choice(CATEGORY_IDS)
+        self.client.get(f"/category/{category_id}/cache-page/", name="category_cache_page")
+
+    @task
+    def category_versioned_cache(self):
+        """Cache versionado: single-flight + stale-while-revalidate"""
+        category_id = random.choice(CATEGORY_IDS)
+        with self.client.get(f"/category/{category_id}/", name="category_versioned_cache",
+                             catch_response=True) as response:
+            # Separa as respostas por estado do cache nas estatísticas
+            state = response.headers.get('X-Page-Cache', 'none')
+            response.request_meta['name'] = f"category_versioned_cache [{state}]"
@@ -0,0 +1,56 @@
+"""
+Calibração do Gerador de Carga - quantos RPS um core do Locust consegue gerar?
+Dispara requests sem pausa contra /api/health/ (endpoint trivial) e, ao final,
+estima o teto de RPS por core do gerador a partir do uso de CPU do processo.
+
+    LOCUST_CLIENT=fast locust -f locustfile_calibration.py --host=http://127.0.0.1:8000 \
+           --users 50 --spawn-rate 50 --run-time 30s --headless
+    LOCUST_CLIENT=requests locust -f locustfile_calibration.py ...   # para comparar
+
+Se um teste real chega perto desse teto (ou o Locust avisa de CPU alta), os
+resultados medem o gerador, não o servidor: use LOCUST_CLIENT=fast ou o modo
+distribuído.
+"""
+
+from locust import task, constant, events
+from locust.runners import WorkerRunner
+from loadtest.clients import BlogUser, CLIENT_TYPE
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+_started = {}
+
+
+class CalibrationUser(BlogUser):
+    wait_time = constant(0)  # Sem pausa: o limite é o próprio gerador
+
+    @task
+    def health(self):
+        self.client.get("/api/health/", name="calibration_health")
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    _started['wall'] = time.monotonic()
+    _started['cpu'] = time.process_time()
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    if 'wall' not in _started or isinstance(environment.runner, WorkerRunner):
+        return
+    wall = time.monotonic() - _started['wall']
+    cpu = time.process_time() - _started['cpu']
+    total = environment.stats.total
+    rps = total.num_requests / wall if wall else 0.0
+    # Fração de um core usada por este processo durante o teste
+    cpu_share = cpu / wall if wall else 0.0
+
+    logger.info(
+        "Calibração (%s): %.0f RPS com %.0f%% de um core -> ~%.0f RPS/core; p50=%sms",
+        CLIENT_TYPE, rps, cpu_share * 100, rps / cpu_share if cpu_share else 0.0,
+        total.get_response_time_percentile(0.5),
+    )
+    if cpu_share < 0.8:
+        logger.info("CPU do gerador abaixo de 80%: o servidor saturou primeiro; o teto real é maior")
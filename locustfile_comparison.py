@@ -3,12 +3,20 @@ Teste de Comparação de Performance - Versões Otimizadas vs Não Otimizadas
 Compare diretamente o impacto das otimizações
 """
 
-from locust import HttpUser, task, between
+import gevent
+from locust import task, between
+from loadtest.clients import BlogUser
+from loadtest.slugs import catalog  # Slugs reais, sorteados com distribuição Zipf/hot set
+import loadtest.server_timing  # noqa: F401
 import random
 
-class PerformanceComparisonUser(HttpUser):
+class PerformanceComparisonUser(BlogUser):
     wait_time = between(1, 2)
     
+    def on_start(self):
+        """Baixa o catálogo de slugs (uma vez por processo)"""
+        catalog.load(self.client)
+    
     @task(3)
     def test_unoptimized_posts(self):
         """Testa a versão NÃO otimizada da lista de posts"""
@@ -32,39 +40,47 @@ class PerformanceComparisonUser(HttpUser):
     @task(2)
     def test_unoptimized_post_detail(self):
         """Testa detalhes de post NÃO otimizados"""
-        post_slugs = [
-            'post-exemplo-50', 'post-exemplo-49', 'post-exemplo-48',
-            'post-exemplo-47', 'post-exemplo-46', 'post-exemplo-45'
-        ]
-        slug = random.choice(post_slugs)
+        slug = catalog.sample()
         self.client.get(f"/post/{slug}/", name="post_detail_unoptimized")
     
     @task(2)
     def test_optimized_post_detail(self):
         """Testa detalhes de post OTIMIZADOS"""
-        post_slugs = [
-            'post-exemplo-50', 'post-exemplo-49', 'post-exemplo-48',
-            'post-exemplo-47', 'post-exemplo-46', 'post-exemplo-45'
-        ]
-        slug = random.choice(post_slugs)
+        slug = catalog.sample()
         self.client.get(f"/post/{slug}/optimized/", name="post_detail_optimized")
     
     @task(1)
     def test_slow_endpoint(self):
         """Testa endpoint intencionalmente lento"""
         with self.client.get("/api/slow/", catch_response=True, name="slow_endpoint") as response:
-            if response.status_code == 200:
+            # 202: trabalho enfileirado no pool de jobs; o resultado sai no polling
+            if response.status_code in (200, 202):
                 response.success()
             elif response.status_code == 500:
                 response.failure("Server Error")
+        if response.status_code == 202:
+            self.wait_for_job(response.headers["Location"])
+    
+    def wait_for_job(self, status_url, attempts=10, interval=0.5):
+        """Consulta o status do job até concluir, como um cliente real faria"""
+        for _ in range(attempts):
+            gevent.sleep(interval)
+            with self.client.get(status_url, catch_response=True, name="job_status") as response:
+                status = response.json().get("status") if response.status_code == 200 else None
+                if status == "failed":
+                    response.failure(response.json().get("error") or "Job falhou")
+                    return
+                if status == "done":
+                    return
 
-class RealisticUser(HttpUser):
+class RealisticUser(BlogUser):
     """Usuário com comportamento mais realístico"""
     wait_time = between(3, 8)
     weight = 5  # Mais comum
     
     def on_start(self):
         """Simula chegada de novo usuário"""
+        catalog.load(self.client)
         self.client.get("/", name="new_visitor_homepage")
     
     @task(4)
@@ -78,13 +94,12 @@ class RealisticUser(HttpUser):
         
         # 3. Lê um post específico (50% chance)
         if random.random() < 0.5:
-            post_slugs = ['post-exemplo-50', 'post-exemplo-49', 'post-exemplo-48']
-            slug = random.choice(post_slugs)
+            slug = catalog.sample()
             self.client.get(f"/post/{slug}/", name="session_read_post")
             
             # 4. Pode ler mais um post relacionado (30% chance)
             if random.random() < 0.3:
-                slug = random.choice(post_slugs)
+                slug = catalog.sample()
                 self.client.get(f"/post/{slug}/", name="session_related_post")
     
     @task(1)
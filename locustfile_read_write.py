@@ -0,0 +1,62 @@
+"""
+Teste Leitura/Escrita - leituras das listas e da API disputando o banco com os
+UPDATEs do contador de views
+
+Rode o mesmo teste com e sem réplica de leitura e compare RPS e p95 das
+linhas read_* (as write_* continuam no primário):
+
+    python manage.py runserver --noreload
+    locust -f locustfile_read_write.py --host=http://127.0.0.1:8000 \
+           --users 100 --spawn-rate 20 --run-time 60s --headless --csv=results/primary_only
+
+    python manage.py sync_replica --interval 2 &
+    DB_REPLICA=1 python manage.py runserver --noreload
+    locust -f locustfile_read_write.py ... --csv=results/with_replica
+
+Para comparar os perfis do SQLite, troque a réplica por DB_PROFILE:
+
+    DB_PROFILE=default python manage.py runserver --noreload       # journal padrão, sem CONN_MAX_AGE
+    DB_PROFILE=performance python manage.py runserver --noreload   # WAL + PRAGMAs + conexões persistentes
+
+WRITE_WEIGHT (padrão 3) controla a proporção de escritas sobre 10 tasks de leitura.
+"""
+
+import os
+
+from locust import task, between
+from loadtest.clients import BlogUser
+import loadtest.server_timing  # noqa: F401
+from loadtest.slugs import catalog
+
+WRITE_WEIGHT = int(os.environ.get('WRITE_WEIGHT', 3))
+
+
+class ReadWriteUser(BlogUser):
+    wait_time = between(0.1, 0.5)
+
+    def on_start(self):
+        catalog.load(self.client)
+
+    @task(4)
+    def read_api(self):
+        self.client.get("/api/posts/", name="read_api_posts")
+
+    @task(3)
+    def read_list(self):
+        self.client.get("/posts/optimized/", name="read_posts_optimized")
+
+    @task(3)
+    def read_home(self):
+        self.client.get("/", name="read_home")
+
+    @task(WRITE_WEIGHT)
+    def write_view_count(self):
+        """Lê o post e grava views_count = views_count + 1"""
+        slug = catalog.sample()
+        self.client.get(f"/post/{slug}/optimized/", name="write_post_detail")
+
+    @task(1)
+    def write_view_save(self):
+        """Post.increment_views(): save() de todas as colunas"""
+        slug = catalog.sample()
+        self.client.get(f"/post/{slug}/", name="write_post_detail_save")
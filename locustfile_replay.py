@@ -0,0 +1,88 @@
+"""
+Replay de Tráfego Gravado - reproduz o mix real de requests em vez de tasks sintéticas
+Grave o tráfego com TRAFFIC_RECORD=1 (TrafficRecorderMiddleware) e reproduza
+respeitando os intervalos originais entre chegadas:
+
+    REPLAY_FILE=recordings/requests.jsonl REPLAY_SPEED=2 \
+        locust -f locustfile_replay.py --host=http://127.0.0.1:8000 \
+               --users 200 --spawn-rate 200 --headless
+
+Cada usuário envia um request por vez, então --users precisa cobrir a
+concorrência da gravação (RPS × latência); o resumo final avisa se o replay
+ficou para trás. O teste termina sozinho quando o arquivo acaba (exceto com
+REPLAY_LOOP=1). No modo distribuído cada worker reproduz o arquivo inteiro.
+"""
+
+from locust import task, constant, events
+from locust.exception import StopUser
+from locust.runners import MasterRunner
+from loadtest.clients import BlogUser
+import loadtest.server_timing  # noqa: F401
+from loadtest.replay import TrafficReplay, replay_headers, status_matches
+import gevent
+import logging
+
+logger = logging.getLogger(__name__)
+
+replay = TrafficReplay()
+
+
+class ReplayUser(BlogUser):
+    wait_time = constant(0)  # O ritmo vem dos timestamps da gravação
+
+    @task
+    def replay_next(self):
+        item = replay.next_request()
+        if item is None:
+            # Gravação esgotada: o último usuário com request pendente encerra o
+            # teste, em vez de deixar o Locust ocioso até --run-time
+            if not replay.in_flight and self.environment.runner is not None:
+                gevent.spawn(self.environment.runner.quit)
+            raise StopUser()
+
+        record, delay = item
+        replay.in_flight += 1
+        try:
+            if delay > 0:
+                gevent.sleep(delay)
+            self.replay_record(record)
+        finally:
+            replay.in_flight -= 1
+
+    def replay_record(self, record):
+        url = record['path'] + (f"?{record['query']}" if record.get('query') else "")
+        replay.sent += 1
+        with self.client.request(
+            record['method'], url,
+            headers=replay_headers(record),
+            # Agrupa as estatísticas pela view (um post por linha seria ilegível)
+            name=record.get('view') or record['path'],
+            catch_response=True,
+        ) as response:
+            expected = record.get('status')
+            if not status_matches(expected, response.status_code):
+                response.failure(f"status {response.status_code}, gravado {expected}")
+            else:
+                response.success()
+
+
+@events.test_start.add_listener
+def on_test_start(environment, **kwargs):
+    # O master só coordena: quem lê a gravação são os workers (ou o processo local)
+    if isinstance(environment.runner, MasterRunner):
+        return
+    try:
+        replay.open()
+    except OSError as exc:
+        # Um erro só aqui, em vez de uma exceção por usuário
+        logger.error("Gravação indisponível (REPLAY_FILE): %s", exc)
+        environment.process_exit_code = 1
+        if environment.runner is not None:
+            gevent.spawn(environment.runner.quit)
+
+
+@events.quitting.add_listener
+def on_quitting(environment, **kwargs):
+    replay.close()
+    if replay.sent or replay.skipped:
+        replay.log_summary()
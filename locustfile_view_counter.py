@@ -0,0 +1,35 @@
+"""
+Teste de Contador de Visualizações - save() vs UPDATE com F() vs escrita adiada
+Compare o throughput dos três caminhos de incremento de views_count
+"""
+
+from locust import task, between
+from loadtest.clients import BlogUser
+import loadtest.server_timing  # noqa: F401
+from loadtest.slugs import catalog
+
+
+class ViewCounterComparisonUser(BlogUser):
+    """Mesmo post, três estratégias de escrita do contador"""
+    wait_time = between(0.1, 0.5)  # Pressão de escrita alta no SQLite
+
+    def on_start(self):
+        catalog.load(self.client)
+
+    @task
+    def detail_save(self):
+        """Post.increment_views(): save() completo a cada visualização"""
+        slug = catalog.sample()
+        self.client.get(f"/post/{slug}/", name="views_save")
+
+    @task
+    def detail_f_update(self):
+        """UPDATE views_count = views_count + 1 a cada visualização"""
+        slug = catalog.sample()
+        self.client.get(f"/post/{slug}/optimized/", name="views_f_update")
+
+    @task
+    def detail_buffered(self):
+        """Incremento em memória, gravado em lote pelo view_counter"""
+        slug = catalog.sample()
+        self.client.get(f"/post/{slug}/buffered/", name="views_buffered")
@@ -3,6 +3,42 @@
 echo "🧪 Script Automatizado de Testes de Carga"
 echo "=========================================="
 
+# Gate de regressão: sobe o servidor, roda os cenários e compara com o baseline
+# Uso: ./run_tests.sh --gate [--scenario comparison] [--update-baseline]
+if [[ "$1" == "--gate" ]]; then
+    shift
+    exec python benchmark.py "$@"
+fi
+
+# Modo distribuído: um master + N workers locais (N = número de CPUs por padrão)
+# Uso: ./run_tests.sh --distributed [N]   (ou LOCUST_WORKERS=N ./run_tests.sh --distributed)
+WORKERS=0
+if [[ "$1" == "--distributed" ]]; then
+    WORKERS="${2:-${LOCUST_WORKERS:-$(nproc 2>/dev/null || getconf _NPROCESSORS_ONLN 2>/dev/null || echo 2)}}"
+    if ! [[ "$WORKERS" =~ ^[1-9][0-9]*$ ]]; then
+        echo "❌ Número de workers inválido: $WORKERS"
+        exit 1
+    fi
+fi
+MASTER_PORT="${LOCUST_MASTER_PORT:-5557}"
+WORKER_WAIT="${LOCUST_WORKER_WAIT:-60}"
+WORKER_PIDS=()
+
+# Encerra os workers que sobrarem (master caído, Ctrl+C, worker travado)
+cleanup_workers() {
+    [[ ${#WORKER_PIDS[@]} -eq 0 ]] && return
+    kill -TERM "${WORKER_PIDS[@]}" 2>/dev/null
+    for _ in 1 2 3 4 5; do
+        kill -0 "${WORKER_PIDS[@]}" 2>/dev/null || break
+        sleep 1
+    done
+    kill -KILL "${WORKER_PIDS[@]}" 2>/dev/null
+    wait "${WORKER_PIDS[@]}" 2>/dev/null
+    WORKER_PIDS=()
+}
+trap cleanup_workers EXIT
+trap 'exit 130' INT TERM
+
 # Verificar se o Django está rodando
 if ! curl -s http://127.0.0.1:8000 > /dev/null; then
     echo "❌ Servidor Django não está rodando!"
@@ -26,15 +62,48 @@ run_test() {
     echo "   Usuários: $users"
     echo "   Spawn rate: $spawn_rate/s"
     echo "   Duração: $duration"
+    [[ "$WORKERS" -gt 0 ]] && echo "   Workers: $WORKERS (modo distribuído)"
     echo ""
-    
+
+    local csv_prefix="results/$(basename "$locustfile" .py)_$(date +%Y%m%d_%H%M%S)"
+
+    if [[ "$WORKERS" -eq 0 ]]; then
+        locust -f "$locustfile" \
+               --host=http://127.0.0.1:8000 \
+               --users "$users" \
+               --spawn-rate "$spawn_rate" \
+               --run-time "$duration" \
+               --headless \
+               --csv="$csv_prefix"
+        return
+    fi
+
+    # Os workers só geram carga; stats e CSVs saem agregados do master
+    local i
+    for ((i = 0; i < WORKERS; i++)); do
+        locust -f "$locustfile" \
+               --worker \
+               --master-host 127.0.0.1 \
+               --master-port "$MASTER_PORT" \
+               --loglevel WARNING &
+        WORKER_PIDS+=($!)
+    done
+
     locust -f "$locustfile" \
            --host=http://127.0.0.1:8000 \
+           --master \
+           --master-bind-port "$MASTER_PORT" \
+           --expect-workers "$WORKERS" \
+           --expect-workers-max-wait "$WORKER_WAIT" \
            --users "$users" \
            --spawn-rate "$spawn_rate" \
            --run-time "$duration" \
            --headless \
-           --csv="results/$(basename "$locustfile" .py)_$(date +%Y%m%d_%H%M%S)"
+           --csv="$csv_prefix"
+    local status=$?
+
+    cleanup_workers
+    return $status
 }
 
 # Criar diretório para resultados
@@ -60,9 +129,10 @@ echo "📊 Resultados salvos em: ./results/"
 echo "📋 Para analisar os resultados:"
 echo "   ls -la results/"
 echo "   cat results/*_stats.csv"
+echo "   cat results/*_server_timing.csv   # tempo no banco/templates/Python por endpoint"
 echo ""
 echo "🎯 Próximos passos:"
-echo "1. Analise os arquivos CSV gerados"
+echo "1. Analise os arquivos CSV gerados (ou use o gate: ./run_tests.sh --gate)"
 echo "2. Compare métricas entre testes"
 echo "3. Identifique gargalos de performance"
 echo "4. Execute testes individuais para investigar mais:"